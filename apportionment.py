@@ -0,0 +1,185 @@
+"""
+Распределение мест в парламенте между партиями
+
+Методы:
+- hare - квота Хэйра и наибольшие остатки
+- dhondt - метод д'Ондта (делители 1, 2, 3, ...)
+- sainte_lague - метод Сент-Лагю (делители 1, 3, 5, ...)
+
+Если в списке партии меньше людей, чем ей положено мест, лишние места
+переходят к остальным партиям по тому же методу.
+"""
+import heapq
+import math
+from typing import Dict, Hashable, Optional
+
+METHODS = ('hare', 'dhondt', 'sainte_lague')
+
+
+def apportion(votes: Dict[Hashable, int], seats: int, method: str = 'hare',
+              capacity: Optional[Dict[Hashable, int]] = None) -> Dict[Hashable, int]:
+    """
+    Распределить seats мест пропорционально голосам
+
+    votes - голоса партий, capacity - длина списка каждой партии (без
+    ограничения, если не указана). Возвращает число мест каждой партии;
+    если списков не хватает на все места, часть мест остаётся пустой.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Неизвестный метод распределения: {method} (доступны: {', '.join(METHODS)})")
+
+    # Партии без голосов и без кандидатов мест не получают
+    caps = {
+        party: _cap(capacity, party)
+        for party, count in votes.items()
+        if count > 0 and _cap(capacity, party) > 0
+    }
+    result = {party: 0 for party in votes}
+
+    seats = min(seats, sum(caps.values()))
+    if seats <= 0:
+        return result
+
+    if method == 'hare':
+        allocated = _largest_remainder(votes, caps, seats)
+    else:
+        allocated = _highest_averages(votes, caps, seats, method)
+
+    result.update(allocated)
+    return result
+
+
+def _cap(capacity: Optional[Dict[Hashable, int]], party) -> float:
+    if capacity is None:
+        return math.inf
+    return capacity.get(party, 0)
+
+
+def _largest_remainder(votes, caps, seats) -> Dict[Hashable, int]:
+    """
+    Квота Хэйра; места партий с исчерпанным списком делятся заново между остальными
+
+    Доля партии - votes * seats / total, считается в целых числах: целая часть -
+    места, остаток от деления - остаток. Равные остатки выигрывает партия,
+    стоящая раньше в votes, как и при прежнем подсчёте.
+    """
+    allocated = {}
+    active = dict(caps)
+
+    # Каждый проход либо распределяет все места, либо фиксирует хотя бы одну
+    # партию на длине её списка, поэтому проходов не больше числа таких партий
+    while seats > 0 and active:
+        total = sum(votes[party] for party in active)
+
+        share = {party: min(votes[party] * seats // total, active[party]) for party in active}
+        left = seats - sum(share.values())
+
+        if left > 0:
+            # Оставшиеся места - наибольшим остаткам среди партий, у которых есть кандидаты
+            candidates = (
+                (votes[party] * seats % total, -index, party)
+                for index, party in enumerate(active)
+                if share[party] < active[party]
+            )
+            for *_, party in heapq.nlargest(left, candidates):
+                share[party] += 1
+
+        exhausted = [party for party in active if share[party] >= active[party]]
+        if sum(share.values()) == seats or not exhausted:
+            allocated.update(share)
+            break
+
+        for party in exhausted:
+            allocated[party] = active.pop(party)
+            seats -= allocated[party]
+
+    return allocated
+
+
+def _highest_averages(votes, caps, seats, method) -> Dict[Hashable, int]:
+    """
+    Метод делителей через кучу
+
+    Стартовое распределение - по общему делителю total / seats: у д'Ондта
+    целая часть доли, у Сент-Лагю доля, округлённая до ближайшего. Оно
+    отличается от итогового не больше чем на число партий. Дальше места
+    добавляются по наибольшему следующему частному или снимаются по
+    наименьшему последнему - O(P log P) вместо O(seats * P).
+    """
+    if method == 'dhondt':
+        def divisor(k):
+            return k + 1
+
+        def initial(ratio):
+            return math.floor(ratio)
+    else:
+        def divisor(k):
+            return 2 * k + 1
+
+        def initial(ratio):
+            return math.floor(ratio + 0.5)
+
+    total = sum(votes[party] for party in caps)
+    common = total / seats
+    share = {party: min(initial(votes[party] / common), caps[party]) for party in caps}
+    given = sum(share.values())
+
+    # Порядок партий - для детерминированного выбора при равенстве частных
+    order = {party: index for index, party in enumerate(caps)}
+
+    if given < seats:
+        # Добавляем места по наибольшему частному следующего места
+        heap = [
+            (-votes[party] / divisor(share[party]), -votes[party], order[party], party)
+            for party in caps if share[party] < caps[party]
+        ]
+        heapq.heapify(heap)
+        while given < seats and heap:
+            _, _, _, party = heapq.heappop(heap)
+            share[party] += 1
+            given += 1
+            if share[party] < caps[party]:
+                heapq.heappush(
+                    heap, (-votes[party] / divisor(share[party]), -votes[party], order[party], party)
+                )
+
+    elif given > seats:
+        # Снимаем места с наименьшим частным последнего места
+        heap = [
+            (votes[party] / divisor(share[party] - 1), votes[party], -order[party], party)
+            for party in caps if share[party] > 0
+        ]
+        heapq.heapify(heap)
+        while given > seats:
+            _, _, _, party = heapq.heappop(heap)
+            share[party] -= 1
+            given -= 1
+            if share[party] > 0:
+                heapq.heappush(
+                    heap, (votes[party] / divisor(share[party] - 1), votes[party], -order[party], party)
+                )
+
+    return share
+
+
+if __name__ == '__main__':
+    # Замер: python apportionment.py [партий] [мест]
+    import random
+    import sys
+    import time
+
+    parties = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    seats = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    rng = random.Random(42)
+    votes = {party: rng.randint(1, 100_000) for party in range(parties)}
+    capacity = {party: rng.randint(0, 10) for party in range(parties)}
+
+    print(f"Партий: {parties}, мест: {seats}")
+    for method in METHODS:
+        for caps in (None, capacity):
+            start = time.perf_counter()
+            result = apportion(votes, seats, method, caps)
+            elapsed = (time.perf_counter() - start) * 1000
+            label = 'со списками' if caps else 'без списков'
+            print(f"  {method:<13} {label:<12} {elapsed:8.1f} мс, роздано мест: {sum(result.values())}")
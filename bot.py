@@ -2,33 +2,104 @@
 Главный файл бота - точка входа
 """
 import logging
+import re
 from telegram.ext import Application
 
-from config import TELEGRAM_BOT_TOKEN
-from utils import setup_logger
+from config import (
+    TELEGRAM_BOT_TOKEN, UPDATE_CONCURRENCY, BOT_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT,
+    WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS, TELEGRAM_CONNECTION_POOL_SIZE
+)
+from database import async_db
+from utils import setup_logger, outbox, auth_checker, PerUserUpdateProcessor
 from handlers import get_all_handlers
-from tasks import start_scheduler
+from tasks import start_scheduler, shutdown_scheduler, restore_deadline_jobs
 
-# Настройка логирования
-logger = setup_logger()
+logger = logging.getLogger(__name__)
+
+# Типы апдейтов, которые бот получает от Telegram
+ALLOWED_UPDATES = ['message', 'callback_query']
+
+
+async def on_startup(application: Application):
+    """Запуск: продолжаем прерванную отправку уведомлений, запускаем планировщик с сохранёнными задачами"""
+    await outbox.start(application.bot)
+    start_scheduler()
+    await restore_deadline_jobs()
+
+
+async def on_shutdown(application: Application):
+    """Завершение работы: дожидаемся запросов к БД и закрываем соединения"""
+    shutdown_scheduler()
+    await outbox.stop()
+    await auth_checker.close()
+    async_db.close()
+    logger.info("💾 Соединения с БД закрыты")
+
+
+def webhook_settings() -> dict:
+    """Параметры webhook-сервера из настроек (для run_webhook / Updater.start_webhook)"""
+    return {
+        'listen': WEBHOOK_LISTEN,
+        'port': WEBHOOK_PORT,
+        'url_path': WEBHOOK_PATH,
+        'webhook_url': f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        'secret_token': WEBHOOK_SECRET_TOKEN,
+        'max_connections': WEBHOOK_MAX_CONNECTIONS,
+        'allowed_updates': ALLOWED_UPDATES,
+    }
+
+
+def run_webhook(application: Application):
+    """
+    Приём апдейтов через webhook: Telegram сам присылает их на встроенный
+    HTTP-сервер сразу, без задержки опроса. Запросы без секрета в заголовке
+    X-Telegram-Bot-Api-Secret-Token отклоняются сервером (403).
+    """
+    settings = webhook_settings()
+    logger.info(
+        f"🌐 Webhook: {settings['webhook_url']} → {settings['listen']}:{settings['port']}/{settings['url_path']}"
+    )
+    
+    application.run_webhook(**settings)
 
 
 def main():
     """Запуск бота"""
+    setup_logger()
+    
     if not TELEGRAM_BOT_TOKEN:
         logger.error("❌ TELEGRAM_BOT_TOKEN не найден в .env!")
         return
     
-    # Создаём приложение
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    if BOT_MODE not in ('polling', 'webhook'):
+        logger.error(f"❌ Неизвестный BOT_MODE: {BOT_MODE} (polling или webhook)")
+        return
+    
+    if BOT_MODE == 'webhook':
+        if not WEBHOOK_URL:
+            logger.error("❌ Для BOT_MODE=webhook нужен WEBHOOK_URL в .env!")
+            return
+        # Требование Telegram к секрету: 1-256 символов A-Z, a-z, 0-9, _ и -
+        if not re.fullmatch(r'[A-Za-z0-9_-]{1,256}', WEBHOOK_SECRET_TOKEN):
+            logger.error("❌ WEBHOOK_SECRET_TOKEN не задан или содержит недопустимые символы")
+            return
+    
+    # Создаём приложение: апдейты разных пользователей обрабатываются параллельно,
+    # пул исходящих соединений рассчитан на все одновременные апдейты и рассылки
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(PerUserUpdateProcessor(UPDATE_CONCURRENCY))
+        .connection_pool_size(TELEGRAM_CONNECTION_POOL_SIZE)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # Регистрируем все обработчики
     for handler in get_all_handlers():
         application.add_handler(handler)
     
-    # Запускаем планировщик задач
-    start_scheduler(application.bot)
-    
     logger.info("=" * 60)
     logger.info("🤖 БОТ ЗАПУЩЕН!")
     logger.info("=" * 60)
@@ -39,11 +110,15 @@ def main():
     logger.info("  ⚙️ Админ-панель")
     logger.info("  📊 Планировщик задач")
     logger.info("")
+    logger.info(f"📡 Режим: {BOT_MODE}")
     logger.info("Нажми Ctrl+C для остановки")
     logger.info("=" * 60)
     
     # Запуск бота
-    application.run_polling(allowed_updates=['message', 'callback_query'])
+    if BOT_MODE == 'webhook':
+        run_webhook(application)
+    else:
+        application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == '__main__':
@@ -14,12 +14,55 @@ API_TOKEN = os.getenv('API_TOKEN')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHANNEL_ID = os.getenv('CHANNEL_ID')
 REGISTRATION_BOT = os.getenv('REGISTRATION_BOT', '@edenor_bot')
+# Получение апдейтов: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+# Webhook: публичный https-адрес, на котором Telegram найдёт бота, и локальный сервер
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+# Секрет в заголовке X-Telegram-Bot-Api-Secret-Token: запросы без него отклоняются
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+# Сколько одновременных соединений Telegram открывает к webhook (1-100)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
 
 # Admin IDs
 ADMIN_IDS = [int(x.strip()) for x in os.getenv('ADMIN_IDS', '').split(',') if x.strip()]
 
 # Database
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'politics.db')
+DB_READER_THREADS = int(os.getenv('DB_READER_THREADS', '4'))
+# Профиль хранения: wal (рекомендуется) или legacy (rollback journal)
+DB_PROFILE = os.getenv('DB_PROFILE', 'wal')
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '16384'))
+DB_MMAP_SIZE_MB = int(os.getenv('DB_MMAP_SIZE_MB', '64'))
+# Размер кэша горячих строк (пользователи, партии, членство, депутаты)
+DB_CACHE_MAX_ENTRIES = int(os.getenv('DB_CACHE_MAX_ENTRIES', '10000'))
+
+# Журнал действий: запись пачками по размеру или по таймеру
+ACTION_LOG_BATCH_SIZE = int(os.getenv('ACTION_LOG_BATCH_SIZE', '100'))
+ACTION_LOG_FLUSH_SECONDS = float(os.getenv('ACTION_LOG_FLUSH_SECONDS', '2'))
+
+# Рассылки: общий лимит Telegram ~30 сообщений/с, в один чат - не чаще раза в секунду
+BROADCAST_RATE_PER_SECOND = float(os.getenv('BROADCAST_RATE_PER_SECOND', '25'))
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv('BROADCAST_PER_CHAT_INTERVAL', '1'))
+BROADCAST_WORKERS = int(os.getenv('BROADCAST_WORKERS', '8'))
+BROADCAST_PROGRESS_EVERY = int(os.getenv('BROADCAST_PROGRESS_EVERY', '100'))
+
+# Очередь уведомлений: размер пачки, опрос, повторы с экспоненциальной задержкой
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_POLL_SECONDS = float(os.getenv('OUTBOX_POLL_SECONDS', '5'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv('OUTBOX_BACKOFF_BASE_SECONDS', '5'))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv('OUTBOX_BACKOFF_MAX_SECONDS', '3600'))
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+
+# Обработка апдейтов: сколько одновременно (апдейты одного пользователя - всегда по очереди)
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '64'))
+# Соединения к Bot API: по одному на каждый одновременный апдейт и на каждый поток рассылки
+TELEGRAM_CONNECTION_POOL_SIZE = int(
+    os.getenv('TELEGRAM_CONNECTION_POOL_SIZE', str(UPDATE_CONCURRENCY + BROADCAST_WORKERS))
+)
 
 # Debug
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
@@ -27,10 +70,40 @@ DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 # Party Settings
 PARTY_MIN_MEMBERS = int(os.getenv('PARTY_MIN_MEMBERS', '3'))
 PARTY_CREATION_TIME_MINUTES = int(os.getenv('PARTY_CREATION_TIME_MINUTES', '10'))
+# Сколько членов партии показывать на одной странице списка
+PARTY_MEMBERS_PAGE_SIZE = int(os.getenv('PARTY_MEMBERS_PAGE_SIZE', '10'))
 
 # Parliament Settings
 PARLIAMENT_SEATS = int(os.getenv('PARLIAMENT_SEATS', '40'))
 ELECTION_THRESHOLD_PERCENT = int(os.getenv('ELECTION_THRESHOLD_PERCENT', '5'))
+# Метод распределения мест: hare, dhondt или sainte_lague
+ELECTION_METHOD = os.getenv('ELECTION_METHOD', 'hare')
+
+# Запросы к API сервера: таймаут, пул соединений и число одновременных запросов
+AUTH_TIMEOUT_SECONDS = float(os.getenv('AUTH_TIMEOUT_SECONDS', '5'))
+AUTH_MAX_CONNECTIONS = int(os.getenv('AUTH_MAX_CONNECTIONS', '10'))
+AUTH_MAX_CONCURRENCY = int(os.getenv('AUTH_MAX_CONCURRENCY', '10'))
+# Кэш ответов API: найденные игроки, ненайденные (404) и размер кэша
+AUTH_CACHE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_TTL_SECONDS', '300'))
+AUTH_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv('AUTH_NEGATIVE_CACHE_TTL_SECONDS', '30'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000'))
+# Предохранитель: сколько ошибок подряд размыкает цепь и через сколько секунд пробовать снова
+AUTH_BREAKER_FAILURE_THRESHOLD = int(os.getenv('AUTH_BREAKER_FAILURE_THRESHOLD', '5'))
+AUTH_BREAKER_RESET_SECONDS = float(os.getenv('AUTH_BREAKER_RESET_SECONDS', '30'))
+
+# Планировщик: насколько можно опоздать с запуском задачи (например, после простоя бота)
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv('SCHEDULER_MISFIRE_GRACE_SECONDS', '3600'))
 
 # Auth recheck
 AUTH_RECHECK_DAYS = int(os.getenv('AUTH_RECHECK_DAYS', '30'))
+# Срок перепроверки сдвигается случайно в пределах ± AUTH_RECHECK_JITTER_HOURS
+AUTH_RECHECK_JITTER_HOURS = float(os.getenv('AUTH_RECHECK_JITTER_HOURS', '12'))
+# Как часто забирать подошедших к перепроверке и сколько запросов в секунду на это тратить
+AUTH_RECHECK_TICK_SECONDS = int(os.getenv('AUTH_RECHECK_TICK_SECONDS', '60'))
+AUTH_RECHECK_RPS = float(os.getenv('AUTH_RECHECK_RPS', '2'))
+# Какую долю интервала занимает один запуск: остаток - запас на задержки API,
+# чтобы следующий запуск не пропускался из-за ещё идущего (max_instances=1)
+AUTH_RECHECK_TICK_FILL = float(os.getenv('AUTH_RECHECK_TICK_FILL', '0.8'))
+# Переавторизация идёт пачками: размер пачки и число одновременных проверок
+AUTH_RECHECK_BATCH_SIZE = int(os.getenv('AUTH_RECHECK_BATCH_SIZE', '200'))
+AUTH_RECHECK_CONCURRENCY = int(os.getenv('AUTH_RECHECK_CONCURRENCY', '5'))
@@ -1,3 +1,5 @@
 from .models import db
+from .async_db import async_db
+from .jobstore import SQLiteJobStore
 
-__all__ = ['db']
+__all__ = ['db', 'async_db', 'SQLiteJobStore']
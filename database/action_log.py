@@ -0,0 +1,78 @@
+"""
+Буферизованная запись журнала действий (action_logs)
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ActionLogWriter:
+    """
+    Копит записи журнала в памяти и пишет их пачкой одной транзакцией -
+    когда буфер заполнен или по таймеру. Обработчики не ждут INSERT и commit.
+    """
+
+    def __init__(self, database, batch_size: int, flush_interval: float):
+        self.database = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, name='action-log-writer', daemon=True)
+        self._thread.start()
+
+    def append(self, telegram_id: int, action: str, details: str = None):
+        """Поставить запись в очередь"""
+        # Формат как у CURRENT_TIMESTAMP, чтобы сортировка по created_at не ломалась
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+        with self._lock:
+            self._buffer.append((telegram_id, action, details, created_at))
+            is_full = len(self._buffer) >= self.batch_size
+
+        if is_full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Записать всё накопленное, возвращает количество записей"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+
+        if not batch:
+            return 0
+
+        try:
+            self.database.insert_action_logs(batch)
+        except Exception as e:
+            # Возвращаем записи в начало буфера - попробуем в следующий раз
+            with self._lock:
+                self._buffer[:0] = batch
+            logger.error(f"❌ Ошибка записи журнала действий ({len(batch)} записей): {e}")
+            return 0
+
+        return len(batch)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Остановить фоновый поток и сбросить остаток буфера"""
+        if self._stopped.is_set():
+            return
+
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+
+        written = self.flush()
+        if written:
+            logger.info(f"💾 Журнал действий сброшен при остановке: {written} записей")
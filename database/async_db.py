@@ -0,0 +1,81 @@
+"""
+Асинхронный доступ к базе данных
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DB_READER_THREADS
+from .models import Database, db
+
+# Методы, которые только читают - выполняются в пуле читателей
+READ_PREFIXES = ('get_', 'is_', 'has_', 'find_')
+
+
+class AsyncDatabase:
+    """
+    Асинхронная обёртка над Database.
+
+    Все записи идут через один выделенный поток (у SQLite один писатель),
+    чтения - через небольшой пул потоков со своими соединениями.
+    API повторяет Database: await async_db.get_user(telegram_id)
+    """
+
+    def __init__(self, database: Database, readers: int = DB_READER_THREADS):
+        self.database = database
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'database':
+            raise AttributeError(name)
+
+        method = getattr(self.database, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        executor = self._readers if name.startswith(READ_PREFIXES) else self._writer
+
+        async def call(*args, **kwargs):
+            return await self._submit(executor, method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        # Следующие обращения не проходят через __getattr__
+        setattr(self, name, call)
+        return call
+
+    async def _submit(self, executor, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def log_action(self, telegram_id: int, action: str, details: str = None):
+        """Записать действие в лог - только постановка в буфер, без похода в поток записи"""
+        self.database.log_action(telegram_id, action, details)
+
+    async def get_logs(self, limit: int = 100):
+        """Последние логи: буфер журнала сбрасывается в потоке записи, чтение - в пуле читателей"""
+        await self._submit(self._writer, self.database.action_log.flush)
+        return await self._submit(self._readers, self.database.get_logs, limit)
+
+    async def run(self, func, *args, **kwargs):
+        """Выполнить func(database, *args) в потоке записи"""
+        return await self._submit(self._writer, func, self.database, *args, **kwargs)
+
+    async def transaction(self, func, *args, **kwargs):
+        """Выполнить func(database, *args) одной транзакцией в потоке записи"""
+        def unit_of_work(database):
+            with database.transaction():
+                return func(database, *args, **kwargs)
+
+        return await self.run(unit_of_work)
+
+    def close(self):
+        """Дождаться завершения запросов и закрыть соединения"""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.database.close()
+
+
+# Глобальный экземпляр
+async_db = AsyncDatabase(db)
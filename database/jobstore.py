@@ -0,0 +1,131 @@
+"""
+Хранилище задач APScheduler в SQLite (таблица scheduler_jobs, миграция 9)
+"""
+import logging
+import pickle
+import sqlite3
+from datetime import datetime
+from typing import List, Optional
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+from config import DATABASE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    Задачи планировщика переживают перезапуск бота.
+
+    Задача хранится целиком (pickle), рядом - время следующего запуска
+    по индексу, поэтому планировщик при запуске и на каждом шаге читает
+    только ближайшие задачи, а не все. Функция задачи должна быть доступна
+    по имени модуля, аргументы - сериализуемы (никаких Bot).
+    Таблицу создаёт миграция 9, поэтому Database инициализируется раньше планировщика.
+    """
+
+    def __init__(self, path: str = None, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.path = path or DATABASE_PATH
+        self.pickle_protocol = pickle_protocol
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        # Своё соединение в режиме автокоммита: планировщик пишет из потока
+        # цикла событий, не вмешиваясь в транзакции писателя Database
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA busy_timeout = 5000')
+
+    def shutdown(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def lookup_job(self, job_id: str) -> Optional[Job]:
+        row = self._conn.execute('SELECT job_state FROM scheduler_jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now: datetime) -> List[Job]:
+        return self._get_jobs('WHERE next_run_time <= ?', (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self) -> Optional[datetime]:
+        row = self._conn.execute('''
+            SELECT next_run_time FROM scheduler_jobs
+            WHERE next_run_time IS NOT NULL
+            ORDER BY next_run_time
+            LIMIT 1
+        ''').fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self) -> List[Job]:
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def get_job_ids(self) -> set:
+        """id всех сохранённых задач без их распаковки"""
+        return {row[0] for row in self._conn.execute('SELECT id FROM scheduler_jobs')}
+
+    def add_job(self, job: Job):
+        try:
+            self._conn.execute(
+                'INSERT INTO scheduler_jobs (id, next_run_time, job_state) VALUES (?, ?, ?)',
+                (job.id, datetime_to_utc_timestamp(job.next_run_time), self._serialize(job))
+            )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job: Job):
+        cursor = self._conn.execute(
+            'UPDATE scheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?',
+            (datetime_to_utc_timestamp(job.next_run_time), self._serialize(job), job.id)
+        )
+        if cursor.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id: str):
+        cursor = self._conn.execute('DELETE FROM scheduler_jobs WHERE id = ?', (job_id,))
+        if cursor.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        self._conn.execute('DELETE FROM scheduler_jobs')
+
+    def _serialize(self, job: Job) -> bytes:
+        return pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        state = pickle.loads(job_state)
+        state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = '', params: tuple = ()) -> List[Job]:
+        # Приостановленные задачи (next_run_time IS NULL) идут в конце
+        rows = self._conn.execute(f'''
+            SELECT id, job_state FROM scheduler_jobs {where}
+            ORDER BY next_run_time IS NULL, next_run_time
+        ''', params).fetchall()
+
+        jobs, broken = [], []
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except Exception:
+                logger.exception(f"❌ Не удалось восстановить задачу {job_id}, она будет удалена")
+                broken.append((job_id,))
+
+        if broken:
+            self._conn.executemany('DELETE FROM scheduler_jobs WHERE id = ?', broken)
+
+        return jobs
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} (path={self.path})>'
@@ -0,0 +1,266 @@
+"""
+Версионные миграции схемы БД
+"""
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Версия 1 - базовая схема, которую создаёт Database.init_db
+BASE_VERSION = 1
+
+
+
+def _fill_election_tally(conn: sqlite3.Connection):
+    """Заполнить счётчики выборов по уже поданным голосам"""
+    conn.execute('''
+        INSERT INTO election_tally (election_id, party_id, votes)
+        SELECT election_id, party_id, COUNT(*) FROM election_votes
+        GROUP BY election_id, party_id
+    ''')
+    conn.execute('''
+        UPDATE elections SET total_votes = (
+            SELECT COUNT(*) FROM election_votes ev WHERE ev.election_id = elections.id
+        )
+    ''')
+
+
+def _schedule_auth_rechecks(conn: sqlite3.Connection):
+    """
+    Назначить срок перепроверки существующим пользователям
+
+    Срок - через AUTH_RECHECK_DAYS после последней проверки со сдвигом в
+    пределах суток; просроченные раскидываются по ближайшим суткам, чтобы
+    не проверять всех в первую же минуту.
+    """
+    from config import AUTH_RECHECK_DAYS
+
+    conn.execute('''
+        UPDATE users SET next_auth_check = CASE
+            WHEN datetime(last_auth_check, '+' || :days || ' days') <= datetime('now', 'localtime')
+                THEN datetime('now', 'localtime', '+' || (abs(random()) % 86400) || ' seconds')
+            ELSE datetime(last_auth_check, '+' || :days || ' days',
+                          (abs(random()) % 86400 - 43200) || ' seconds')
+        END
+    ''', {'days': AUTH_RECHECK_DAYS})
+
+
+def _compact_list_positions(conn: sqlite3.Connection):
+    """
+    Перенумеровать списки партий подряд с 1
+
+    Раньше выбывший оставлял пропуск, а вступивший получал COUNT(*) + 1 -
+    позиции могли повторяться. Порядок сохраняется, совпавшие - по дате вступления.
+    """
+    rows = conn.execute('''
+        SELECT party_id, telegram_id FROM party_members
+        ORDER BY party_id, list_position, joined_at, telegram_id
+    ''').fetchall()
+
+    updates, party_id, position = [], None, 0
+    for row_party_id, telegram_id in rows:
+        if row_party_id != party_id:
+            party_id, position = row_party_id, 0
+        position += 1
+        updates.append((position, telegram_id, party_id))
+
+    conn.executemany(
+        'UPDATE party_members SET list_position = ? WHERE telegram_id = ? AND party_id = ?', updates
+    )
+
+
+def _single_party_membership(conn: sqlite3.Connection):
+    """
+    Оставить каждому пользователю одну партию
+
+    Раньше параллельные одобрения в разные партии могли пройти оба. Остаётся
+    партия, которую пользователь возглавляет (parties.leader_telegram_id),
+    иначе - в которую он вступил первым; счётчики и позиции в списках
+    пересчитываются. Глава нескольких партий не разрешается автоматически -
+    миграция останавливается со списком конфликтов.
+
+    Строки удалённых партий (delete_party раньше полагался на ON DELETE CASCADE
+    без PRAGMA foreign_keys) удаляются до проверки - иначе они заняли бы
+    уникальный индекс.
+    """
+    orphans = conn.execute(
+        'DELETE FROM party_members WHERE party_id NOT IN (SELECT id FROM parties)'
+    ).rowcount
+    conn.execute('DELETE FROM party_applications WHERE party_id NOT IN (SELECT id FROM parties)')
+    if orphans:
+        logger.warning(f"⚠️ Удалено членств в уже удалённых партиях: {orphans}")
+
+    conflicts = conn.execute('''
+        SELECT leader_telegram_id, GROUP_CONCAT(id) FROM parties
+        GROUP BY leader_telegram_id HAVING COUNT(*) > 1
+    ''').fetchall()
+    if conflicts:
+        details = '; '.join(f"{leader_id}: партии {party_ids}" for leader_id, party_ids in conflicts)
+        raise RuntimeError(f"Пользователи возглавляют несколько партий, нужно решить вручную - {details}")
+
+    # Для DELETE, начинающегося с WITH, sqlite3 не заполняет rowcount
+    changes = conn.total_changes
+    conn.execute('''
+        WITH memberships AS (
+            SELECT pm.rowid AS member_rowid, pm.telegram_id, pm.party_id,
+                   p.leader_telegram_id = pm.telegram_id AS leads,
+                   COALESCE(pm.joined_at, '') AS joined_at
+            FROM party_members pm JOIN parties p ON p.id = pm.party_id
+        )
+        DELETE FROM party_members WHERE rowid IN (
+            SELECT m.member_rowid FROM memberships m
+            WHERE EXISTS (
+                SELECT 1 FROM memberships other
+                WHERE other.telegram_id = m.telegram_id AND other.member_rowid != m.member_rowid
+                  AND (other.leads, m.joined_at, m.party_id) > (m.leads, other.joined_at, other.party_id)
+            )
+        )
+    ''')
+    removed = conn.total_changes - changes
+    if removed:
+        logger.warning(f"⚠️ Удалено повторных членств в партиях: {removed}")
+
+    conn.execute('''
+        UPDATE parties SET members_count = (
+            SELECT COUNT(*) FROM party_members pm WHERE pm.party_id = parties.id
+        )
+    ''')
+    _compact_list_positions(conn)
+
+
+# (версия, описание, SQL-операторы или функции от соединения)
+MIGRATIONS = [
+    (2, "Индексы для частых запросов", [
+        # get_party_members / get_user_party (поиск по telegram_id покрывает первичный ключ)
+        'CREATE INDEX IF NOT EXISTS idx_party_members_party ON party_members(party_id, list_position)',
+        # get_party_applications
+        'CREATE INDEX IF NOT EXISTS idx_party_applications_party_status '
+        'ON party_applications(party_id, status, applied_at)',
+        # get_logs
+        'CREATE INDEX IF NOT EXISTS idx_action_logs_created ON action_logs(created_at)',
+        # find_user_by_username
+        'CREATE INDEX IF NOT EXISTS idx_users_username ON users(minecraft_username COLLATE NOCASE)',
+        # get_active_votings
+        'CREATE INDEX IF NOT EXISTS idx_votings_status ON votings(status, start_date)',
+        # get_all_parties(registered_only=True)
+        'CREATE INDEX IF NOT EXISTS idx_parties_registered ON parties(is_registered, members_count)',
+        # get_active_election
+        'CREATE INDEX IF NOT EXISTS idx_elections_status ON elections(status, start_date)',
+        # get_election_results
+        'CREATE INDEX IF NOT EXISTS idx_election_votes_party ON election_votes(election_id, party_id)',
+    ]),
+    (3, "Счётчики голосов на выборах", [
+        '''
+        CREATE TABLE IF NOT EXISTS election_tally (
+            election_id INTEGER,
+            party_id INTEGER,
+            votes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (election_id, party_id)
+        ) WITHOUT ROWID
+        ''',
+        'ALTER TABLE elections ADD COLUMN total_votes INTEGER NOT NULL DEFAULT 0',
+        _fill_election_tally,
+    ]),
+    (4, "Очередь исходящих уведомлений", [
+        '''
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            parse_mode TEXT,
+            reply_markup TEXT,
+            dedup_key TEXT UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+        ''',
+        # claim_notifications
+        'CREATE INDEX IF NOT EXISTS idx_outbox_status_next ON notification_outbox(status, next_attempt_at)',
+    ]),
+    (5, "Пользователи, которым нельзя доставить сообщения", [
+        'ALTER TABLE users ADD COLUMN undeliverable_at TIMESTAMP',
+        'ALTER TABLE users ADD COLUMN undeliverable_reason TEXT',
+        # Таких пользователей немного - частичный индекс только по ним
+        'CREATE INDEX IF NOT EXISTS idx_users_undeliverable ON users(telegram_id) '
+        'WHERE undeliverable_at IS NOT NULL',
+    ]),
+    (6, "Равномерный график перепроверки авторизации", [
+        'ALTER TABLE users ADD COLUMN next_auth_check TIMESTAMP',
+        _schedule_auth_rechecks,
+        # get_users_for_auth_recheck / get_pending_auth_recheck_count
+        'CREATE INDEX IF NOT EXISTS idx_users_next_auth_check ON users(next_auth_check) WHERE is_active = 1',
+    ]),
+    (7, "Индексы сроков партий и голосований", [
+        # get_pending_party_deadlines / get_pending_voting_deadlines - таймеры при запуске
+        'CREATE INDEX IF NOT EXISTS idx_parties_deadline ON parties(registration_deadline) '
+        'WHERE is_registered = 0',
+        "CREATE INDEX IF NOT EXISTS idx_votings_deadline ON votings(end_date) WHERE status = 'active'",
+    ]),
+    (8, "Хранилище задач планировщика", [
+        '''
+        CREATE TABLE IF NOT EXISTS scheduler_jobs (
+            id TEXT PRIMARY KEY,
+            next_run_time REAL,
+            job_state BLOB NOT NULL
+        )
+        ''',
+        # SQLiteJobStore.get_due_jobs / get_next_run_time
+        'CREATE INDEX IF NOT EXISTS idx_scheduler_jobs_next_run ON scheduler_jobs(next_run_time)',
+    ]),
+    (9, "Не больше одной партии на пользователя, позиции в списках без пропусков", [
+        _single_party_membership,
+        # Вступление в партию - одна строка на пользователя, параллельные вступления в разные партии
+        # не пройдут обе; индекс заодно обслуживает get_user_party
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_party_members_user ON party_members(telegram_id)',
+    ]),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Текущая версия схемы"""
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] if row and row[0] is not None else BASE_VERSION
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Применить недостающие миграции, возвращает итоговую версию схемы"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    current = get_schema_version(conn)
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+
+        # Каждая миграция - одна транзакция
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception(f"❌ Ошибка миграции {version}: {description}")
+            raise
+
+        current = version
+        logger.info(f"🔧 Миграция {version} применена: {description}")
+
+    return current
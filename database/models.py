@@ -1,21 +1,213 @@
 """
 Модели базы данных SQLite
 """
+import atexit
+import logging
+import os
+import random
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import wraps
 from typing import Optional, List, Dict, Tuple
+from urllib.request import pathname2url
 import secrets
 
-from config import DATABASE_PATH
+from config import (
+    DATABASE_PATH, DB_PROFILE, DB_CACHE_SIZE_KB, DB_MMAP_SIZE_MB,
+    ACTION_LOG_BATCH_SIZE, ACTION_LOG_FLUSH_SECONDS, DB_CACHE_MAX_ENTRIES,
+    AUTH_RECHECK_DAYS, AUTH_RECHECK_JITTER_HOURS
+)
+from .action_log import ActionLogWriter
+from .cache import LRUCache
+from .migrations import apply_migrations
+
+logger = logging.getLogger(__name__)
+
+# Профили хранения (выбираются через DB_PROFILE)
+STORAGE_PROFILES = {
+    # Настройки SQLite по умолчанию (rollback journal)
+    'legacy': {},
+    # WAL: читатели не блокируются коммитами писателя
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -DB_CACHE_SIZE_KB,  # отрицательное значение - в KiB
+        'mmap_size': DB_MMAP_SIZE_MB * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+# PRAGMA, которые имеют смысл только для соединения записи
+WRITER_ONLY_PRAGMAS = {'journal_mode', 'synchronous'}
+
+# Сколько значений подставлять в один IN (...) - меньше лимита параметров SQLite
+SQL_IN_CHUNK_SIZE = 500
+
+
+def next_auth_check(checked_at: datetime) -> datetime:
+    """Срок следующей перепроверки: через AUTH_RECHECK_DAYS со случайным сдвигом"""
+    jitter = AUTH_RECHECK_JITTER_HOURS * 3600
+    return checked_at + timedelta(days=AUTH_RECHECK_DAYS, seconds=random.uniform(-jitter, jitter))
+
+
+def transactional(method):
+    """Метод записи: выполняется в транзакции или присоединяется к текущей"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class Database:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, profile=None):
         if db_path is None:
             db_path = DATABASE_PATH
+        if profile is None:
+            profile = DB_PROFILE
+        if profile not in STORAGE_PROFILES:
+            raise ValueError(
+                f"Неизвестный профиль БД: {profile} (доступны: {', '.join(STORAGE_PROFILES)})"
+            )
+        
+        self.db_path = db_path
+        self.profile = profile
         self.db = sqlite3.connect(db_path, check_same_thread=False)
         self.db.row_factory = sqlite3.Row
+        self._apply_pragmas(self.db)
+        
+        # Соединения только для чтения и глубина транзакции - по одному на поток
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        
+        # Кэш горячих чтений: пользователь, членство, партия, статус депутата.
+        # Сбрасывается точечно после коммита каждой изменяющей операции
+        self.user_cache = LRUCache(DB_CACHE_MAX_ENTRIES)
+        self.membership_cache = LRUCache(DB_CACHE_MAX_ENTRIES)
+        self.party_cache = LRUCache(DB_CACHE_MAX_ENTRIES)
+        self.deputy_cache = LRUCache(DB_CACHE_MAX_ENTRIES)
+        # Страницы списков членов: party_id -> {(after, before, limit): строки}
+        self.member_page_cache = LRUCache(DB_CACHE_MAX_ENTRIES)
+        
+        # Версия списка зарегистрированных партий - растёт после коммита,
+        # изменившего название, главу, регистрацию или численность партии
+        self.party_list_version = 0
+        # Версии отдельных партий - для кэша карточек партий
+        self._party_versions = {}
+        
         self.init_db()
+        
+        # Журнал действий пишется пачками в фоне
+        self.action_log = ActionLogWriter(self, ACTION_LOG_BATCH_SIZE, ACTION_LOG_FLUSH_SECONDS)
+        atexit.register(self.action_log.close)
+        
+        journal_mode = self.db.execute('PRAGMA journal_mode').fetchone()[0]
+        logger.info(f"💾 БД {db_path}: профиль {profile}, journal_mode={journal_mode}")
+    
+    def _apply_pragmas(self, conn: sqlite3.Connection, reader: bool = False):
+        """Применить PRAGMA выбранного профиля к соединению"""
+        for name, value in STORAGE_PROFILES[self.profile].items():
+            if reader and name in WRITER_ONLY_PRAGMAS:
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+    
+    @property
+    def reader(self) -> sqlite3.Connection:
+        """Соединение только для чтения, принадлежащее текущему потоку"""
+        if self.db_path == ':memory:' or self.in_transaction:
+            # In-memory база видна только основному соединению,
+            # а внутри транзакции нужно видеть свои незафиксированные записи
+            return self.db
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._apply_pragmas(conn, reader=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    @property
+    def in_transaction(self) -> bool:
+        """Открыта ли транзакция в текущем потоке"""
+        return getattr(self._local, 'tx_depth', 0) > 0
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Единица работы: все записи внутри блока фиксируются одним коммитом
+        
+        Вложенные блоки присоединяются к внешней транзакции. При исключении
+        откатывается вся транзакция целиком.
+        """
+        with self._write_lock:
+            depth = getattr(self._local, 'tx_depth', 0)
+            if depth == 0:
+                self.db.execute('BEGIN IMMEDIATE')
+                self._local.on_commit = []
+            self._local.tx_depth = depth + 1
+            
+            try:
+                yield self
+            except BaseException:
+                self._local.tx_depth = depth
+                if depth == 0:
+                    self._local.on_commit = []
+                    self.db.rollback()
+                raise
+            
+            self._local.tx_depth = depth
+            if depth == 0:
+                self.db.commit()
+                callbacks, self._local.on_commit = self._local.on_commit, []
+                for callback in callbacks:
+                    callback()
+    
+    def _after_commit(self, callback):
+        """Выполнить callback после фиксации текущей транзакции (или сразу, если её нет)"""
+        if self.in_transaction:
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+    
+    def _cached(self, cache: LRUCache, key, loader):
+        """Чтение через кэш; внутри транзакции - всегда из БД"""
+        if self.in_transaction:
+            return loader()
+        
+        value = cache.get_or_load(key, loader)
+        # Копия, чтобы вызывающий код не испортил значение в кэше
+        return dict(value) if isinstance(value, dict) else value
+    
+    def _invalidate(self, cache: LRUCache, *keys):
+        """Сбросить ключи кэша после коммита текущей транзакции"""
+        self._after_commit(lambda: cache.invalidate(*keys))
+    
+    def party_version(self, party_id: int) -> int:
+        """Версия партии: меняется при любом изменении партии, её состава или списка"""
+        return self._party_versions.get(party_id, 0)
+    
+    def _party_changed(self, party_id: int):
+        """Сбросить кэш партии и обновить её версию после коммита"""
+        def apply():
+            self.party_cache.invalidate(party_id)
+            self.member_page_cache.invalidate(party_id)
+            self._party_versions[party_id] = self._party_versions.get(party_id, 0) + 1
+        self._after_commit(apply)
+    
+    def _party_list_changed(self):
+        """Отметить изменение списка партий после коммита текущей транзакции"""
+        def bump():
+            self.party_list_version += 1
+        self._after_commit(bump)
     
     def init_db(self):
         """Инициализация всех таблиц"""
@@ -159,52 +351,150 @@ class Database:
         ''')
         
         self.db.commit()
+        
+        # Индексы и дальнейшие изменения схемы - через версионные миграции
+        apply_migrations(self.db)
     
     # ========== ПОЛЬЗОВАТЕЛИ ==========
     
+    @transactional
     def add_user(self, telegram_id: int, minecraft_username: str) -> bool:
         """Добавить верифицированного пользователя"""
         try:
+            now = datetime.now()
             self.db.execute('''
-                INSERT OR REPLACE INTO users (telegram_id, minecraft_username, verified_at, last_auth_check)
-                VALUES (?, ?, ?, ?)
-            ''', (telegram_id, minecraft_username, datetime.now(), datetime.now()))
-            self.db.commit()
+                INSERT OR REPLACE INTO users
+                    (telegram_id, minecraft_username, verified_at, last_auth_check, next_auth_check)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (telegram_id, minecraft_username, now, now, next_auth_check(now)))
+            self._invalidate(self.user_cache, telegram_id)
+            
+            # Ник мог измениться - он есть в карточке партии
+            row = self.db.execute(
+                'SELECT party_id FROM party_members WHERE telegram_id = ?', (telegram_id,)
+            ).fetchone()
+            if row:
+                self._party_changed(row[0])
+                self._party_list_changed()
             return True
         except sqlite3.IntegrityError:
             return False
     
     def get_user(self, telegram_id: int) -> Optional[Dict]:
         """Получить пользователя по telegram_id"""
-        cursor = self.db.execute('SELECT * FROM users WHERE telegram_id = ?', (telegram_id,))
+        def load():
+            cursor = self.reader.execute('SELECT * FROM users WHERE telegram_id = ?', (telegram_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        
+        return self._cached(self.user_cache, telegram_id, load)
+    
+    def find_user_by_username(self, minecraft_username: str) -> Optional[Dict]:
+        """Найти пользователя по нику (без учёта регистра)"""
+        cursor = self.reader.execute(
+            'SELECT * FROM users WHERE minecraft_username = ? COLLATE NOCASE',
+            (minecraft_username,)
+        )
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    @transactional
     def update_auth_check(self, telegram_id: int) -> bool:
         """Обновить время последней проверки авторизации"""
         self.db.execute('''
             UPDATE users SET last_auth_check = ? WHERE telegram_id = ?
         ''', (datetime.now(), telegram_id))
-        self.db.commit()
+        self._invalidate(self.user_cache, telegram_id)
         return True
     
-    def get_users_for_auth_recheck(self, days: int) -> List[Dict]:
-        """Получить пользователей для переавторизации"""
-        cursor = self.db.execute('''
-            SELECT * FROM users 
-            WHERE last_auth_check < datetime('now', '-' || ? || ' days')
-            AND is_active = 1
-        ''', (days,))
+    def get_users_for_auth_recheck(self, due_before: datetime, limit: int = 500) -> List[Dict]:
+        """Пользователи, у которых подошёл срок перепроверки, самые давние первыми"""
+        cursor = self.reader.execute('''
+            SELECT * FROM users
+            WHERE is_active = 1 AND next_auth_check <= ?
+            ORDER BY next_auth_check
+            LIMIT ?
+        ''', (due_before, limit))
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_pending_auth_recheck_count(self, due_before: datetime) -> int:
+        """Сколько пользователей ждут перепроверки"""
+        cursor = self.reader.execute(
+            'SELECT COUNT(*) FROM users WHERE is_active = 1 AND next_auth_check <= ?', (due_before,)
+        )
+        return cursor.fetchone()[0]
+    
+    @transactional
+    def record_auth_checks(self, linked: List[int], unlinked: List[int]) -> bool:
+        """Записать итог пачки проверок: linked - подтверждены, unlinked - отвязаны"""
+        now = datetime.now()
+        self.db.executemany(
+            'UPDATE users SET last_auth_check = ?, next_auth_check = ? WHERE telegram_id = ?',
+            [(now, next_auth_check(now), telegram_id) for telegram_id in linked]
+        )
+        self.db.executemany(
+            'UPDATE users SET is_active = 0 WHERE telegram_id = ?',
+            [(telegram_id,) for telegram_id in unlinked]
+        )
+        self._invalidate(self.user_cache, *linked, *unlinked)
+        return True
+    
+    @transactional
+    def defer_auth_checks(self, telegram_ids: List[int], until: datetime) -> bool:
+        """Отложить перепроверку пользователей до until"""
+        self.db.executemany(
+            'UPDATE users SET next_auth_check = ? WHERE telegram_id = ?',
+            [(until, telegram_id) for telegram_id in telegram_ids]
+        )
+        self._invalidate(self.user_cache, *telegram_ids)
+        return True
+    
+    @transactional
     def deactivate_user(self, telegram_id: int) -> bool:
         """Деактивировать пользователя"""
         self.db.execute('UPDATE users SET is_active = 0 WHERE telegram_id = ?', (telegram_id,))
-        self.db.commit()
+        self._invalidate(self.user_cache, telegram_id)
         return True
     
+    @transactional
+    def mark_undeliverable(self, items: List[Tuple[int, str]]) -> bool:
+        """Отметить пользователей, которым нельзя доставить сообщение: (telegram_id, причина)"""
+        now = datetime.now()
+        self.db.executemany(
+            'UPDATE users SET undeliverable_at = ?, undeliverable_reason = ? WHERE telegram_id = ?',
+            [(now, reason, telegram_id) for telegram_id, reason in items]
+        )
+        self._invalidate(self.user_cache, *[telegram_id for telegram_id, _ in items])
+        return True
+    
+    @transactional
+    def clear_undeliverable(self, telegram_id: int) -> bool:
+        """Снять отметку недоставляемости (пользователь снова пишет боту)"""
+        self.db.execute('''
+            UPDATE users SET undeliverable_at = NULL, undeliverable_reason = NULL
+            WHERE telegram_id = ?
+        ''', (telegram_id,))
+        self._invalidate(self.user_cache, telegram_id)
+        return True
+    
+    def get_undeliverable_ids(self, telegram_ids: List[int]) -> set:
+        """Какие из telegram_ids отмечены как недоставляемые"""
+        telegram_ids = list(dict.fromkeys(telegram_ids))
+        found = set()
+        
+        # Поиск по первичному ключу пачками - в пределах лимита параметров SQLite
+        for start in range(0, len(telegram_ids), SQL_IN_CHUNK_SIZE):
+            chunk = telegram_ids[start:start + SQL_IN_CHUNK_SIZE]
+            cursor = self.reader.execute(f'''
+                SELECT telegram_id FROM users
+                WHERE telegram_id IN ({', '.join('?' * len(chunk))}) AND undeliverable_at IS NOT NULL
+            ''', chunk)
+            found.update(row[0] for row in cursor.fetchall())
+        return found
+    
     # ========== ПАРТИИ ==========
     
+    @transactional
     def create_party(self, name: str, ideology: str, description: str,
                     leader_telegram_id: int, deadline_minutes: int) -> Tuple[int, str]:
         """Создать партию с кодом приглашения"""
@@ -225,30 +515,49 @@ class Database:
             VALUES (?, ?, 'leader', 1)
         ''', (leader_telegram_id, party_id))
         
-        self.db.commit()
+        self._invalidate(self.membership_cache, leader_telegram_id)
+        self._party_changed(party_id)
         return party_id, invite_code
     
     def get_party_by_id(self, party_id: int) -> Optional[Dict]:
         """Получить партию по ID"""
-        cursor = self.db.execute('SELECT * FROM parties WHERE id = ?', (party_id,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        def load():
+            cursor = self.reader.execute('SELECT * FROM parties WHERE id = ?', (party_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        
+        return self._cached(self.party_cache, party_id, load)
+    
+    def get_pending_party_deadlines(self) -> List[Dict]:
+        """Незарегистрированные партии и сроки окончания их набора"""
+        cursor = self.reader.execute('''
+            SELECT id, registration_deadline FROM parties
+            WHERE is_registered = 0
+            ORDER BY registration_deadline
+        ''')
+        return [dict(row) for row in cursor.fetchall()]
     
     def get_party_by_invite(self, invite_code: str) -> Optional[Dict]:
         """Получить партию по коду приглашения"""
-        cursor = self.db.execute('SELECT * FROM parties WHERE invite_code = ?', (invite_code,))
+        cursor = self.reader.execute('SELECT * FROM parties WHERE invite_code = ?', (invite_code,))
         row = cursor.fetchone()
         return dict(row) if row else None
     
     def get_user_party(self, telegram_id: int) -> Optional[Dict]:
         """Получить партию пользователя"""
-        cursor = self.db.execute('''
-            SELECT p.* FROM parties p
-            JOIN party_members pm ON p.id = pm.party_id
-            WHERE pm.telegram_id = ?
-        ''', (telegram_id,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        def load_party_id():
+            cursor = self.reader.execute('''
+                SELECT pm.party_id FROM party_members pm
+                JOIN parties p ON p.id = pm.party_id
+                WHERE pm.telegram_id = ?
+            ''', (telegram_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        
+        party_id = self._cached(self.membership_cache, telegram_id, load_party_id)
+        if party_id is None:
+            return None
+        return self.get_party_by_id(party_id)
     
     def get_all_parties(self, registered_only: bool = False) -> List[Dict]:
         """Получить все партии"""
@@ -257,38 +566,75 @@ class Database:
             query += ' WHERE is_registered = 1'
         query += ' ORDER BY members_count DESC'
         
-        cursor = self.db.execute(query)
+        cursor = self.reader.execute(query)
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_registered_parties_with_leaders(self) -> List[Dict]:
+        """Зарегистрированные партии с ником главы - одним запросом"""
+        cursor = self.reader.execute('''
+            SELECT p.*, u.minecraft_username AS leader_username
+            FROM parties p
+            LEFT JOIN users u ON u.telegram_id = p.leader_telegram_id
+            WHERE p.is_registered = 1
+            ORDER BY p.members_count DESC
+        ''')
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def get_registered_party_by_name(self, name: str) -> Optional[Dict]:
+        """Найти зарегистрированную партию по названию (без учёта регистра)"""
+        cursor = self.reader.execute(
+            'SELECT * FROM parties WHERE name = ? COLLATE NOCASE AND is_registered = 1',
+            (name,)
+        )
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    @transactional
     def update_party_name(self, party_id: int, new_name: str) -> bool:
         """Изменить название партии"""
         try:
             self.db.execute('UPDATE parties SET name = ? WHERE id = ?', (new_name, party_id))
-            self.db.commit()
+            self._party_changed(party_id)
+            self._party_list_changed()
             return True
         except sqlite3.IntegrityError:
             return False
     
+    @transactional
     def set_party_photo(self, party_id: int, photo_file_id: str) -> bool:
         """Установить фото партии"""
         self.db.execute('UPDATE parties SET photo_file_id = ? WHERE id = ?', (photo_file_id, party_id))
-        self.db.commit()
+        self._party_changed(party_id)
         return True
     
+    @transactional
     def register_party(self, party_id: int) -> bool:
         """Зарегистрировать партию (набран минимум членов)"""
         self.db.execute('UPDATE parties SET is_registered = 1 WHERE id = ?', (party_id,))
-        self.db.commit()
+        self._party_changed(party_id)
+        self._party_list_changed()
         return True
     
+    @transactional
     def delete_party(self, party_id: int) -> bool:
         """Удалить партию"""
+        cursor = self.db.execute('SELECT telegram_id FROM party_members WHERE party_id = ?', (party_id,))
+        member_ids = [row[0] for row in cursor.fetchall()]
+        
+        # PRAGMA foreign_keys не включён - ON DELETE CASCADE не срабатывает, члены и заявки
+        # удаляются явно: иначе бывшие члены не смогут вступить в другую партию
+        self.db.execute('DELETE FROM party_members WHERE party_id = ?', (party_id,))
+        self.db.execute('DELETE FROM party_applications WHERE party_id = ?', (party_id,))
         self.db.execute('DELETE FROM parties WHERE id = ?', (party_id,))
-        self.db.commit()
+        
+        self._party_changed(party_id)
+        self._invalidate(self.membership_cache, *member_ids)
+        self._party_list_changed()
         return True
     
     # ========== ЧЛЕНЫ ПАРТИЙ ==========
     
+    @transactional
     def apply_to_party(self, telegram_id: int, party_id: int) -> bool:
         """Подать заявку на вступление"""
         # Удаляем старые отклонённые/одобренные заявки
@@ -302,7 +648,6 @@ class Database:
                 INSERT INTO party_applications (telegram_id, party_id)
                 VALUES (?, ?)
             ''', (telegram_id, party_id))
-            self.db.commit()
             return True
         except sqlite3.IntegrityError:
             # Заявка уже pending
@@ -310,7 +655,7 @@ class Database:
     
     def get_party_applications(self, party_id: int, status: str = 'pending') -> List[Dict]:
         """Получить заявки партии"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT pa.*, u.minecraft_username 
             FROM party_applications pa
             JOIN users u ON pa.telegram_id = u.telegram_id
@@ -321,7 +666,7 @@ class Database:
     
     def get_application_by_id(self, app_id: int) -> Optional[Dict]:
         """Получить заявку по ID"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT pa.*, u.minecraft_username 
             FROM party_applications pa
             JOIN users u ON pa.telegram_id = u.telegram_id
@@ -330,29 +675,40 @@ class Database:
         row = cursor.fetchone()
         return dict(row) if row else None
     
-    def approve_application(self, application_id: int) -> bool:
-        """Одобрить заявку"""
+    @transactional
+    def approve_application(self, application_id: int) -> Optional[str]:
+        """
+        Одобрить заявку, возвращает новый статус заявки
+
+        None - заявки нет или она уже рассмотрена (повторное нажатие ничего не меняет).
+        'rejected' - заявитель уже состоит в партии, заявка отклонена.
+        """
         cursor = self.db.execute('''
-            SELECT telegram_id, party_id FROM party_applications WHERE id = ?
+            SELECT telegram_id, party_id FROM party_applications WHERE id = ? AND status = 'pending'
         ''', (application_id,))
         app = cursor.fetchone()
         
         if not app:
-            return False
+            return None
         
         telegram_id, party_id = app
         
-        # Получаем текущее количество членов
-        cursor = self.db.execute('''
-            SELECT COUNT(*) FROM party_members WHERE party_id = ?
-        ''', (party_id,))
-        count = cursor.fetchone()[0]
+        # Членство проверяется в той же транзакции, что и вступление:
+        # одобрения в разных партиях идут под разными замками
+        cursor = self.db.execute(
+            'SELECT 1 FROM party_members WHERE telegram_id = ?', (telegram_id,)
+        )
+        if cursor.fetchone():
+            self.db.execute('''
+                UPDATE party_applications SET status = 'rejected' WHERE id = ?
+            ''', (application_id,))
+            return 'rejected'
         
-        # Добавляем в партию
+        # Добавляем в конец списка
         self.db.execute('''
             INSERT INTO party_members (telegram_id, party_id, list_position)
             VALUES (?, ?, ?)
-        ''', (telegram_id, party_id, count + 1))
+        ''', (telegram_id, party_id, self._next_list_position(party_id)))
         
         # Обновляем заявку
         self.db.execute('''
@@ -364,20 +720,62 @@ class Database:
             UPDATE parties SET members_count = members_count + 1 WHERE id = ?
         ''', (party_id,))
         
-        self.db.commit()
-        return True
+        self._invalidate(self.membership_cache, telegram_id)
+        self._party_changed(party_id)
+        self._party_list_changed()
+        return 'approved'
     
+    @transactional
     def reject_application(self, application_id: int) -> bool:
-        """Отклонить заявку"""
-        self.db.execute('''
-            UPDATE party_applications SET status = 'rejected' WHERE id = ?
+        """Отклонить заявку, False - она уже рассмотрена"""
+        cursor = self.db.execute('''
+            UPDATE party_applications SET status = 'rejected' WHERE id = ? AND status = 'pending'
         ''', (application_id,))
-        self.db.commit()
-        return True
+        return cursor.rowcount > 0
+    
+    def _next_list_position(self, party_id: int) -> int:
+        """Позиция в конце списка партии (внутри транзакции записи)"""
+        cursor = self.db.execute('''
+            SELECT COALESCE(MAX(list_position), 0) + 1 FROM party_members WHERE party_id = ?
+        ''', (party_id,))
+        return cursor.fetchone()[0]
+    
+    @transactional
+    def add_party_member(self, telegram_id: int, party_id: int) -> Optional[int]:
+        """
+        Добавить участника напрямую (по приглашению главы), возвращает позицию в списке
+
+        None - пользователь уже состоит в партии (уникальный индекс по telegram_id)
+        """
+        position = self._next_list_position(party_id)
+        
+        try:
+            self.db.execute('''
+                INSERT INTO party_members (telegram_id, party_id, list_position)
+                VALUES (?, ?, ?)
+            ''', (telegram_id, party_id, position))
+        except sqlite3.IntegrityError:
+            return None
+        
+        # Обновляем счётчик
+        self.db.execute('''
+            UPDATE parties SET members_count = members_count + 1 WHERE id = ?
+        ''', (party_id,))
+        
+        # Удаляем старые заявки если были
+        self.db.execute('''
+            DELETE FROM party_applications 
+            WHERE telegram_id = ? AND party_id = ?
+        ''', (telegram_id, party_id))
+        
+        self._invalidate(self.membership_cache, telegram_id)
+        self._party_changed(party_id)
+        self._party_list_changed()
+        return position
     
     def get_party_members(self, party_id: int) -> List[Dict]:
         """Получить всех членов партии"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT pm.*, u.minecraft_username 
             FROM party_members pm
             JOIN users u ON pm.telegram_id = u.telegram_id
@@ -386,9 +784,62 @@ class Database:
         ''', (party_id,))
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_party_members_page(self, party_id: int, after: int = 0, limit: int = 10,
+                               before: int = None) -> List[Dict]:
+        """
+        Страница членов партии по позиции в списке (keyset по индексу party_id, list_position):
+        limit следующих после позиции after или, если задан before, limit предыдущих перед ней.
+        Позиции в партии уникальны (см. remove_member), поэтому курсора из одной позиции хватает.
+        Страницы партии кэшируются до изменения её состава.
+        """
+        def load():
+            if before:
+                cursor = self.reader.execute('''
+                    SELECT * FROM (
+                        SELECT pm.*, u.minecraft_username
+                        FROM party_members pm
+                        JOIN users u ON pm.telegram_id = u.telegram_id
+                        WHERE pm.party_id = ? AND pm.list_position < ?
+                        ORDER BY pm.list_position DESC
+                        LIMIT ?
+                    ) ORDER BY list_position ASC
+                ''', (party_id, before, limit))
+            else:
+                cursor = self.reader.execute('''
+                    SELECT pm.*, u.minecraft_username
+                    FROM party_members pm
+                    JOIN users u ON pm.telegram_id = u.telegram_id
+                    WHERE pm.party_id = ? AND pm.list_position > ?
+                    ORDER BY pm.list_position ASC
+                    LIMIT ?
+                ''', (party_id, after, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        
+        if self.in_transaction:
+            return load()
+        
+        # Страница загруженная во время изменения партии попадёт в уже
+        # сброшенный словарь и больше не будет прочитана
+        pages = self.member_page_cache.get_or_load(party_id, dict)
+        key = (after, before, limit)
+        if key not in pages:
+            pages[key] = load()
+        return [dict(member) for member in pages[key]]
+    
+    def get_party_member_recipients(self, party_id: int, exclude_id: int = None) -> List[int]:
+        """telegram_id членов партии для рассылки - без недоставляемых"""
+        cursor = self.reader.execute('''
+            SELECT pm.telegram_id
+            FROM party_members pm
+            JOIN users u ON pm.telegram_id = u.telegram_id
+            WHERE pm.party_id = ? AND u.undeliverable_at IS NULL
+            ORDER BY pm.list_position ASC
+        ''', (party_id,))
+        return [row[0] for row in cursor.fetchall() if row[0] != exclude_id]
+    
     def get_member_info(self, telegram_id: int, party_id: int) -> Optional[Dict]:
         """Получить информацию о члене партии"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT pm.*, u.minecraft_username 
             FROM party_members pm
             JOIN users u ON pm.telegram_id = u.telegram_id
@@ -397,19 +848,38 @@ class Database:
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    @transactional
     def remove_member(self, telegram_id: int, party_id: int) -> bool:
-        """Удалить участника из партии"""
+        """Удалить участника из партии, следующие за ним сдвигаются вверх"""
+        cursor = self.db.execute('''
+            SELECT list_position FROM party_members WHERE telegram_id = ? AND party_id = ?
+        ''', (telegram_id, party_id))
+        row = cursor.fetchone()
+        
+        if not row:
+            return False
+        
         self.db.execute('''
             DELETE FROM party_members WHERE telegram_id = ? AND party_id = ?
         ''', (telegram_id, party_id))
         
+        # Позиции остаются 1..N без пропусков и повторов - на них держатся
+        # страницы списка (курсор по позиции) и редактор порядка
+        self.db.execute('''
+            UPDATE party_members SET list_position = list_position - 1
+            WHERE party_id = ? AND list_position > ?
+        ''', (party_id, row[0]))
+        
         self.db.execute('''
             UPDATE parties SET members_count = members_count - 1 WHERE id = ?
         ''', (party_id,))
         
-        self.db.commit()
+        self._invalidate(self.membership_cache, telegram_id)
+        self._party_changed(party_id)
+        self._party_list_changed()
         return True
     
+    @transactional
     def transfer_leadership(self, party_id: int, new_leader_id: int) -> bool:
         """Передать лидерство"""
         # Снять роль лидера у старого
@@ -429,9 +899,11 @@ class Database:
             UPDATE parties SET leader_telegram_id = ? WHERE id = ?
         ''', (new_leader_id, party_id))
         
-        self.db.commit()
+        self._party_changed(party_id)
+        self._party_list_changed()
         return True
     
+    @transactional
     def swap_member_positions(self, party_id: int, pos1: int, pos2: int) -> bool:
         """Поменять местами участников в списке"""
         self.db.execute('''
@@ -442,17 +914,63 @@ class Database:
             END
             WHERE party_id = ? AND list_position IN (?, ?)
         ''', (pos1, pos2, pos2, pos1, party_id, pos1, pos2))
-        self.db.commit()
+        self._party_changed(party_id)
+        return True
+    
+    @transactional
+    def move_member(self, party_id: int, telegram_id: int, new_position: int) -> bool:
+        """Переместить участника на новую позицию со сдвигом остальных"""
+        cursor = self.db.execute('''
+            SELECT list_position FROM party_members WHERE telegram_id = ? AND party_id = ?
+        ''', (telegram_id, party_id))
+        row = cursor.fetchone()
+        
+        if not row:
+            return False
+        
+        old_position = row[0]
+        if old_position == new_position:
+            return False
+        
+        # Позиции идут подряд с 1 (см. remove_member) - за последней позицией пусто
+        cursor = self.db.execute('SELECT members_count FROM parties WHERE id = ?', (party_id,))
+        if not 1 <= new_position <= cursor.fetchone()[0]:
+            return False
+        
+        self.db.execute(
+            'UPDATE party_members SET list_position = ? WHERE telegram_id = ? AND party_id = ?',
+            (new_position, telegram_id, party_id)
+        )
+        
+        # Сдвигаем остальных
+        if new_position < old_position:
+            # Двигаем вверх - сдвигаем тех кто между вниз
+            self.db.execute('''
+                UPDATE party_members 
+                SET list_position = list_position + 1 
+                WHERE party_id = ? AND list_position >= ? AND list_position < ? AND telegram_id != ?
+            ''', (party_id, new_position, old_position, telegram_id))
+        else:
+            # Двигаем вниз - сдвигаем тех кто между вверх
+            self.db.execute('''
+                UPDATE party_members 
+                SET list_position = list_position - 1 
+                WHERE party_id = ? AND list_position > ? AND list_position <= ? AND telegram_id != ?
+            ''', (party_id, old_position, new_position, telegram_id))
+        
+        self._party_changed(party_id)
         return True
     
     # ========== ПАРЛАМЕНТ ==========
     
+    @transactional
     def clear_parliament(self) -> bool:
         """Распустить парламент"""
         self.db.execute('DELETE FROM parliament')
-        self.db.commit()
+        self._after_commit(self.deputy_cache.clear)
         return True
     
+    @transactional
     def add_to_parliament(self, telegram_id: int, party_id: int, term_months: int = 6) -> bool:
         """Добавить депутата в парламент"""
         term_start = datetime.now()
@@ -462,12 +980,25 @@ class Database:
             INSERT INTO parliament (telegram_id, party_id, term_start, term_end)
             VALUES (?, ?, ?, ?)
         ''', (telegram_id, party_id, term_start, term_end))
-        self.db.commit()
+        self._invalidate(self.deputy_cache, telegram_id)
         return True
     
+    @transactional
+    def add_to_parliament_many(self, deputies: List[Tuple[int, int]], term_months: int = 6) -> int:
+        """Добавить депутатов пачкой: [(telegram_id, party_id), ...]"""
+        term_start = datetime.now()
+        term_end = term_start + timedelta(days=term_months * 30)
+        
+        self.db.executemany('''
+            INSERT INTO parliament (telegram_id, party_id, term_start, term_end)
+            VALUES (?, ?, ?, ?)
+        ''', [(telegram_id, party_id, term_start, term_end) for telegram_id, party_id in deputies])
+        self._invalidate(self.deputy_cache, *[telegram_id for telegram_id, _ in deputies])
+        return len(deputies)
+    
     def get_parliament_members(self) -> List[Dict]:
         """Получить всех депутатов"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT p.*, u.minecraft_username, parties.name as party_name
             FROM parliament p
             JOIN users u ON p.telegram_id = u.telegram_id
@@ -478,42 +1009,46 @@ class Database:
     
     def is_deputy(self, telegram_id: int) -> bool:
         """Проверить является ли депутатом"""
-        cursor = self.db.execute('''
-            SELECT 1 FROM parliament WHERE telegram_id = ?
-        ''', (telegram_id,))
-        return cursor.fetchone() is not None
+        def load():
+            cursor = self.reader.execute('''
+                SELECT 1 FROM parliament WHERE telegram_id = ?
+            ''', (telegram_id,))
+            return cursor.fetchone() is not None
+        
+        return self._cached(self.deputy_cache, telegram_id, load)
     
     def get_parliament_count(self) -> int:
         """Получить количество депутатов"""
-        cursor = self.db.execute('SELECT COUNT(*) FROM parliament')
+        cursor = self.reader.execute('SELECT COUNT(*) FROM parliament')
         return cursor.fetchone()[0]
     
     # ========== ВЫБОРЫ ==========
     
+    @transactional
     def create_election(self, end_date: datetime) -> int:
         """Создать выборы"""
         cursor = self.db.execute('''
             INSERT INTO elections (end_date) VALUES (?)
         ''', (end_date,))
         election_id = cursor.lastrowid
-        self.db.commit()
         return election_id
     
     def get_election_by_id(self, election_id: int) -> Optional[Dict]:
         """Получить выборы по ID"""
-        cursor = self.db.execute('SELECT * FROM elections WHERE id = ?', (election_id,))
+        cursor = self.reader.execute('SELECT * FROM elections WHERE id = ?', (election_id,))
         row = cursor.fetchone()
         return dict(row) if row else None
     
     def get_active_election(self) -> Optional[Dict]:
         """Получить активные выборы"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT * FROM elections WHERE status = 'active' 
             ORDER BY start_date DESC LIMIT 1
         ''')
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    @transactional
     def vote_in_election(self, election_id: int, voter_id: int, party_id: int) -> bool:
         """Проголосовать на выборах"""
         try:
@@ -521,56 +1056,110 @@ class Database:
                 INSERT INTO election_votes (election_id, voter_telegram_id, party_id)
                 VALUES (?, ?, ?)
             ''', (election_id, voter_id, party_id))
-            self.db.commit()
-            return True
         except sqlite3.IntegrityError:
             return False
+        
+        # Счётчики обновляются в той же транзакции, что и сам голос
+        self.db.execute('''
+            INSERT INTO election_tally (election_id, party_id, votes) VALUES (?, ?, 1)
+            ON CONFLICT (election_id, party_id) DO UPDATE SET votes = votes + 1
+        ''', (election_id, party_id))
+        self.db.execute('''
+            UPDATE elections SET total_votes = total_votes + 1 WHERE id = ?
+        ''', (election_id,))
+        return True
     
     def get_election_results(self, election_id: int) -> List[Dict]:
         """Получить результаты выборов"""
-        cursor = self.db.execute('''
-            SELECT p.id, p.name, COUNT(ev.voter_telegram_id) as votes
+        cursor = self.reader.execute('''
+            SELECT p.id, p.name, COALESCE(t.votes, 0) as votes
             FROM parties p
-            LEFT JOIN election_votes ev ON p.id = ev.party_id AND ev.election_id = ?
+            LEFT JOIN election_tally t ON t.party_id = p.id AND t.election_id = ?
             WHERE p.is_registered = 1
-            GROUP BY p.id
             ORDER BY votes DESC
         ''', (election_id,))
         return [dict(row) for row in cursor.fetchall()]
     
     def get_election_total_votes(self, election_id: int) -> int:
         """Получить общее количество голосов"""
+        cursor = self.reader.execute('''
+            SELECT total_votes FROM elections WHERE id = ?
+        ''', (election_id,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    @transactional
+    def rebuild_election_tally(self, election_id: int) -> int:
+        """
+        Сверить счётчики выборов с голосами и пересобрать их
+        
+        Возвращает количество расхождений (0 - счётчики были верны).
+        """
         cursor = self.db.execute('''
-            SELECT COUNT(*) FROM election_votes WHERE election_id = ?
+            SELECT party_id, COUNT(*) FROM election_votes
+            WHERE election_id = ? GROUP BY party_id
         ''', (election_id,))
-        return cursor.fetchone()[0]
+        actual = dict(cursor.fetchall())
+        
+        cursor = self.db.execute('''
+            SELECT party_id, votes FROM election_tally
+            WHERE election_id = ? AND votes > 0
+        ''', (election_id,))
+        stored = dict(cursor.fetchall())
+        
+        total_row = self.db.execute(
+            'SELECT total_votes FROM elections WHERE id = ?', (election_id,)
+        ).fetchone()
+        stored_total = total_row[0] if total_row else 0
+        
+        mismatches = sum(
+            1 for party_id in actual.keys() | stored.keys()
+            if actual.get(party_id, 0) != stored.get(party_id, 0)
+        )
+        if stored_total != sum(actual.values()):
+            mismatches += 1
+        
+        if mismatches:
+            self.db.execute('DELETE FROM election_tally WHERE election_id = ?', (election_id,))
+            self.db.executemany(
+                'INSERT INTO election_tally (election_id, party_id, votes) VALUES (?, ?, ?)',
+                [(election_id, party_id, votes) for party_id, votes in actual.items()]
+            )
+            self.db.execute(
+                'UPDATE elections SET total_votes = ? WHERE id = ?',
+                (sum(actual.values()), election_id)
+            )
+            logger.warning(f"⚠️ Счётчики выборов {election_id} пересобраны: {mismatches} расхождений")
+        
+        return mismatches
     
     def has_voted_in_election(self, election_id: int, telegram_id: int) -> bool:
         """Проверить проголосовал ли"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT 1 FROM election_votes 
             WHERE election_id = ? AND voter_telegram_id = ?
         ''', (election_id, telegram_id))
         return cursor.fetchone() is not None
     
+    @transactional
     def close_election(self, election_id: int, results: str) -> bool:
         """Закрыть выборы"""
         self.db.execute('''
             UPDATE elections SET status = 'closed', results = ? WHERE id = ?
         ''', (results, election_id))
-        self.db.commit()
         return True
     
+    @transactional
     def set_election_channel_message(self, election_id: int, message_id: int) -> bool:
         """Установить ID сообщения в канале"""
         self.db.execute('''
             UPDATE elections SET channel_message_id = ? WHERE id = ?
         ''', (message_id, election_id))
-        self.db.commit()
         return True
     
     # ========== ГОЛОСОВАНИЯ ==========
     
+    @transactional
     def create_voting(self, title: str, description: str, voting_type: str,
                      created_by: int, end_date: datetime) -> int:
         """Создать голосование"""
@@ -579,23 +1168,32 @@ class Database:
             VALUES (?, ?, ?, ?, ?)
         ''', (title, description, voting_type, created_by, end_date))
         voting_id = cursor.lastrowid
-        self.db.commit()
         return voting_id
     
     def get_voting_by_id(self, voting_id: int) -> Optional[Dict]:
         """Получить голосование по ID"""
-        cursor = self.db.execute('SELECT * FROM votings WHERE id = ?', (voting_id,))
+        cursor = self.reader.execute('SELECT * FROM votings WHERE id = ?', (voting_id,))
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    def get_pending_voting_deadlines(self) -> List[Dict]:
+        """Активные голосования и сроки их окончания"""
+        cursor = self.reader.execute('''
+            SELECT id, end_date FROM votings
+            WHERE status = 'active'
+            ORDER BY end_date
+        ''')
+        return [dict(row) for row in cursor.fetchall()]
+    
     def get_active_votings(self) -> List[Dict]:
         """Получить все активные голосования"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT * FROM votings WHERE status = 'active' 
             ORDER BY start_date DESC
         ''')
         return [dict(row) for row in cursor.fetchall()]
     
+    @transactional
     def vote(self, voting_id: int, voter_id: int, vote: str) -> bool:
         """Проголосовать"""
         try:
@@ -609,15 +1207,13 @@ class Database:
                 self.db.execute('UPDATE votings SET votes_for = votes_for + 1 WHERE id = ?', (voting_id,))
             elif vote == 'against':
                 self.db.execute('UPDATE votings SET votes_against = votes_against + 1 WHERE id = ?', (voting_id,))
-            
-            self.db.commit()
             return True
         except sqlite3.IntegrityError:
             return False
     
     def has_voted(self, voting_id: int, telegram_id: int) -> bool:
         """Проверить проголосовал ли"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT 1 FROM voting_votes 
             WHERE voting_id = ? AND voter_telegram_id = ?
         ''', (voting_id, telegram_id))
@@ -625,7 +1221,7 @@ class Database:
     
     def get_voting_results(self, voting_id: int) -> List[Dict]:
         """Получить детальные результаты голосования"""
-        cursor = self.db.execute('''
+        cursor = self.reader.execute('''
             SELECT vv.*, u.minecraft_username 
             FROM voting_votes vv
             JOIN users u ON vv.voter_telegram_id = u.telegram_id
@@ -634,33 +1230,143 @@ class Database:
         ''', (voting_id,))
         return [dict(row) for row in cursor.fetchall()]
     
+    @transactional
     def close_voting(self, voting_id: int) -> bool:
         """Закрыть голосование"""
         self.db.execute("UPDATE votings SET status = 'closed' WHERE id = ?", (voting_id,))
-        self.db.commit()
         return True
     
+    @transactional
     def set_voting_channel_message(self, voting_id: int, message_id: int) -> bool:
         """Установить ID сообщения в канале"""
         self.db.execute('''
             UPDATE votings SET channel_message_id = ? WHERE id = ?
         ''', (message_id, voting_id))
-        self.db.commit()
         return True
     
+    # ========== ОЧЕРЕДЬ УВЕДОМЛЕНИЙ ==========
+    
+    @transactional
+    def enqueue_notifications(self, items: List[Tuple]) -> int:
+        """
+        Поставить уведомления в очередь
+        
+        items - кортежи (chat_id, text, parse_mode, reply_markup_json, dedup_key).
+        Уведомление с уже известным dedup_key повторно не ставится.
+        Возвращает количество добавленных.
+        """
+        before = self.db.total_changes
+        self.db.executemany('''
+            INSERT OR IGNORE INTO notification_outbox
+                (chat_id, text, parse_mode, reply_markup, dedup_key, next_attempt_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(*item, datetime.now()) for item in items])
+        return self.db.total_changes - before
+    
+    def claim_notifications(self, limit: int) -> List[Dict]:
+        """
+        Забрать пачку готовых к отправке уведомлений (статус sending)
+        
+        Пустая очередь проверяется чтением, без транзакции записи. Записи
+        недоставляемым пользователям из пачки сразу отмечаются failed.
+        """
+        now = datetime.now()
+        cursor = self.reader.execute('''
+            SELECT 1 FROM notification_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            LIMIT 1
+        ''', (now,))
+        if cursor.fetchone() is None:
+            return []
+        
+        with self.transaction():
+            cursor = self.db.execute('''
+                SELECT o.*, u.undeliverable_at IS NOT NULL AS undeliverable
+                FROM notification_outbox o
+                LEFT JOIN users u ON u.telegram_id = o.chat_id
+                WHERE o.status = 'pending' AND o.next_attempt_at <= ?
+                ORDER BY o.next_attempt_at
+                LIMIT ?
+            ''', (now, limit))
+            rows = [dict(row) for row in cursor.fetchall()]
+            
+            # Недоставляемым не отправляем вовсе
+            skipped = [row for row in rows if row.pop('undeliverable')]
+            rows = [row for row in rows if row not in skipped]
+            
+            self.db.executemany(
+                "UPDATE notification_outbox SET status = 'failed', last_error = 'undeliverable' WHERE id = ?",
+                [(row['id'],) for row in skipped]
+            )
+            self.db.executemany(
+                "UPDATE notification_outbox SET status = 'sending', attempts = attempts + 1 WHERE id = ?",
+                [(row['id'],) for row in rows]
+            )
+        return rows
+    
+    @transactional
+    def complete_notifications(self, sent: List[int], retry: List[Tuple], failed: List[Tuple],
+                               undeliverable: List[Tuple[int, str]] = ()) -> bool:
+        """
+        Записать итоги отправки пачки
+        
+        sent - id отправленных, retry - (id, следующая попытка, ошибка),
+        failed - (id, ошибка) для окончательно недоставленных,
+        undeliverable - (telegram_id, причина) для пользователей, заблокировавших бота.
+        """
+        if undeliverable:
+            self.mark_undeliverable(list(undeliverable))
+        
+        now = datetime.now()
+        self.db.executemany(
+            "UPDATE notification_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+            [(now, notification_id) for notification_id in sent]
+        )
+        self.db.executemany(
+            "UPDATE notification_outbox SET status = 'pending', next_attempt_at = ?, last_error = ? WHERE id = ?",
+            [(next_attempt_at, error, notification_id) for notification_id, next_attempt_at, error in retry]
+        )
+        self.db.executemany(
+            "UPDATE notification_outbox SET status = 'failed', last_error = ? WHERE id = ?",
+            [(error, notification_id) for notification_id, error in failed]
+        )
+        return True
+    
+    @transactional
+    def reset_inflight_notifications(self) -> int:
+        """Вернуть в очередь уведомления, отправка которых прервалась перезапуском"""
+        cursor = self.db.execute(
+            "UPDATE notification_outbox SET status = 'pending' WHERE status = 'sending'"
+        )
+        return cursor.rowcount
+    
+    @transactional
+    def purge_sent_notifications(self, days: int) -> int:
+        """Удалить отправленные уведомления старше days дней"""
+        cursor = self.db.execute(
+            "DELETE FROM notification_outbox WHERE status = 'sent' AND sent_at < ?",
+            (datetime.now() - timedelta(days=days),)
+        )
+        return cursor.rowcount
+    
     # ========== ЛОГИ ==========
     
     def log_action(self, telegram_id: int, action: str, details: str = None):
-        """Записать действие в лог"""
-        self.db.execute('''
-            INSERT INTO action_logs (telegram_id, action, details)
-            VALUES (?, ?, ?)
-        ''', (telegram_id, action, details))
-        self.db.commit()
+        """Записать действие в лог (через буфер, после коммита текущей транзакции)"""
+        self._after_commit(lambda: self.action_log.append(telegram_id, action, details))
+    
+    @transactional
+    def insert_action_logs(self, records: List[Tuple]) -> int:
+        """Записать пачку логов: [(telegram_id, action, details, created_at), ...]"""
+        self.db.executemany('''
+            INSERT INTO action_logs (telegram_id, action, details, created_at)
+            VALUES (?, ?, ?, ?)
+        ''', records)
+        return len(records)
     
     def get_logs(self, limit: int = 100) -> List[Dict]:
-        """Получить последние логи"""
-        cursor = self.db.execute('''
+        """Получить последние логи (записи ещё в буфере журнала не видны - см. AsyncDatabase.get_logs)"""
+        cursor = self.reader.execute('''
             SELECT al.*, u.minecraft_username 
             FROM action_logs al
             LEFT JOIN users u ON al.telegram_id = u.telegram_id
@@ -669,10 +1375,52 @@ class Database:
         return [dict(row) for row in cursor.fetchall()]
     
     def close(self):
-        """Закрыть соединение"""
+        """Закрыть все соединения"""
+        self.action_log.close()
+        
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
         self.db.close()
 
 
-# Глобальный экземпляр
-db = Database()
+class LazyDatabase:
+    """
+    Глобальная БД, которая открывается при первом обращении.
+
+    Импорт модулей не создаёт файл БД и не запускает поток журнала действий -
+    это происходит, когда бот или скрипт действительно идут в базу.
+    """
+
+    def __init__(self, factory=Database):
+        self._factory = factory
+        self._database = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._database is not None
+
+    def open(self) -> Database:
+        """Открыть БД (один раз), возвращает настоящий Database"""
+        if self._database is None:
+            with self._lock:
+                if self._database is None:
+                    self._database = self._factory()
+        return self._database
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.open(), name)
+
+    def close(self):
+        """Закрыть БД, если она была открыта"""
+        if self._database is not None:
+            self._database.close()
+
+
+# Глобальный экземпляр - открывается при первом запросе
+db = LazyDatabase()
 
@@ -3,7 +3,9 @@
 """
 import logging
 from database import db
-from config import PARLIAMENT_SEATS, ELECTION_THRESHOLD_PERCENT
+from apportionment import apportion
+from utils.outbox import outbox_item
+from config import PARLIAMENT_SEATS, ELECTION_THRESHOLD_PERCENT, ELECTION_METHOD
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +17,13 @@ def calculate_election_results(election_id: int):
     Логика:
     1. Подсчитать голоса за каждую партию
     2. Применить 5% барьер
-    3. Распределить места пропорционально
+    3. Распределить места методом ELECTION_METHOD с учётом длины списков
     4. Заполнить парламент по спискам партий
     """
     
+    # Сверяем счётчики с голосами перед подсчётом - итог должен быть точным
+    db.rebuild_election_tally(election_id)
+    
     # Получаем результаты
     results = db.get_election_results(election_id)
     total_votes = db.get_election_total_votes(election_id)
@@ -44,49 +49,60 @@ def calculate_election_results(election_id: int):
         logger.warning("❌ Ни одна партия не прошла барьер")
         return None
     
-    # Подсчитываем общее количество голосов прошедших партий
-    passed_votes = sum(p['votes'] for p in passed_parties)
-    
-    # Распределяем места пропорционально
+    # Распределяем места по спискам партий: места сверх длины списка
+    # достаются другим партиям
+    members_by_party = {
+        party['party_id']: db.get_party_members(party['party_id'])
+        for party in passed_parties
+    }
+    seats_by_party = apportion(
+        {party['party_id']: party['votes'] for party in passed_parties},
+        PARLIAMENT_SEATS,
+        ELECTION_METHOD,
+        capacity={party_id: len(members) for party_id, members in members_by_party.items()}
+    )
     for party in passed_parties:
-        seats = int((party['votes'] / passed_votes) * PARLIAMENT_SEATS)
-        party['seats'] = seats
+        party['seats'] = seats_by_party[party['party_id']]
     
-    # Корректируем если сумма не равна PARLIAMENT_SEATS
     total_seats = sum(p['seats'] for p in passed_parties)
-    diff = PARLIAMENT_SEATS - total_seats
-    
-    if diff > 0:
-        # Раздаём оставшиеся места партиям с наибольшим остатком
-        for i in range(diff):
-            # Считаем остатки
-            for party in passed_parties:
-                exact_seats = (party['votes'] / passed_votes) * PARLIAMENT_SEATS
-                party['remainder'] = exact_seats - party['seats']
-            
-            # Даём место партии с максимальным остатком
-            max_party = max(passed_parties, key=lambda p: p.get('remainder', 0))
-            max_party['seats'] += 1
-    
-    # Очищаем старый парламент
-    db.clear_parliament()
-    
-    # Заполняем парламент по спискам
-    for party in passed_parties:
-        members = db.get_party_members(party['party_id'])
-        
-        # Берём первых N членов по списку
-        for i in range(min(party['seats'], len(members))):
-            member = members[i]
-            db.add_to_parliament(member['telegram_id'], party['party_id'])
+    if total_seats < PARLIAMENT_SEATS:
+        logger.warning(f"⚠️ Кандидатов не хватило: занято {total_seats} из {PARLIAMENT_SEATS} мест")
     
-    # Закрываем выборы
     results_text = "\n".join([
         f"{p['party_name']}: {p['votes']} голосов ({p['percentage']:.1f}%) - {p['seats']} мест"
         for p in passed_parties
     ])
     
-    db.close_election(election_id, results_text)
+    # Роспуск, новый состав и закрытие выборов - одной транзакцией
+    with db.transaction():
+        # Очищаем старый парламент
+        db.clear_parliament()
+        
+        # Заполняем парламент по спискам: берём первых N членов
+        deputies = []
+        for party in passed_parties:
+            members = members_by_party[party['party_id']]
+            deputies.extend(
+                (member['telegram_id'], party['party_id'])
+                for member in members[:party['seats']]
+            )
+        
+        db.add_to_parliament_many(deputies)
+        
+        # Уведомления избранным - в очередь, в той же транзакции
+        party_names = {p['party_id']: p['party_name'] for p in passed_parties}
+        db.enqueue_notifications([
+            outbox_item(
+                telegram_id,
+                f"🏛️ <b>Ты избран в парламент!</b>\n\n"
+                f"По итогам выборов ты получил место от партии <b>{party_names[party_id]}</b>.",
+                f"election:{election_id}:deputy:{telegram_id}"
+            )
+            for telegram_id, party_id in deputies
+        ])
+        
+        # Закрываем выборы
+        db.close_election(election_id, results_text)
     
     logger.info(f"✅ Выборы завершены. Парламент сформирован.")
     logger.info(f"Результаты:\n{results_text}")
@@ -1,16 +1,33 @@
 """
 Сборка всех обработчиков
 """
+from utils import CallbackRouter
 from handlers.start import get_handler as get_start_handler
-from handlers.common import get_handlers as get_common_handlers
+from handlers.common import get_callbacks as get_common_callbacks
 from handlers.party.create import get_handler as get_party_create_handler
-from handlers.party.view import get_handlers as get_party_view_handlers
-from handlers.party.manage import get_handlers as get_party_manage_handlers
+from handlers.party.view import get_handlers as get_party_view_handlers, get_callbacks as get_party_view_callbacks
+from handlers.party.manage import get_handlers as get_party_manage_handlers, get_callbacks as get_party_manage_callbacks
 from handlers.party.invite import get_handlers as get_party_invite_handlers
-from handlers.party.applications import get_handlers as get_party_applications_handlers
-from handlers.party.members import get_handlers as get_party_members_handlers
+from handlers.party.applications import get_callbacks as get_party_applications_callbacks
+from handlers.party.members import get_handlers as get_party_members_handlers, get_callbacks as get_party_members_callbacks
 from handlers.party.commands import get_handlers as get_party_commands_handlers
-from handlers.admin.panel import get_handlers as get_admin_handlers
+from handlers.admin.panel import get_callbacks as get_admin_callbacks
+from handlers.parliament.elections import get_callbacks as get_parliament_callbacks
+from handlers.voting.participate import get_callbacks as get_voting_callbacks
+
+
+def get_callback_router() -> CallbackRouter:
+    """Собрать маршруты всех кнопок"""
+    router = CallbackRouter()
+    router.extend(get_common_callbacks())
+    router.extend(get_party_view_callbacks())
+    router.extend(get_party_manage_callbacks())
+    router.extend(get_party_applications_callbacks())
+    router.extend(get_party_members_callbacks())
+    router.extend(get_admin_callbacks())
+    router.extend(get_parliament_callbacks())
+    router.extend(get_voting_callbacks())
+    return router
 
 
 def get_all_handlers():
@@ -23,18 +40,14 @@ def get_all_handlers():
     # Создание партии (ConversationHandler)
     handlers.append(get_party_create_handler())
     
-    # Общие обработчики
-    handlers.extend(get_common_handlers())
-    
-    # Партии
+    # Партии: команды и диалоги (точки входа диалогов - до общего маршрутизатора кнопок)
     handlers.extend(get_party_view_handlers())
     handlers.extend(get_party_manage_handlers())
     handlers.extend(get_party_invite_handlers())
-    handlers.extend(get_party_applications_handlers())
     handlers.extend(get_party_members_handlers())
     handlers.extend(get_party_commands_handlers())
     
-    # Админка
-    handlers.extend(get_admin_handlers())
+    # Все остальные кнопки - один обработчик с маршрутизацией по префиксу
+    handlers.append(get_callback_router().handler())
     
     return handlers
@@ -2,11 +2,21 @@
 Админ-панель
 """
 import logging
+from datetime import datetime
 from telegram import Update
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from utils import require_admin
-from keyboards import admin_panel_keyboard
+from database import async_db
+from utils import require_admin, auth_checker
+from handlers.common import feature_in_development
+from utils.callbacks import (
+    ADMIN_PANEL, ADMIN_STATS, ADMIN_LOGS, ADMIN_CREATE_VOTING, ADMIN_VOTING_TYPE,
+    ADMIN_PARLIAMENT, ADMIN_PARLIAMENT_DISSOLVE, ADMIN_ELECTION_START
+)
+from keyboards import (
+    admin_panel_keyboard, admin_stats_keyboard, admin_voting_type_keyboard,
+    admin_parliament_keyboard, back_button
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +32,86 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='HTML'
     )
 
-def get_handlers():
+@require_admin
+async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Статистика проверок авторизации"""
+    query = update.callback_query
+    await query.answer()
+    
+    pending = await async_db.get_pending_auth_recheck_count(datetime.now())
+    stats = auth_checker.stats()
+    breaker = "🟢 работает" if stats['breaker'] == 'closed' else "🔴 недоступно"
+    
+    await query.edit_message_text(
+        f"📊 <b>СТАТИСТИКА</b>\n\n"
+        f"🔍 Ждут перепроверки: <b>{pending}</b>\n\n"
+        f"🌐 API сервера: {breaker}\n"
+        f"✅ Ответов из кэша: {stats['hits']}\n"
+        f"📡 Запросов к API: {stats['misses']}\n"
+        f"🔗 Объединено запросов: {stats['coalesced']}",
+        reply_markup=admin_stats_keyboard(),
+        parse_mode='HTML'
+    )
+
+@require_admin
+async def admin_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Последние действия пользователей"""
+    query = update.callback_query
+    await query.answer()
+    
+    logs = await async_db.get_logs(20)
+    
+    text = "📜 <b>ЛОГИ ДЕЙСТВИЙ</b>\n\n"
+    if not logs:
+        text += "Записей пока нет"
+    for log in logs:
+        who = log['minecraft_username'] or log['telegram_id']
+        text += f"<code>{log['created_at']}</code> {who}: {log['action']}"
+        if log['details']:
+            text += f" ({log['details']})"
+        text += "\n"
+    
+    await query.edit_message_text(
+        text,
+        reply_markup=back_button(ADMIN_PANEL.pack()),
+        parse_mode='HTML'
+    )
+
+@require_admin
+async def admin_create_voting(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Выбор типа нового голосования"""
+    query = update.callback_query
+    await query.answer()
+    
+    await query.edit_message_text(
+        "🗳️ <b>НОВОЕ ГОЛОСОВАНИЕ</b>\n\nВыбери тип:",
+        reply_markup=admin_voting_type_keyboard(),
+        parse_mode='HTML'
+    )
+
+@require_admin
+async def admin_parliament(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Управление парламентом"""
+    query = update.callback_query
+    await query.answer()
+    
+    count = await async_db.get_parliament_count()
+    
+    await query.edit_message_text(
+        f"🏛️ <b>ПАРЛАМЕНТ</b>\n\nДепутатов: <b>{count}</b>",
+        reply_markup=admin_parliament_keyboard(count > 0),
+        parse_mode='HTML'
+    )
+
+def get_callbacks():
     return [
-        CallbackQueryHandler(admin_panel, pattern="^admin_panel$"),
+        (ADMIN_PANEL, admin_panel),
+        (ADMIN_STATS, admin_stats),
+        (ADMIN_LOGS, admin_logs),
+        (ADMIN_CREATE_VOTING, admin_create_voting),
+        (ADMIN_PARLIAMENT, admin_parliament),
+        # TODO: Реализовать голосования и выборы - пока кнопки отвечают заглушкой
+        (ADMIN_VOTING_TYPE, require_admin(feature_in_development)),
+        (ADMIN_ELECTION_START, require_admin(feature_in_development)),
+        (ADMIN_PARLIAMENT_DISSOLVE, require_admin(feature_in_development)),
     ]
@@ -1,6 +1,6 @@
-from .menu import get_handlers as get_menu_handlers
-from .profile import get_handlers as get_profile_handlers
+from .menu import get_callbacks as get_menu_callbacks, feature_in_development
+from .profile import get_callbacks as get_profile_callbacks
 
-def get_handlers():
-    """Собирает все обработчики общих разделов"""
-    return get_menu_handlers() + get_profile_handlers()
+def get_callbacks():
+    """Собирает все кнопки общих разделов"""
+    return get_menu_callbacks() + get_profile_callbacks()
@@ -3,11 +3,11 @@
 """
 import logging
 from telegram import Update
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from utils import require_auth
+from utils import require_auth, request_context
+from utils.callbacks import NOOP, MAIN_MENU
 from keyboards import main_menu_keyboard
-from config import ADMIN_IDS
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +18,7 @@ async def main_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     
-    telegram_id = update.effective_user.id
-    is_admin = telegram_id in ADMIN_IDS
+    is_admin = request_context(update, context).is_admin
     
     await query.edit_message_text(
         "📋 <b>Главное меню</b>\n\nВыбери раздел:",
@@ -28,8 +27,19 @@ async def main_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
     )
 
 
-def get_handlers():
-    """Возвращает список обработчиков меню"""
+async def feature_in_development(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+    """Кнопка раздела, который ещё не готов"""
+    await update.callback_query.answer("🚧 Функция в разработке", show_alert=True)
+
+
+async def noop_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Кнопка без действия (подпись в списке) - просто убираем часики"""
+    await update.callback_query.answer()
+
+
+def get_callbacks():
+    """Возвращает кнопки меню для CallbackRouter"""
     return [
-        CallbackQueryHandler(main_menu_callback, pattern="^main_menu$"),
+        (MAIN_MENU, main_menu_callback),
+        (NOOP, noop_callback),
     ]
@@ -3,10 +3,11 @@
 """
 import logging
 from telegram import Update
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from database import db
-from utils import require_auth
+from database import async_db
+from utils import require_auth, request_context
+from utils.callbacks import MENU_PROFILE
 from keyboards import back_button
 
 logger = logging.getLogger(__name__)
@@ -19,15 +20,16 @@ async def profile_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     telegram_id = update.effective_user.id
-    user = db.get_user(telegram_id)
+    ctx = request_context(update, context)
+    user = await ctx.user()
     
     if not user:
         await query.answer("❌ Ошибка загрузки профиля", show_alert=True)
         return
     
     # Получаем информацию о партии
-    party = db.get_user_party(telegram_id)
-    is_deputy = db.is_deputy(telegram_id)
+    party = await ctx.party()
+    is_deputy = await ctx.is_deputy()
     
     status_lines = []
     
@@ -48,13 +50,13 @@ async def profile_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"Telegram ID: <code>{telegram_id}</code>\n"
         f"Верифицирован: {user['verified_at'][:10]}\n\n"
         f"{status_text}",
-        reply_markup=back_button("main_menu"),
+        reply_markup=back_button(),
         parse_mode='HTML'
     )
 
 
-def get_handlers():
-    """Возвращает список обработчиков профиля"""
+def get_callbacks():
+    """Возвращает кнопки профиля для CallbackRouter"""
     return [
-        CallbackQueryHandler(profile_menu, pattern="^menu_profile$"),
+        (MENU_PROFILE, profile_menu),
     ]
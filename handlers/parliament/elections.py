@@ -5,9 +5,46 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from database import async_db
+from handlers.common import feature_in_development
+from utils import require_auth
+from utils.callbacks import (
+    MENU_POLITICS, PARLIAMENT_VIEW, ELECTION_VIEW, ELECTION_PARTIES, ELECTION_VOTE, ELECTION_VOTE_CONFIRM
+)
+from keyboards import back_button
+
 logger = logging.getLogger(__name__)
 
-async def handle_election_deeplink(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработка deep link для выборов"""
+async def handle_election_deeplink(update: Update, context: ContextTypes.DEFAULT_TYPE, election_id: int):
+    """Обработка deep link для выборов (/start election_<id>)"""
     # TODO: Реализовать выборы
     await update.message.reply_text("🚧 Функция в разработке")
+
+@require_auth
+async def parliament_view(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Состав парламента"""
+    query = update.callback_query
+    await query.answer()
+    
+    deputies = await async_db.get_parliament_members()
+    
+    text = f"🏛️ <b>ПАРЛАМЕНТ</b>\n\nДепутатов: <b>{len(deputies)}</b>\n\n"
+    for deputy in deputies:
+        party_name = deputy['party_name'] or "без партии"
+        text += f"• {deputy['minecraft_username']} ({party_name})\n"
+    
+    await query.edit_message_text(
+        text,
+        reply_markup=back_button(MENU_POLITICS.pack()),
+        parse_mode='HTML'
+    )
+
+def get_callbacks():
+    # TODO: Реализовать выборы - пока кнопки голосования отвечают заглушкой
+    return [
+        (PARLIAMENT_VIEW, parliament_view),
+        (ELECTION_VIEW, feature_in_development),
+        (ELECTION_PARTIES, feature_in_development),
+        (ELECTION_VOTE, feature_in_development),
+        (ELECTION_VOTE_CONFIRM, feature_in_development),
+    ]
@@ -3,40 +3,52 @@
 """
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.ext import ContextTypes
 
-from database import db
-from utils import require_auth, require_party_leader, send_notification
+from database import async_db
+from utils import require_auth, require_party_leader, send_notification, request_context, party_locks
+from utils.callbacks import PARTY_MY, PARTY_APPLICATIONS, APP_APPROVE, APP_REJECT
 from keyboards import back_button
 
 logger = logging.getLogger(__name__)
 
 
 @require_party_leader
-async def view_applications(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int = None):
+async def view_applications(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int):
     """Просмотр заявок (только для главы)"""
     query = update.callback_query
-    await query.answer()
     
-    if party_id is None:
-        party_id = int(query.data.split('_')[2])
+    if not await show_applications(update, context, party_id):
+        await query.answer("❌ Партия не найдена", show_alert=True)
+        return
     
-    party = db.get_party_by_id(party_id)
+    await query.answer()
+
+
+async def show_applications(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int) -> bool:
+    """
+    Показать заявки партии в сообщении кнопки, False - партии нет
+
+    На запрос не отвечает: после одобрения и отклонения ответом служит их alert,
+    а Telegram принимает только один ответ на нажатие.
+    """
+    query = update.callback_query
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     if not party:
-        await query.answer("❌ Партия не найдена", show_alert=True)
-        return
+        return False
     
-    applications = db.get_party_applications(party_id, status='pending')
+    applications = await async_db.get_party_applications(party_id, status='pending')
     
     if not applications:
         await query.edit_message_text(
             f"📨 <b>Заявки в партию {party['name']}</b>\n\n"
             f"Нет новых заявок.",
-            reply_markup=back_button("party_my"),
+            reply_markup=back_button(PARTY_MY.pack()),
             parse_mode='HTML'
         )
-        return
+        return True
     
     text = f"📨 <b>Заявки в партию {party['name']}</b>\n\n"
     text += f"Всего заявок: {len(applications)}\n\n"
@@ -47,92 +59,102 @@ async def view_applications(update: Update, context: ContextTypes.DEFAULT_TYPE,
         keyboard.append([
             InlineKeyboardButton(
                 f"✅ {app['minecraft_username']}", 
-                callback_data=f"app_approve_{app['id']}"
+                callback_data=APP_APPROVE.pack(app['id'])
             ),
             InlineKeyboardButton(
                 "❌", 
-                callback_data=f"app_reject_{app['id']}"
+                callback_data=APP_REJECT.pack(app['id'])
             )
         ])
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data="party_my")])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=PARTY_MY.pack())])
     
     await query.edit_message_text(
         text,
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode='HTML'
     )
+    return True
 
 
 @require_party_leader
-async def approve_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def approve_application(update: Update, context: ContextTypes.DEFAULT_TYPE, app_id: int):
     """Одобрить заявку"""
     query = update.callback_query
-    await query.answer()
     
-    app_id = int(query.data.split('_')[2])
-    app = db.get_application_by_id(app_id)
+    app = await async_db.get_application_by_id(app_id)
     
     if not app:
         await query.answer("❌ Заявка не найдена", show_alert=True)
         return
     
-    # Проверяем не в партии ли уже заявитель
-    current_party = db.get_user_party(app['telegram_id'])
-    if current_party:
-        db.reject_application(app_id)
+    def approve(database):
+        # Вступление и запись в лог - одной транзакцией
+        status = database.approve_application(app_id)
+        if status != 'approved':
+            return status, None
+        party = database.get_party_by_id(app['party_id'])
+        database.log_action(app['telegram_id'], "Принят в партию", f"Партия: {party['name']}")
+        return status, party
+    
+    # Вступление - под замком партии, чтобы параллельные одобрения не заняли
+    # одну позицию в списке; членство в другой партии проверяет сама транзакция
+    async with party_locks.hold(app['party_id']):
+        status, party = await async_db.transaction(approve)
+    
+    if status is None:
+        # Повторное нажатие: заявка уже одобрена или отклонена
+        await query.answer("ℹ️ Заявка уже рассмотрена", show_alert=True)
+        await show_applications(update, context, app['party_id'])
+        return
+    
+    if status == 'rejected':
         await query.answer(
             f"❌ {app['minecraft_username']} уже вступил в другую партию",
             show_alert=True
         )
         # Обновляем список заявок
-        await view_applications(update, context)
+        await show_applications(update, context, app['party_id'])
         return
     
-    # Одобряем
-    success = db.approve_application(app_id)
-    
-    if success:
-        party = db.get_party_by_id(app['party_id'])
-        
-        # Уведомляем игрока
-        await send_notification(
-            context.bot,
-            app['telegram_id'],
-            f"✅ <b>Заявка одобрена!</b>\n\n"
-            f"Ты принят в партию <b>{party['name']}</b>!\n"
-            f"Добро пожаловать!",
-            parse_mode='HTML'
-        )
-        
-        await query.answer(f"✅ {app['minecraft_username']} принят в партию!", show_alert=True)
-        
-        db.log_action(app['telegram_id'], "Принят в партию", f"Партия: {party['name']}")
-        logger.info(f"✅ Заявка одобрена: {app['minecraft_username']} → {party['name']}")
-    else:
-        await query.answer("❌ Ошибка при одобрении", show_alert=True)
+    # Уведомляем игрока
+    await send_notification(
+        context.bot,
+        app['telegram_id'],
+        f"✅ <b>Заявка одобрена!</b>\n\n"
+        f"Ты принят в партию <b>{party['name']}</b>!\n"
+        f"Добро пожаловать!",
+        parse_mode='HTML'
+    )
+    
+    await query.answer(f"✅ {app['minecraft_username']} принят в партию!", show_alert=True)
+    
+    logger.info(f"✅ Заявка одобрена: {app['minecraft_username']} → {party['name']}")
     
     # Обновляем список заявок
-    await view_applications(update, context, party_id=app['party_id'])
+    await show_applications(update, context, app['party_id'])
 
 
 @require_party_leader
-async def reject_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def reject_application(update: Update, context: ContextTypes.DEFAULT_TYPE, app_id: int):
     """Отклонить заявку"""
     query = update.callback_query
-    await query.answer()
     
-    app_id = int(query.data.split('_')[2])
-    app = db.get_application_by_id(app_id)
+    app = await async_db.get_application_by_id(app_id)
     
     if not app:
         await query.answer("❌ Заявка не найдена", show_alert=True)
         return
     
-    db.reject_application(app_id)
+    if not await async_db.reject_application(app_id):
+        # Повторное нажатие: заявка уже одобрена или отклонена
+        await query.answer("ℹ️ Заявка уже рассмотрена", show_alert=True)
+        await show_applications(update, context, app['party_id'])
+        return
     
     # Уведомляем игрока
-    party = db.get_party_by_id(app['party_id'])
+    ctx = request_context(update, context)
+    party = await ctx.get_party(app['party_id'])
     await send_notification(
         context.bot,
         app['telegram_id'],
@@ -146,13 +168,13 @@ async def reject_application(update: Update, context: ContextTypes.DEFAULT_TYPE)
     logger.info(f"❌ Заявка отклонена: {app['minecraft_username']} → {party['name']}")
     
     # Обновляем список заявок
-    await view_applications(update, context, party_id=app['party_id'])
+    await show_applications(update, context, app['party_id'])
 
 
-def get_handlers():
-    """Возвращает обработчики заявок"""
+def get_callbacks():
+    """Возвращает кнопки заявок для CallbackRouter"""
     return [
-        CallbackQueryHandler(view_applications, pattern="^party_applications_"),
-        CallbackQueryHandler(approve_application, pattern="^app_approve_"),
-        CallbackQueryHandler(reject_application, pattern="^app_reject_"),
+        (PARTY_APPLICATIONS, view_applications),
+        (APP_APPROVE, approve_application),
+        (APP_REJECT, reject_application),
     ]
\ No newline at end of file
@@ -5,8 +5,8 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
 
-from database import db
-from utils import require_auth
+from database import async_db
+from utils import require_auth, request_context
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +15,8 @@ logger = logging.getLogger(__name__)
 async def party_info_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /party_info - информация о партии"""
     telegram_id = update.effective_user.id
-    party = db.get_user_party(telegram_id)
+    ctx = request_context(update, context)
+    party = await ctx.party()
     
     if not party:
         await update.message.reply_text("❌ Ты не состоишь в партии!")
@@ -25,7 +26,7 @@ async def party_info_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     role = "👑 Глава" if party['leader_telegram_id'] == telegram_id else "👤 Член"
     
     # Список членов
-    members = db.get_party_members(party['id'])
+    members = await async_db.get_party_members(party['id'])
     members_text = ""
     for i, member in enumerate(members[:5], 1):
         role_icon = "👑" if member['role'] == 'leader' else "👤"
@@ -51,13 +52,14 @@ async def party_info_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def party_members_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /party_members - список членов"""
     telegram_id = update.effective_user.id
-    party = db.get_user_party(telegram_id)
+    ctx = request_context(update, context)
+    party = await ctx.party()
     
     if not party:
         await update.message.reply_text("❌ Ты не в партии!")
         return
     
-    members = db.get_party_members(party['id'])
+    members = await async_db.get_party_members(party['id'])
     
     text = f"👥 <b>Члены партии {party['name']}</b>\n\n"
     for i, member in enumerate(members, 1):
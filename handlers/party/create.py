@@ -9,9 +9,11 @@ from telegram.ext import (
     CommandHandler, filters
 )
 
-from database import db
-from utils import require_auth, send_notification, notify_party_members
+from database import async_db
+from utils import require_auth, send_notification, notify_party_members, request_context
+from utils.callbacks import PARTY_MY, PARTY_CREATE, PARTY_IDEOLOGY_CHOICE
 from keyboards import ideology_keyboard, back_button
+from tasks import schedule_party_deadline
 from config import PARTY_MIN_MEMBERS, PARTY_CREATION_TIME_MINUTES
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,8 @@ async def create_party_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     telegram_id = update.effective_user.id
     
-    if db.get_user_party(telegram_id):
+    ctx = request_context(update, context)
+    if await ctx.party():
         await query.answer("❌ Ты уже в партии!", show_alert=True)
         return ConversationHandler.END
     
@@ -70,21 +73,22 @@ async def party_ideology_received(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     
     ideology_map = {
-        "ideology_militant": "⚔️ Милитаризм",
-        "ideology_capitalist": "💰 Капитализм",
-        "ideology_ecology": "🌿 Экология",
-        "ideology_builder": "🏗️ Строительство",
-        "ideology_science": "🎓 Наука",
-        "ideology_centrist": "🤝 Центризм"
+        "militant": "⚔️ Милитаризм",
+        "capitalist": "💰 Капитализм",
+        "ecology": "🌿 Экология",
+        "builder": "🏗️ Строительство",
+        "science": "🎓 Наука",
+        "centrist": "🤝 Центризм"
     }
+    choice = PARTY_IDEOLOGY_CHOICE.unpack(query.data)['ideology']
     
-    if query.data == "ideology_custom":
+    if choice == "custom":
         await query.edit_message_text(
             "✏️ Введи свою идеологию (макс. 30 символов):"
         )
         return PARTY_IDEOLOGY_CUSTOM
     
-    ideology = ideology_map.get(query.data, "Центризм")
+    ideology = ideology_map.get(choice, "Центризм")
     context.user_data['party_ideology'] = ideology
     
     await query.edit_message_text(
@@ -132,7 +136,7 @@ async def party_description_received(update: Update, context: ContextTypes.DEFAU
     ideology = context.user_data['party_ideology']
     
     try:
-        party_id, invite_code = db.create_party(
+        party_id, invite_code = await async_db.create_party(
             name=name,
             ideology=ideology,
             description=description,
@@ -140,10 +144,13 @@ async def party_description_received(update: Update, context: ContextTypes.DEFAU
             deadline_minutes=PARTY_CREATION_TIME_MINUTES
         )
         
+        # Таймер окончания набора - сработает ровно в срок
+        schedule_party_deadline(await async_db.get_party_by_id(party_id))
+        
         bot_username = context.bot.username
         invite_link = f"https://t.me/{bot_username}?start=join_{invite_code}"
         
-        db.log_action(telegram_id, "Создание партии", f"Партия: {name}")
+        await async_db.log_action(telegram_id, "Создание партии", f"Партия: {name}")
         
         await update.message.reply_text(
             f"🎉 <b>Партия создана!</b>\n\n"
@@ -153,7 +160,7 @@ async def party_description_received(update: Update, context: ContextTypes.DEFAU
             f"🔗 Ссылка-приглашение:\n<code>{invite_link}</code>\n\n"
             f"Отправь её друзьям или используй команду:\n"
             f"<code>/party invite nickname</code>",
-            reply_markup=back_button("party_my"),
+            reply_markup=back_button(PARTY_MY.pack()),
             parse_mode='HTML'
         )
         
@@ -177,10 +184,10 @@ async def cancel_creation(update: Update, context: ContextTypes.DEFAULT_TYPE):
 def get_handler():
     """Возвращает ConversationHandler для создания партии"""
     return ConversationHandler(
-        entry_points=[CallbackQueryHandler(create_party_start, pattern="^party_create$")],
+        entry_points=[CallbackQueryHandler(create_party_start, pattern=PARTY_CREATE.pattern)],
         states={
             PARTY_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, party_name_received)],
-            PARTY_IDEOLOGY: [CallbackQueryHandler(party_ideology_received, pattern="^ideology_")],
+            PARTY_IDEOLOGY: [CallbackQueryHandler(party_ideology_received, pattern=PARTY_IDEOLOGY_CHOICE.pattern)],
             PARTY_IDEOLOGY_CUSTOM: [MessageHandler(filters.TEXT & ~filters.COMMAND, party_ideology_custom_received)],
             PARTY_DESCRIPTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, party_description_received)],
         },
@@ -5,29 +5,30 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 
-from database import db
-from utils import require_auth, send_notification
+from database import async_db
+from utils import require_auth, send_notification, request_context, party_locks
+from utils.callbacks import PARTY_APPLICATIONS
 from keyboards import back_button
 
 logger = logging.getLogger(__name__)
 
 
-async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработка deep link приглашения в партию"""
-    args = context.args
-    if not args or not args[0].startswith('join_'):
-        return
-    
-    invite_code = args[0].replace('join_', '')
+async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE, invite_code: str):
+    """Обработка deep link приглашения в партию (/start join_<код>)"""
     telegram_id = update.effective_user.id
     
     # Проверяем авторизацию
-    user = db.get_user(telegram_id)
+    ctx = request_context(update, context)
+    user = await ctx.user()
     if not user:
-        from utils import auth_checker
+        from utils import auth_checker, reply_auth_unavailable, AuthServiceUnavailable
         from config import REGISTRATION_BOT
         
-        is_linked, player_data = auth_checker.check_player(telegram_id)
+        try:
+            is_linked, player_data = await auth_checker.check_player(telegram_id)
+        except AuthServiceUnavailable:
+            await reply_auth_unavailable(update)
+            return
         if not is_linked:
             await update.message.reply_text(
                 f"❌ Сначала пройди верификацию!\n\n"
@@ -38,10 +39,11 @@ async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE
         
         # Добавляем пользователя
         minecraft_username = player_data.get('username')
-        db.add_user(telegram_id, minecraft_username)
+        await async_db.add_user(telegram_id, minecraft_username)
+        ctx.set_user(await async_db.get_user(telegram_id))
     
     # Проверяем есть ли уже в партии
-    current_party = db.get_user_party(telegram_id)
+    current_party = await ctx.party()
     if current_party:
         await update.message.reply_text(
             f"❌ Ты уже в партии <b>{current_party['name']}</b>!\n\n"
@@ -51,13 +53,13 @@ async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     # Находим партию по коду
-    party = db.get_party_by_invite(invite_code)
+    party = await async_db.get_party_by_invite(invite_code)
     if not party:
         await update.message.reply_text("❌ Партия не найдена или ссылка устарела")
         return
     
     # Подаём заявку
-    success = db.apply_to_party(telegram_id, party['id'])
+    success = await async_db.apply_to_party(telegram_id, party['id'])
     
     if not success:
         await update.message.reply_text("❌ Заявка уже подана ранее")
@@ -73,9 +75,9 @@ async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE
     )
     
     # Уведомляем главу партии
-    user_info = db.get_user(telegram_id)
+    user_info = await ctx.user()
     keyboard = InlineKeyboardMarkup([[
-        InlineKeyboardButton("👥 Посмотреть заявки", callback_data=f"party_applications_{party['id']}")
+        InlineKeyboardButton("👥 Посмотреть заявки", callback_data=PARTY_APPLICATIONS.pack(party['id']))
     ]])
     
     await send_notification(
@@ -88,7 +90,7 @@ async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE
         reply_markup=keyboard
     )
     
-    db.log_action(telegram_id, "Заявка в партию", f"Партия: {party['name']}")
+    await async_db.log_action(telegram_id, "Заявка в партию", f"Партия: {party['name']}")
     logger.info(f"✅ Заявка: {user_info['minecraft_username']} → {party['name']}")
 
 
@@ -96,7 +98,8 @@ async def handle_party_invite(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def party_link_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /party_link - получить ссылку-приглашение"""
     telegram_id = update.effective_user.id
-    party = db.get_user_party(telegram_id)
+    ctx = request_context(update, context)
+    party = await ctx.party()
     
     if not party:
         await update.message.reply_text("❌ Ты не в партии!")
@@ -118,7 +121,8 @@ async def party_link_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def party_invite_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /party_invite <nickname> - прямое приглашение"""
     telegram_id = update.effective_user.id
-    party = db.get_user_party(telegram_id)
+    ctx = request_context(update, context)
+    party = await ctx.party()
     
     if not party:
         await update.message.reply_text("❌ Ты не в партии!")
@@ -144,11 +148,7 @@ async def party_invite_command(update: Update, context: ContextTypes.DEFAULT_TYP
     target_nickname = context.args[0]
     
     # Ищем пользователя по никнейму
-    cursor = db.db.execute(
-        'SELECT telegram_id, minecraft_username FROM users WHERE minecraft_username = ? COLLATE NOCASE',
-        (target_nickname,)
-    )
-    target_user = cursor.fetchone()
+    target_user = await async_db.find_user_by_username(target_nickname)
     
     if not target_user:
         await update.message.reply_text(
@@ -161,41 +161,31 @@ async def party_invite_command(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return
     
-    target_id = target_user[0]
-    target_name = target_user[1]
+    target_id = target_user['telegram_id']
+    target_name = target_user['minecraft_username']
+    
+    # Проверка и добавление - под замком партии
+    async with party_locks.hold(party['id']):
+        # Проверяем не в партии ли уже
+        target_party = await async_db.get_user_party(target_id)
+        if target_party:
+            await update.message.reply_text(
+                f"❌ <b>{target_name}</b> уже в партии <b>{target_party['name']}</b>",
+                parse_mode='HTML'
+            )
+            return
+        
+        # Добавляем сразу в партию
+        new_position = await async_db.add_party_member(target_id, party['id'])
     
-    # Проверяем не в партии ли уже
-    target_party = db.get_user_party(target_id)
-    if target_party:
+    if new_position is None:
+        # Успел вступить в другую партию между проверкой и добавлением
         await update.message.reply_text(
-            f"❌ <b>{target_name}</b> уже в партии <b>{target_party['name']}</b>",
+            f"❌ <b>{target_name}</b> уже состоит в партии",
             parse_mode='HTML'
         )
         return
     
-    # Получаем текущее количество членов для позиции
-    members = db.get_party_members(party['id'])
-    new_position = len(members) + 1
-    
-    # Добавляем сразу в партию
-    db.db.execute('''
-        INSERT INTO party_members (telegram_id, party_id, list_position)
-        VALUES (?, ?, ?)
-    ''', (target_id, party['id'], new_position))
-    
-    # Обновляем счётчик
-    db.db.execute('''
-        UPDATE parties SET members_count = members_count + 1 WHERE id = ?
-    ''', (party['id'],))
-    
-    # Удаляем старые заявки если были
-    db.db.execute('''
-        DELETE FROM party_applications 
-        WHERE telegram_id = ? AND party_id = ?
-    ''', (target_id, party['id']))
-    
-    db.db.commit()
-    
     # Уведомляем игрока
     await send_notification(
         context.bot,
@@ -218,7 +208,7 @@ async def party_invite_command(update: Update, context: ContextTypes.DEFAULT_TYP
         parse_mode='HTML'
     )
     
-    db.log_action(target_id, "Приглашён в партию", f"Партия: {party['name']}")
+    await async_db.log_action(target_id, "Приглашён в партию", f"Партия: {party['name']}")
     logger.info(f"✅ Игрок добавлен: {target_name} → {party['name']}")
 
 
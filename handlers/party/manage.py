@@ -8,8 +8,12 @@ from telegram.ext import (
     MessageHandler, CommandHandler, filters
 )
 
-from database import db
-from utils import require_auth, require_party_leader, notify_party_members
+from database import async_db
+from utils import require_auth, require_party_leader, notify_party_members, request_context, party_locks
+from utils.callbacks import (
+    MENU_POLITICS, PARTY_MY, PARTY_MANAGE, PARTY_EDIT_NAME, PARTY_EDIT_LIST, PARTY_TRANSFER,
+    PARTY_LEAVE, PARTY_LEAVE_CONFIRM, PARTY_DELETE, PARTY_DELETE_CONFIRM
+)
 from keyboards import confirm_keyboard, back_button
 
 logger = logging.getLogger(__name__)
@@ -19,14 +23,14 @@ EDIT_NAME = range(1)
 
 
 @require_auth
-async def leave_party_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def leave_party_handler(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int):
     """Выход из партии"""
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[2])
     telegram_id = update.effective_user.id
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     if not party:
         await query.answer("❌ Партия не найдена", show_alert=True)
@@ -40,7 +44,7 @@ async def leave_party_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
             "• Передай лидерство другому участнику\n"
             "• Или удали партию полностью\n\n"
             "Используй меню управления партией.",
-            reply_markup=back_button("party_my"),
+            reply_markup=back_button(PARTY_MY.pack()),
             parse_mode='HTML'
         )
         return
@@ -51,38 +55,41 @@ async def leave_party_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         f"Партия: <b>{party['name']}</b>\n\n"
         f"Ты точно хочешь выйти?",
         reply_markup=confirm_keyboard(
-            f"confirm_leave_{party_id}",
-            "party_my"
+            PARTY_LEAVE_CONFIRM.pack(party_id),
+            PARTY_MY.pack()
         ),
         parse_mode='HTML'
     )
 
 
 @require_auth
-async def confirm_leave_party(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def confirm_leave_party(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int):
     """Подтверждение выхода из партии"""
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[2])
     telegram_id = update.effective_user.id
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     if not party:
         await query.answer("❌ Партия не найдена", show_alert=True)
         return
     
-    # Выходим из партии
-    success = db.remove_member(telegram_id, party_id)
+    # Выходим под замком партии; повторное нажатие не уменьшит счётчик дважды
+    async with party_locks.hold(party_id):
+        success = await async_db.get_member_info(telegram_id, party_id) is not None
+        if success:
+            success = await async_db.remove_member(telegram_id, party_id)
     
     if success:
-        db.log_action(telegram_id, "Выход из партии", f"Партия: {party['name']}")
+        await async_db.log_action(telegram_id, "Выход из партии", f"Партия: {party['name']}")
         
         await query.edit_message_text(
             f"✅ <b>Ты вышел из партии</b>\n\n"
             f"Партия: {party['name']}\n\n"
             f"Теперь ты можешь создать свою партию или вступить в другую.",
-            reply_markup=back_button("menu_politics"),
+            reply_markup=back_button(MENU_POLITICS.pack()),
             parse_mode='HTML'
         )
         
@@ -92,24 +99,24 @@ async def confirm_leave_party(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 @require_party_leader
-async def party_management_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def party_management_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int):
     """Меню управления партией"""
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[2])
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     if not party:
         await query.answer("❌ Партия не найдена", show_alert=True)
         return
     
     keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("📝 Изменить название", callback_data=f"party_edit_name_{party_id}")],
-        [InlineKeyboardButton("📋 Редактор списка", callback_data=f"party_edit_list_{party_id}")],
-        [InlineKeyboardButton("👑 Передать лидерство", callback_data=f"party_transfer_{party_id}")],
-        [InlineKeyboardButton("🗑️ Удалить партию", callback_data=f"party_delete_{party_id}")],
-        [InlineKeyboardButton("« Назад", callback_data="party_my")]
+        [InlineKeyboardButton("📝 Изменить название", callback_data=PARTY_EDIT_NAME.pack(party_id))],
+        [InlineKeyboardButton("📋 Редактор списка", callback_data=PARTY_EDIT_LIST.pack(party_id))],
+        [InlineKeyboardButton("👑 Передать лидерство", callback_data=PARTY_TRANSFER.pack(party_id))],
+        [InlineKeyboardButton("🗑️ Удалить партию", callback_data=PARTY_DELETE.pack(party_id))],
+        [InlineKeyboardButton("« Назад", callback_data=PARTY_MY.pack())]
     ])
     
     await query.edit_message_text(
@@ -121,18 +128,18 @@ async def party_management_menu(update: Update, context: ContextTypes.DEFAULT_TY
 
 
 @require_party_leader
-async def delete_party_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def delete_party_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int):
     """Подтверждение удаления партии"""
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[2])
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     keyboard = InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("✅ Удалить", callback_data=f"do_delete_party_{party_id}"),
-            InlineKeyboardButton("❌ Отмена", callback_data=f"party_manage_{party_id}")
+            InlineKeyboardButton("✅ Удалить", callback_data=PARTY_DELETE_CONFIRM.pack(party_id)),
+            InlineKeyboardButton("❌ Отмена", callback_data=PARTY_MANAGE.pack(party_id))
         ]
     ])
     
@@ -149,13 +156,13 @@ async def delete_party_confirm(update: Update, context: ContextTypes.DEFAULT_TYP
 
 
 @require_party_leader
-async def do_delete_party(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def do_delete_party(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int):
     """Удаление партии"""
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[3])
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     party_name = party['name']
     
     # Уведомляем всех членов
@@ -168,16 +175,16 @@ async def do_delete_party(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     # Удаляем партию
-    db.delete_party(party_id)
+    await async_db.delete_party(party_id)
     
     await query.edit_message_text(
         f"✅ <b>Партия удалена</b>\n\n"
         f"Партия <b>{party_name}</b> была расформирована.",
-        reply_markup=back_button("menu_politics"),
+        reply_markup=back_button(MENU_POLITICS.pack()),
         parse_mode='HTML'
     )
     
-    db.log_action(update.effective_user.id, "Удаление партии", f"Партия: {party_name}")
+    await async_db.log_action(update.effective_user.id, "Удаление партии", f"Партия: {party_name}")
     logger.info(f"✅ Партия удалена: {party_name}")
 
 
@@ -187,10 +194,11 @@ async def edit_name_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[3])
+    party_id = PARTY_EDIT_NAME.unpack(query.data)['party_id']
     context.user_data['edit_party_id'] = party_id
     
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     await query.edit_message_text(
         f"📝 <b>Изменение названия партии</b>\n\n"
@@ -219,11 +227,12 @@ async def edit_name_received(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("❌ Ошибка: партия не найдена")
         return ConversationHandler.END
     
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     old_name = party['name']
     
     # Обновляем название
-    success = db.update_party_name(party_id, new_name)
+    success = await async_db.update_party_name(party_id, new_name)
     
     if success:
         # Уведомляем членов
@@ -239,11 +248,11 @@ async def edit_name_received(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(
             f"✅ <b>Название изменено!</b>\n\n"
             f"Новое название: <b>{new_name}</b>",
-            reply_markup=back_button("party_my"),
+            reply_markup=back_button(PARTY_MY.pack()),
             parse_mode='HTML'
         )
         
-        db.log_action(update.effective_user.id, "Переименование партии", f"{old_name} → {new_name}")
+        await async_db.log_action(update.effective_user.id, "Переименование партии", f"{old_name} → {new_name}")
         logger.info(f"✅ Партия переименована: {old_name} → {new_name}")
     else:
         await update.message.reply_text(
@@ -267,18 +276,22 @@ def get_handlers():
     """Возвращает обработчики управления партией"""
     
     edit_name_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(edit_name_start, pattern="^party_edit_name_")],
+        entry_points=[CallbackQueryHandler(edit_name_start, pattern=PARTY_EDIT_NAME.pattern)],
         states={
             EDIT_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, edit_name_received)],
         },
         fallbacks=[CommandHandler("cancel", cancel_edit)],
     )
     
+    return [edit_name_conv]
+
+
+def get_callbacks():
+    """Возвращает кнопки управления партией для CallbackRouter"""
     return [
-        CallbackQueryHandler(leave_party_handler, pattern="^party_leave_"),
-        CallbackQueryHandler(confirm_leave_party, pattern="^confirm_leave_"),
-        CallbackQueryHandler(party_management_menu, pattern="^party_manage_"),
-        CallbackQueryHandler(delete_party_confirm, pattern="^party_delete_"),
-        CallbackQueryHandler(do_delete_party, pattern="^do_delete_party_"),
-        edit_name_conv,
+        (PARTY_LEAVE, leave_party_handler),
+        (PARTY_LEAVE_CONFIRM, confirm_leave_party),
+        (PARTY_MANAGE, party_management_menu),
+        (PARTY_DELETE, delete_party_confirm),
+        (PARTY_DELETE_CONFIRM, do_delete_party),
     ]
@@ -5,9 +5,13 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler, MessageHandler, ConversationHandler, CommandHandler, filters
 
-from database import db
-from utils import require_auth, require_party_leader, send_notification
-from keyboards import back_button
+from database import async_db
+from utils import require_auth, require_party_leader, send_notification, request_context, party_locks, load_members_page
+from utils.callbacks import (
+    NOOP, PARTY_MY, PARTY_MANAGE, PARTY_EDIT_LIST, PARTY_TRANSFER, MEMBER_ACTIONS, MEMBER_SET_POSITION,
+    MEMBER_KICK, MEMBER_KICK_CONFIRM, MEMBER_TRANSFER, MEMBER_TRANSFER_CONFIRM
+)
+from keyboards import back_button, members_page_buttons
 
 logger = logging.getLogger(__name__)
 
@@ -16,19 +20,22 @@ SET_POSITION = range(1)
 
 
 @require_party_leader
-async def edit_party_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Список членов партии - кликабельный"""
+async def edit_party_list(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int,
+                          page: int = 0, after: int = 0, before: int = 0):
+    """Список членов партии - кликабельный, по странице за раз"""
     query = update.callback_query
     await query.answer()
     
-    party_id = int(query.data.split('_')[3])
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
     
     if not party:
         await query.answer("❌ Партия не найдена", show_alert=True)
         return
     
-    members = db.get_party_members(party_id)
+    members, has_prev, has_next = await load_members_page(party_id, after, before)
+    if not has_prev:
+        page = 0
     
     text = f"📋 <b>Управление членами партии {party['name']}</b>\n\n"
     text += "Нажми на участника для действий\n\n"
@@ -44,11 +51,15 @@ async def edit_party_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
         keyboard.append([
             InlineKeyboardButton(
                 f"{pos}. {role_icon} {name}", 
-                callback_data=f"member_actions_{party_id}_{member['telegram_id']}"
+                callback_data=MEMBER_ACTIONS.pack(party_id, member['telegram_id'])
             )
         ])
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data=f"party_manage_{party_id}")])
+    nav_buttons = members_page_buttons(PARTY_EDIT_LIST, party_id, members, page, has_prev, has_next)
+    if nav_buttons:
+        keyboard.append(nav_buttons)
+    
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=PARTY_MANAGE.pack(party_id))])
     
     await query.edit_message_text(
         text,
@@ -58,18 +69,58 @@ async def edit_party_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 @require_party_leader
-async def member_actions_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Меню действий с участником"""
+async def choose_new_leader(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int,
+                            page: int = 0, after: int = 0, before: int = 0):
+    """Выбор нового главы - страница членов партии, нажатие ведёт к подтверждению передачи"""
     query = update.callback_query
     await query.answer()
     
-    data_parts = query.data.split('_')
-    party_id = int(data_parts[2])
-    member_id = int(data_parts[3])
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
+    
+    if not party:
+        await query.answer("❌ Партия не найдена", show_alert=True)
+        return
+    
+    members, has_prev, has_next = await load_members_page(party_id, after, before)
+    if not has_prev:
+        page = 0
     
-    party = db.get_party_by_id(party_id)
-    member = db.get_user(member_id)
-    member_info = db.get_member_info(member_id, party_id)
+    keyboard = []
+    for member in members:
+        text = f"{member['list_position']}. {member['minecraft_username']}"
+        if member['role'] == 'leader':
+            keyboard.append([InlineKeyboardButton(f"👑 {text}", callback_data=NOOP.pack())])
+        else:
+            keyboard.append([
+                InlineKeyboardButton(text, callback_data=MEMBER_TRANSFER.pack(party_id, member['telegram_id']))
+            ])
+    
+    nav_buttons = members_page_buttons(PARTY_TRANSFER, party_id, members, page, has_prev, has_next)
+    if nav_buttons:
+        keyboard.append(nav_buttons)
+    
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=PARTY_MANAGE.pack(party_id))])
+    
+    await query.edit_message_text(
+        f"👑 <b>Передача лидерства</b>\n\n"
+        f"Партия: <b>{party['name']}</b>\n\n"
+        f"Выбери нового главу:",
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode='HTML'
+    )
+
+
+@require_party_leader
+async def member_actions_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int, member_id: int):
+    """Меню действий с участником"""
+    query = update.callback_query
+    await query.answer()
+    
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
+    member = await ctx.get_user(member_id)
+    member_info = await ctx.get_member(member_id, party_id)
     
     if not member_info:
         await query.answer("❌ Участник не найден", show_alert=True)
@@ -85,18 +136,18 @@ async def member_actions_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     if not is_leader:
         keyboard.append([
-            InlineKeyboardButton("🔢 Изменить позицию", callback_data=f"member_setpos_{party_id}_{member_id}")
+            InlineKeyboardButton("🔢 Изменить позицию", callback_data=MEMBER_SET_POSITION.pack(party_id, member_id))
         ])
         keyboard.append([
-            InlineKeyboardButton("👑 Передать лидерство", callback_data=f"member_transfer_{party_id}_{member_id}")
+            InlineKeyboardButton("👑 Передать лидерство", callback_data=MEMBER_TRANSFER.pack(party_id, member_id))
         ])
         keyboard.append([
-            InlineKeyboardButton("❌ Исключить", callback_data=f"member_kick_{party_id}_{member_id}")
+            InlineKeyboardButton("❌ Исключить", callback_data=MEMBER_KICK.pack(party_id, member_id))
         ])
     else:
         text += "\n<i>Действия с главой недоступны</i>"
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data=f"party_edit_list_{party_id}")])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=PARTY_EDIT_LIST.pack(party_id))])
     
     await query.edit_message_text(
         text,
@@ -111,20 +162,25 @@ async def member_set_position_start(update: Update, context: ContextTypes.DEFAUL
     query = update.callback_query
     await query.answer()
     
-    data_parts = query.data.split('_')
-    party_id = int(data_parts[2])
-    member_id = int(data_parts[3])
+    args = MEMBER_SET_POSITION.unpack(query.data)
+    party_id, member_id = args['party_id'], args['member_id']
     
     context.user_data['set_position_party_id'] = party_id
     context.user_data['set_position_member_id'] = member_id
     
-    member = db.get_user(member_id)
-    members = db.get_party_members(party_id)
+    ctx = request_context(update, context)
+    member = await ctx.get_user(member_id)
+    party = await ctx.get_party(party_id)
+    
+    if not party:
+        await query.edit_message_text("❌ Партия не найдена")
+        return ConversationHandler.END
     
+    # Позиции идут подряд с 1, последняя - число членов
     await query.edit_message_text(
         f"🔢 <b>Изменение позиции</b>\n\n"
         f"Участник: <b>{member['minecraft_username']}</b>\n\n"
-        f"Введи новую позицию (от 2 до {len(members)}):\n\n"
+        f"Введи новую позицию (от 2 до {party['members_count']}):\n\n"
         f"<i>Позиция 1 всегда принадлежит главе</i>\n\n"
         f"Используй /cancel для отмены",
         parse_mode='HTML'
@@ -148,51 +204,39 @@ async def member_set_position_received(update: Update, context: ContextTypes.DEF
         await update.message.reply_text("❌ Ошибка: данные не найдены")
         return ConversationHandler.END
     
-    members = db.get_party_members(party_id)
+    ctx = request_context(update, context)
+    member = await ctx.get_user(member_id)
     
-    if new_position < 2 or new_position > len(members):
-        await update.message.reply_text(
-            f"❌ Позиция должна быть от 2 до {len(members)}!\nПопробуй ещё раз:"
-        )
-        return SET_POSITION
-    
-    member = db.get_user(member_id)
-    member_info = db.get_member_info(member_id, party_id)
-    old_position = member_info['list_position']
-    
-    if old_position == new_position:
-        await update.message.reply_text("❌ Участник уже на этой позиции!")
-        return SET_POSITION
-    
-    # Изменяем позицию
-    db.db.execute(
-        'UPDATE party_members SET list_position = ? WHERE telegram_id = ? AND party_id = ?',
-        (new_position, member_id, party_id)
-    )
-    
-    # Сдвигаем остальных
-    if new_position < old_position:
-        # Двигаем вверх - сдвигаем тех кто между вниз
-        db.db.execute('''
-            UPDATE party_members 
-            SET list_position = list_position + 1 
-            WHERE party_id = ? AND list_position >= ? AND list_position < ? AND telegram_id != ?
-        ''', (party_id, new_position, old_position, member_id))
-    else:
-        # Двигаем вниз - сдвигаем тех кто между вверх
-        db.db.execute('''
-            UPDATE party_members 
-            SET list_position = list_position - 1 
-            WHERE party_id = ? AND list_position > ? AND list_position <= ? AND telegram_id != ?
-        ''', (party_id, old_position, new_position, member_id))
-    
-    db.db.commit()
+    # Проверка позиций и сдвиг списка - под замком партии
+    async with party_locks.hold(party_id):
+        party = await async_db.get_party_by_id(party_id)
+        last_position = party['members_count'] if party else 0
+        
+        if new_position < 2 or new_position > last_position:
+            await update.message.reply_text(
+                f"❌ Позиция должна быть от 2 до {last_position}!\nПопробуй ещё раз:"
+            )
+            return SET_POSITION
+        
+        member_info = await async_db.get_member_info(member_id, party_id)
+        if not member_info:
+            await update.message.reply_text("❌ Участник уже не в партии")
+            return ConversationHandler.END
+        
+        old_position = member_info['list_position']
+        
+        if old_position == new_position:
+            await update.message.reply_text("❌ Участник уже на этой позиции!")
+            return SET_POSITION
+        
+        # Изменяем позицию
+        await async_db.move_member(party_id, member_id, new_position)
     
     await update.message.reply_text(
         f"✅ <b>Позиция изменена!</b>\n\n"
         f"Участник: <b>{member['minecraft_username']}</b>\n"
         f"Новая позиция: {new_position}",
-        reply_markup=back_button("party_my"),
+        reply_markup=back_button(PARTY_MY.pack()),
         parse_mode='HTML'
     )
     
@@ -202,22 +246,19 @@ async def member_set_position_received(update: Update, context: ContextTypes.DEF
 
 
 @require_party_leader
-async def member_kick_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def member_kick_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int, member_id: int):
     """Подтверждение исключения"""
     query = update.callback_query
     await query.answer()
     
-    data_parts = query.data.split('_')
-    party_id = int(data_parts[2])
-    member_id = int(data_parts[3])
-    
-    member = db.get_user(member_id)
-    party = db.get_party_by_id(party_id)
+    ctx = request_context(update, context)
+    member = await ctx.get_user(member_id)
+    party = await ctx.get_party(party_id)
     
     keyboard = InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("✅ Исключить", callback_data=f"do_kick_{party_id}_{member_id}"),
-            InlineKeyboardButton("❌ Отмена", callback_data=f"member_actions_{party_id}_{member_id}")
+            InlineKeyboardButton("✅ Исключить", callback_data=MEMBER_KICK_CONFIRM.pack(party_id, member_id)),
+            InlineKeyboardButton("❌ Отмена", callback_data=MEMBER_ACTIONS.pack(party_id, member_id))
         ]
     ])
     
@@ -232,20 +273,20 @@ async def member_kick_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 @require_party_leader
-async def do_member_kick(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def do_member_kick(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int, member_id: int):
     """Исключение участника"""
     query = update.callback_query
     await query.answer()
     
-    data_parts = query.data.split('_')
-    party_id = int(data_parts[2])
-    member_id = int(data_parts[3])
+    ctx = request_context(update, context)
+    member = await ctx.get_user(member_id)
+    party = await ctx.get_party(party_id)
     
-    member = db.get_user(member_id)
-    party = db.get_party_by_id(party_id)
-    
-    # Исключаем
-    success = db.remove_member(member_id, party_id)
+    # Исключаем под замком партии; участника могли уже исключить повторным нажатием
+    async with party_locks.hold(party_id):
+        success = await async_db.get_member_info(member_id, party_id) is not None
+        if success:
+            success = await async_db.remove_member(member_id, party_id)
     
     if success:
         # Уведомляем исключённого
@@ -261,33 +302,30 @@ async def do_member_kick(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"✅ <b>Участник исключён</b>\n\n"
             f"Участник: <b>{member['minecraft_username']}</b>\n"
             f"Партия: <b>{party['name']}</b>",
-            reply_markup=back_button("party_edit_list_" + str(party_id)),
+            reply_markup=back_button(PARTY_EDIT_LIST.pack(party_id)),
             parse_mode='HTML'
         )
         
-        db.log_action(member_id, "Исключён из партии", f"Партия: {party['name']}")
+        await async_db.log_action(member_id, "Исключён из партии", f"Партия: {party['name']}")
         logger.info(f"✅ Исключён: {member['minecraft_username']} из {party['name']}")
     else:
         await query.answer("❌ Ошибка исключения", show_alert=True)
 
 
 @require_party_leader
-async def member_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def member_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int, new_leader_id: int):
     """Подтверждение передачи лидерства"""
     query = update.callback_query
     await query.answer()
     
-    data_parts = query.data.split('_')
-    party_id = int(data_parts[2])
-    new_leader_id = int(data_parts[3])
-    
-    party = db.get_party_by_id(party_id)
-    new_leader = db.get_user(new_leader_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
+    new_leader = await ctx.get_user(new_leader_id)
     
     keyboard = InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("✅ Подтвердить", callback_data=f"do_transfer_{party_id}_{new_leader_id}"),
-            InlineKeyboardButton("❌ Отмена", callback_data=f"member_actions_{party_id}_{new_leader_id}")
+            InlineKeyboardButton("✅ Подтвердить", callback_data=MEMBER_TRANSFER_CONFIRM.pack(party_id, new_leader_id)),
+            InlineKeyboardButton("❌ Отмена", callback_data=MEMBER_ACTIONS.pack(party_id, new_leader_id))
         ]
     ])
     
@@ -302,21 +340,37 @@ async def member_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_
 
 
 @require_auth
-async def do_transfer_leadership(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def do_transfer_leadership(update: Update, context: ContextTypes.DEFAULT_TYPE, party_id: int, new_leader_id: int):
     """Выполнение передачи лидерства"""
     query = update.callback_query
-    await query.answer()
     
-    data_parts = query.data.split('_')
-    party_id = int(data_parts[2])
-    new_leader_id = int(data_parts[3])
-    
-    party = db.get_party_by_id(party_id)
-    new_leader = db.get_user(new_leader_id)
+    ctx = request_context(update, context)
+    party = await ctx.get_party(party_id)
+    new_leader = await ctx.get_user(new_leader_id)
     old_leader_id = update.effective_user.id
     
-    # Передаём лидерство
-    db.transfer_leadership(party_id, new_leader_id)
+    def transfer(database):
+        # Смена главы и записи в лог - одной транзакцией
+        database.transfer_leadership(party_id, new_leader_id)
+        database.log_action(new_leader_id, "Назначен главой", f"Партия: {party['name']}")
+        database.log_action(old_leader_id, "Передал лидерство", f"Партия: {party['name']}")
+    
+    # Передаём лидерство. Под замком партии повторно проверяем, что передаёт
+    # действующий глава и новый глава ещё в партии (двойное нажатие, выход)
+    async with party_locks.hold(party_id):
+        party = await async_db.get_party_by_id(party_id)
+        if (
+            not party
+            or party['leader_telegram_id'] != old_leader_id
+            or not await async_db.get_member_info(new_leader_id, party_id)
+        ):
+            await query.answer("❌ Лидерство уже не может быть передано", show_alert=True)
+            return
+        
+        await async_db.transaction(transfer)
+    
+    # Ответ на нажатие один: alert выше или пустой здесь
+    await query.answer()
     
     # Уведомляем нового главу
     await send_notification(
@@ -332,12 +386,10 @@ async def do_transfer_leadership(update: Update, context: ContextTypes.DEFAULT_T
         f"✅ <b>Лидерство передано!</b>\n\n"
         f"Новый глава: <b>{new_leader['minecraft_username']}</b>\n\n"
         f"Теперь ты обычный участник партии.",
-        reply_markup=back_button("party_my"),
+        reply_markup=back_button(PARTY_MY.pack()),
         parse_mode='HTML'
     )
     
-    db.log_action(new_leader_id, "Назначен главой", f"Партия: {party['name']}")
-    db.log_action(old_leader_id, "Передал лидерство", f"Партия: {party['name']}")
     logger.info(f"✅ Лидерство передано: {party['name']} → {new_leader['minecraft_username']}")
 
 
@@ -353,19 +405,24 @@ def get_handlers():
     """Возвращает обработчики управления членами"""
     
     set_position_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(member_set_position_start, pattern="^member_setpos_")],
+        entry_points=[CallbackQueryHandler(member_set_position_start, pattern=MEMBER_SET_POSITION.pattern)],
         states={
             SET_POSITION: [MessageHandler(filters.TEXT & ~filters.COMMAND, member_set_position_received)],
         },
         fallbacks=[CommandHandler("cancel", cancel_set_position)],
     )
     
+    return [set_position_conv]
+
+
+def get_callbacks():
+    """Возвращает кнопки управления членами для CallbackRouter"""
     return [
-        CallbackQueryHandler(edit_party_list, pattern="^party_edit_list_"),
-        CallbackQueryHandler(member_actions_menu, pattern="^member_actions_"),
-        CallbackQueryHandler(member_kick_confirm, pattern="^member_kick_"),
-        CallbackQueryHandler(do_member_kick, pattern="^do_kick_"),
-        CallbackQueryHandler(member_transfer_confirm, pattern="^member_transfer_"),
-        CallbackQueryHandler(do_transfer_leadership, pattern="^do_transfer_"),
-        set_position_conv,
+        (PARTY_EDIT_LIST, edit_party_list),
+        (PARTY_TRANSFER, choose_new_leader),
+        (MEMBER_ACTIONS, member_actions_menu),
+        (MEMBER_KICK, member_kick_confirm),
+        (MEMBER_KICK_CONFIRM, do_member_kick),
+        (MEMBER_TRANSFER, member_transfer_confirm),
+        (MEMBER_TRANSFER_CONFIRM, do_transfer_leadership),
     ]
\ No newline at end of file
@@ -5,49 +5,46 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
 
-from database import db
-from utils import auth_checker
+from database import async_db
+from utils import auth_checker, request_context, reply_auth_unavailable, AuthServiceUnavailable, DeepLinkRouter
 from keyboards import main_menu_keyboard
-from config import REGISTRATION_BOT, ADMIN_IDS
+from config import REGISTRATION_BOT
+from handlers.party.invite import handle_party_invite
+from handlers.party.view import handle_party_deeplink
+from handlers.voting.participate import handle_vote_deeplink
+from handlers.parliament.elections import handle_election_deeplink
 
 logger = logging.getLogger(__name__)
 
+# Параметр /start <payload> -> обработчик и разобранный аргумент
+deep_links = DeepLinkRouter()
+deep_links.add('join_', handle_party_invite, 'invite_code')
+deep_links.add('party_', handle_party_deeplink, 'party_id', int)
+deep_links.add('vote_', handle_vote_deeplink, 'voting_id', int)
+deep_links.add('election_', handle_election_deeplink, 'election_id', int)
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /start - проверка и верификация"""
     user = update.effective_user
     telegram_id = user.id
     
-    # Проверка на deep link (приглашение в партию)
-    if context.args and context.args[0].startswith('join_'):
-        from handlers.party.invite import handle_party_invite
-        await handle_party_invite(update, context)
-        return
+    # Проверяем есть ли пользователь в БД
+    ctx = request_context(update, context)
+    user_data = await ctx.user()
     
-    # Проверка на deep link (просмотр партии)
-    if context.args and context.args[0].startswith('party_'):
-        from handlers.party.view import handle_party_deeplink
-        await handle_party_deeplink(update, context)
-        return
+    # Пользователь снова пишет боту - значит, сообщения ему доходят
+    # (в том числе когда пришёл по deep link)
+    if user_data and user_data.get('undeliverable_at'):
+        await async_db.clear_undeliverable(telegram_id)
     
-    # Проверка на deep link (голосование)
-    if context.args and context.args[0].startswith('vote_'):
-        from handlers.voting.participate import handle_vote_deeplink
-        await handle_vote_deeplink(update, context)
+    # Deep link: /start join_<код>, party_<id>, vote_<id>, election_<id>
+    if context.args and await deep_links.dispatch(update, context, context.args[0]):
         return
     
-    # Проверка на deep link (выборы)
-    if context.args and context.args[0].startswith('election_'):
-        from handlers.parliament.elections import handle_election_deeplink
-        await handle_election_deeplink(update, context)
-        return
-    
-    # Проверяем есть ли пользователь в БД
-    user_data = db.get_user(telegram_id)
-    
     if user_data:
         # Пользователь уже есть
-        is_admin = telegram_id in ADMIN_IDS
+        is_admin = ctx.is_admin
         await update.message.reply_text(
             f"👋 С возвращением, <b>{user_data['minecraft_username']}</b>!",
             reply_markup=main_menu_keyboard(is_admin),
@@ -57,7 +54,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Новый пользователь - проверяем через API
-    is_linked, player_data = auth_checker.check_player(telegram_id)
+    try:
+        is_linked, player_data = await auth_checker.check_player(telegram_id)
+    except AuthServiceUnavailable:
+        await reply_auth_unavailable(update)
+        return
     
     if not is_linked:
         await update.message.reply_text(
@@ -74,10 +75,10 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Добавляем пользователя в БД
     minecraft_username = player_data.get('username', 'Неизвестно')
-    db.add_user(telegram_id, minecraft_username)
-    db.log_action(telegram_id, "Регистрация", f"Новый пользователь: {minecraft_username}")
+    await async_db.add_user(telegram_id, minecraft_username)
+    await async_db.log_action(telegram_id, "Регистрация", f"Новый пользователь: {minecraft_username}")
     
-    is_admin = telegram_id in ADMIN_IDS
+    is_admin = ctx.is_admin
     
     await update.message.reply_text(
         f"✅ <b>Добро пожаловать, {minecraft_username}!</b>\n\n"
@@ -5,9 +5,20 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from handlers.common import feature_in_development
+from utils.callbacks import VOTING_VIEW, VOTE, VOTE_CONFIRM
+
 logger = logging.getLogger(__name__)
 
-async def handle_vote_deeplink(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработка deep link для голосования"""
+async def handle_vote_deeplink(update: Update, context: ContextTypes.DEFAULT_TYPE, voting_id: int):
+    """Обработка deep link для голосования (/start vote_<id>)"""
     # TODO: Реализовать голосования
     await update.message.reply_text("🚧 Функция в разработке")
+
+def get_callbacks():
+    # TODO: Реализовать голосования - пока кнопки только отвечают заглушкой
+    return [
+        (VOTING_VIEW, feature_in_development),
+        (VOTE, feature_in_development),
+        (VOTE_CONFIRM, feature_in_development),
+    ]
@@ -3,24 +3,29 @@
 """
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from utils.callbacks import (
+    MAIN_MENU, ADMIN_PANEL, ADMIN_STATS, ADMIN_LOGS, ADMIN_CREATE_VOTING, ADMIN_VOTING_TYPE,
+    ADMIN_PARLIAMENT, ADMIN_PARLIAMENT_DISSOLVE, ADMIN_ELECTION_START, PARLIAMENT_VIEW
+)
+
 
 def admin_panel_keyboard():
     """Главная панель администратора"""
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("📊 Статистика", callback_data="admin_stats")],
-        [InlineKeyboardButton("🗳️ Создать голосование", callback_data="admin_create_voting")],
-        [InlineKeyboardButton("🏛️ Управление парламентом", callback_data="admin_parliament")],
-        [InlineKeyboardButton("📜 Логи действий", callback_data="admin_logs")],
-        [InlineKeyboardButton("« Назад", callback_data="main_menu")]
+        [InlineKeyboardButton("📊 Статистика", callback_data=ADMIN_STATS.pack())],
+        [InlineKeyboardButton("🗳️ Создать голосование", callback_data=ADMIN_CREATE_VOTING.pack())],
+        [InlineKeyboardButton("🏛️ Управление парламентом", callback_data=ADMIN_PARLIAMENT.pack())],
+        [InlineKeyboardButton("📜 Логи действий", callback_data=ADMIN_LOGS.pack())],
+        [InlineKeyboardButton("« Назад", callback_data=MAIN_MENU.pack())]
     ])
 
 
 def admin_voting_type_keyboard():
     """Выбор типа голосования"""
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("🏛️ Парламентское", callback_data="admin_voting_parliament")],
-        [InlineKeyboardButton("👥 Общее", callback_data="admin_voting_public")],
-        [InlineKeyboardButton("« Назад", callback_data="admin_panel")]
+        [InlineKeyboardButton("🏛️ Парламентское", callback_data=ADMIN_VOTING_TYPE.pack('parliament'))],
+        [InlineKeyboardButton("👥 Общее", callback_data=ADMIN_VOTING_TYPE.pack('public'))],
+        [InlineKeyboardButton("« Назад", callback_data=ADMIN_PANEL.pack())]
     ])
 
 
@@ -29,13 +34,13 @@ def admin_parliament_keyboard(has_parliament: bool):
     keyboard = []
     
     if has_parliament:
-        keyboard.append([InlineKeyboardButton("👥 Просмотр парламента", callback_data="parliament_view")])
-        keyboard.append([InlineKeyboardButton("🗳️ Начать новые выборы", callback_data="admin_election_start")])
-        keyboard.append([InlineKeyboardButton("❌ Распустить парламент", callback_data="admin_parliament_dissolve")])
+        keyboard.append([InlineKeyboardButton("👥 Просмотр парламента", callback_data=PARLIAMENT_VIEW.pack())])
+        keyboard.append([InlineKeyboardButton("🗳️ Начать новые выборы", callback_data=ADMIN_ELECTION_START.pack())])
+        keyboard.append([InlineKeyboardButton("❌ Распустить парламент", callback_data=ADMIN_PARLIAMENT_DISSOLVE.pack())])
     else:
-        keyboard.append([InlineKeyboardButton("🗳️ Провести выборы", callback_data="admin_election_start")])
+        keyboard.append([InlineKeyboardButton("🗳️ Провести выборы", callback_data=ADMIN_ELECTION_START.pack())])
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data="admin_panel")])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=ADMIN_PANEL.pack())])
     
     return InlineKeyboardMarkup(keyboard)
 
@@ -43,5 +48,5 @@ def admin_parliament_keyboard(has_parliament: bool):
 def admin_stats_keyboard():
     """Статистика"""
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("« Назад", callback_data="admin_panel")]
+        [InlineKeyboardButton("« Назад", callback_data=ADMIN_PANEL.pack())]
     ])
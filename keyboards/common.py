@@ -3,21 +3,23 @@
 """
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from utils.callbacks import MAIN_MENU, MENU_POLITICS, MENU_PROFILE, ADMIN_PANEL
+
 
 def main_menu_keyboard(is_admin: bool = False):
     """Главное меню"""
     keyboard = [
-        [InlineKeyboardButton("🏛️ Политика", callback_data="menu_politics")],
-        [InlineKeyboardButton("👤 Профиль", callback_data="menu_profile")],
+        [InlineKeyboardButton("🏛️ Политика", callback_data=MENU_POLITICS.pack())],
+        [InlineKeyboardButton("👤 Профиль", callback_data=MENU_PROFILE.pack())],
     ]
     
     if is_admin:
-        keyboard.insert(1, [InlineKeyboardButton("⚙️ Админ-панель", callback_data="admin_panel")])
+        keyboard.insert(1, [InlineKeyboardButton("⚙️ Админ-панель", callback_data=ADMIN_PANEL.pack())])
     
     return InlineKeyboardMarkup(keyboard)
 
 
-def back_button(callback_data: str = "main_menu"):
+def back_button(callback_data: str = MAIN_MENU.pack()):
     """Кнопка назад"""
     return InlineKeyboardMarkup([[
         InlineKeyboardButton("« Назад", callback_data=callback_data)
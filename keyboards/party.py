@@ -3,22 +3,28 @@
 """
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from utils.callbacks import (
+    NOOP, MAIN_MENU, MENU_POLITICS, PARTY_MY, PARTY_LIST, PARTY_CREATE, PARTY_IDEOLOGY_CHOICE,
+    PARTY_MEMBERS, PARTY_MANAGE, PARTY_EDIT_NAME, PARTY_EDIT_LIST, PARTY_TRANSFER, PARTY_LEAVE,
+    PARTY_DELETE, PARTY_APPLICATIONS, APP_APPROVE, APP_REJECT, MEMBER_KICK, PARLIAMENT_VIEW
+)
+
 
 def politics_menu_keyboard(has_party: bool, is_deputy: bool):
     """Меню политики"""
     keyboard = []
     
     if has_party:
-        keyboard.append([InlineKeyboardButton("🏛️ Моя партия", callback_data="party_my")])
+        keyboard.append([InlineKeyboardButton("🏛️ Моя партия", callback_data=PARTY_MY.pack())])
     else:
-        keyboard.append([InlineKeyboardButton("➕ Создать партию", callback_data="party_create")])
+        keyboard.append([InlineKeyboardButton("➕ Создать партию", callback_data=PARTY_CREATE.pack())])
     
-    keyboard.append([InlineKeyboardButton("📋 Все партии", callback_data="party_list")])
+    keyboard.append([InlineKeyboardButton("📋 Все партии", callback_data=PARTY_LIST.pack())])
     
     if is_deputy or has_party:
-        keyboard.append([InlineKeyboardButton("🏛️ Парламент", callback_data="parliament_view")])
+        keyboard.append([InlineKeyboardButton("🏛️ Парламент", callback_data=PARLIAMENT_VIEW.pack())])
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data="main_menu")])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=MAIN_MENU.pack())])
     
     return InlineKeyboardMarkup(keyboard)
 
@@ -31,16 +37,16 @@ def party_management_keyboard(party_id: int, is_leader: bool, pending_apps: int
         keyboard.append([
             InlineKeyboardButton(
                 f"📨 Заявки ({pending_apps})", 
-                callback_data=f"party_applications_{party_id}"
+                callback_data=PARTY_APPLICATIONS.pack(party_id)
             )
         ])
     
     if is_leader:
-        keyboard.append([InlineKeyboardButton("⚙️ Управление", callback_data=f"party_manage_{party_id}")])
+        keyboard.append([InlineKeyboardButton("⚙️ Управление", callback_data=PARTY_MANAGE.pack(party_id))])
     
-    keyboard.append([InlineKeyboardButton("👥 Список членов", callback_data=f"party_members_{party_id}")])
-    keyboard.append([InlineKeyboardButton("🚪 Выйти из партии", callback_data=f"party_leave_{party_id}")])
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data="menu_politics")])
+    keyboard.append([InlineKeyboardButton("👥 Список членов", callback_data=PARTY_MEMBERS.pack(party_id))])
+    keyboard.append([InlineKeyboardButton("🚪 Выйти из партии", callback_data=PARTY_LEAVE.pack(party_id))])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=MENU_POLITICS.pack())])
     
     return InlineKeyboardMarkup(keyboard)
 
@@ -48,26 +54,37 @@ def party_management_keyboard(party_id: int, is_leader: bool, pending_apps: int
 def party_edit_keyboard(party_id: int):
     """Меню редактирования партии"""
     keyboard = [
-        [InlineKeyboardButton("📝 Изменить название", callback_data=f"party_edit_name_{party_id}")],
-        [InlineKeyboardButton("📋 Редактор списка", callback_data=f"party_edit_list_{party_id}")],
-        [InlineKeyboardButton("👑 Передать лидерство", callback_data=f"party_transfer_{party_id}")],
-        [InlineKeyboardButton("🗑️ Удалить партию", callback_data=f"party_delete_{party_id}")],
-        [InlineKeyboardButton("« Назад", callback_data="party_my")]
+        [InlineKeyboardButton("📝 Изменить название", callback_data=PARTY_EDIT_NAME.pack(party_id))],
+        [InlineKeyboardButton("📋 Редактор списка", callback_data=PARTY_EDIT_LIST.pack(party_id))],
+        [InlineKeyboardButton("👑 Передать лидерство", callback_data=PARTY_TRANSFER.pack(party_id))],
+        [InlineKeyboardButton("🗑️ Удалить партию", callback_data=PARTY_DELETE.pack(party_id))],
+        [InlineKeyboardButton("« Назад", callback_data=PARTY_MY.pack())]
     ]
     
     return InlineKeyboardMarkup(keyboard)
 
 
-def party_member_list_keyboard(party_id: int, members: list, current_page: int = 0, is_leader: bool = False):
-    """Список членов партии с возможностью управления"""
+def members_page_buttons(route, party_id: int, members: list, current_page: int,
+                        has_prev: bool, has_next: bool) -> list:
+    """Кнопки ◀️ ▶️ страниц списка членов (курсор - позиция первого/последнего на странице)"""
+    nav_buttons = []
+    if has_prev and members:
+        nav_buttons.append(InlineKeyboardButton(
+            "◀️", callback_data=route.pack(party_id, current_page - 1, 0, members[0]['list_position'])
+        ))
+    if has_next and members:
+        nav_buttons.append(InlineKeyboardButton(
+            "▶️", callback_data=route.pack(party_id, current_page + 1, members[-1]['list_position'])
+        ))
+    return nav_buttons
+
+
+def party_member_list_keyboard(party_id: int, members: list, current_page: int = 0, is_leader: bool = False,
+                               has_prev: bool = False, has_next: bool = False):
+    """Страница списка членов партии (members - только члены этой страницы)"""
     keyboard = []
     
-    # Показываем по 5 человек на странице
-    page_size = 5
-    start_idx = current_page * page_size
-    end_idx = start_idx + page_size
-    
-    for member in members[start_idx:end_idx]:
+    for member in members:
         role_icon = "👑" if member['role'] == 'leader' else "👤"
         pos = member['list_position']
         name = member['minecraft_username']
@@ -76,51 +93,21 @@ def party_member_list_keyboard(party_id: int, members: list, current_page: int =
         
         if is_leader and member['role'] != 'leader':
             keyboard.append([
-                InlineKeyboardButton(button_text, callback_data=f"member_info_{member['telegram_id']}"),
-                InlineKeyboardButton("❌", callback_data=f"member_kick_{party_id}_{member['telegram_id']}")
+                InlineKeyboardButton(button_text, callback_data=NOOP.pack()),
+                InlineKeyboardButton("❌", callback_data=MEMBER_KICK.pack(party_id, member['telegram_id']))
             ])
         else:
-            keyboard.append([InlineKeyboardButton(button_text, callback_data="noop")])
+            keyboard.append([InlineKeyboardButton(button_text, callback_data=NOOP.pack())])
     
     # Пагинация
-    nav_buttons = []
-    if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton("◀️", callback_data=f"party_members_{party_id}_page_{current_page-1}"))
-    if end_idx < len(members):
-        nav_buttons.append(InlineKeyboardButton("▶️", callback_data=f"party_members_{party_id}_page_{current_page+1}"))
-    
+    nav_buttons = members_page_buttons(PARTY_MEMBERS, party_id, members, current_page, has_prev, has_next)
     if nav_buttons:
         keyboard.append(nav_buttons)
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data="party_my")])
-    
-    return InlineKeyboardMarkup(keyboard)
-
-
-def party_list_editor_keyboard(party_id: int, members: list):
-    """Редактор списка партии (перемещение вверх/вниз)"""
-    keyboard = []
-    
-    for i, member in enumerate(members):
-        if member['role'] == 'leader':
-            continue
-        
-        pos = member['list_position']
-        name = member['minecraft_username']
-        
-        buttons = [InlineKeyboardButton(f"{pos}. {name}", callback_data="noop")]
-        
-        # Кнопка вверх (если не первый)
-        if i > 1:  # Пропускаем лидера (0) и первого после него
-            buttons.append(InlineKeyboardButton("⬆️", callback_data=f"list_up_{party_id}_{pos}"))
-        
-        # Кнопка вниз (если не последний)
-        if i < len(members) - 1:
-            buttons.append(InlineKeyboardButton("⬇️", callback_data=f"list_down_{party_id}_{pos}"))
-        
-        keyboard.append(buttons)
+    if is_leader:
+        keyboard.append([InlineKeyboardButton("⚙️ Редактировать список", callback_data=PARTY_EDIT_LIST.pack(party_id))])
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data=f"party_manage_{party_id}")])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=PARTY_MY.pack())])
     
     return InlineKeyboardMarkup(keyboard)
 
@@ -129,21 +116,21 @@ def application_keyboard(app_id: int, party_id: int):
     """Кнопки для заявки на вступление"""
     return InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("✅ Одобрить", callback_data=f"app_approve_{app_id}"),
-            InlineKeyboardButton("❌ Отклонить", callback_data=f"app_reject_{app_id}")
+            InlineKeyboardButton("✅ Одобрить", callback_data=APP_APPROVE.pack(app_id)),
+            InlineKeyboardButton("❌ Отклонить", callback_data=APP_REJECT.pack(app_id))
         ],
-        [InlineKeyboardButton("« Назад", callback_data=f"party_applications_{party_id}")]
+        [InlineKeyboardButton("« Назад", callback_data=PARTY_APPLICATIONS.pack(party_id))]
     ])
 
 
 def ideology_keyboard():
     """Выбор идеологии при создании партии"""
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("⚔️ Милитаризм", callback_data="ideology_militant")],
-        [InlineKeyboardButton("💰 Капитализм", callback_data="ideology_capitalist")],
-        [InlineKeyboardButton("🌿 Экология", callback_data="ideology_ecology")],
-        [InlineKeyboardButton("🏗️ Строительство", callback_data="ideology_builder")],
-        [InlineKeyboardButton("🎓 Наука", callback_data="ideology_science")],
-        [InlineKeyboardButton("🤝 Центризм", callback_data="ideology_centrist")],
-        [InlineKeyboardButton("✏️ Своя идеология", callback_data="ideology_custom")],
+        [InlineKeyboardButton("⚔️ Милитаризм", callback_data=PARTY_IDEOLOGY_CHOICE.pack('militant'))],
+        [InlineKeyboardButton("💰 Капитализм", callback_data=PARTY_IDEOLOGY_CHOICE.pack('capitalist'))],
+        [InlineKeyboardButton("🌿 Экология", callback_data=PARTY_IDEOLOGY_CHOICE.pack('ecology'))],
+        [InlineKeyboardButton("🏗️ Строительство", callback_data=PARTY_IDEOLOGY_CHOICE.pack('builder'))],
+        [InlineKeyboardButton("🎓 Наука", callback_data=PARTY_IDEOLOGY_CHOICE.pack('science'))],
+        [InlineKeyboardButton("🤝 Центризм", callback_data=PARTY_IDEOLOGY_CHOICE.pack('centrist'))],
+        [InlineKeyboardButton("✏️ Своя идеология", callback_data=PARTY_IDEOLOGY_CHOICE.pack('custom'))],
     ])
@@ -3,13 +3,18 @@
 """
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from utils.callbacks import (
+    MAIN_MENU, VOTE, VOTE_CONFIRM, VOTING_VIEW,
+    ELECTION_VIEW, ELECTION_PARTIES, ELECTION_VOTE, ELECTION_VOTE_CONFIRM
+)
+
 
 def voting_keyboard(voting_id: int):
     """Кнопки для голосования"""
     return InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("✅ За", callback_data=f"vote_{voting_id}_for"),
-            InlineKeyboardButton("❌ Против", callback_data=f"vote_{voting_id}_against")
+            InlineKeyboardButton("✅ За", callback_data=VOTE.pack(voting_id, 'for')),
+            InlineKeyboardButton("❌ Против", callback_data=VOTE.pack(voting_id, 'against'))
         ]
     ])
 
@@ -27,16 +32,16 @@ def election_parties_keyboard(election_id: int, parties: list, page: int = 0):
         keyboard.append([
             InlineKeyboardButton(
                 f"{i}. {party['name']} ({party['ideology']})",
-                callback_data=f"election_vote_{election_id}_{party['id']}"
+                callback_data=ELECTION_VOTE.pack(election_id, party['id'])
             )
         ])
     
     # Пагинация
     nav_buttons = []
     if page > 0:
-        nav_buttons.append(InlineKeyboardButton("◀️", callback_data=f"election_parties_{election_id}_page_{page-1}"))
+        nav_buttons.append(InlineKeyboardButton("◀️", callback_data=ELECTION_PARTIES.pack(election_id, page - 1)))
     if end_idx < len(parties):
-        nav_buttons.append(InlineKeyboardButton("▶️", callback_data=f"election_parties_{election_id}_page_{page+1}"))
+        nav_buttons.append(InlineKeyboardButton("▶️", callback_data=ELECTION_PARTIES.pack(election_id, page + 1)))
     
     if nav_buttons:
         keyboard.append(nav_buttons)
@@ -53,11 +58,11 @@ def active_votings_keyboard(votings: list):
         keyboard.append([
             InlineKeyboardButton(
                 f"{vote_type_icon} {voting['title'][:30]}...",
-                callback_data=f"voting_view_{voting['id']}"
+                callback_data=VOTING_VIEW.pack(voting['id'])
             )
         ])
     
-    keyboard.append([InlineKeyboardButton("« Назад", callback_data="main_menu")])
+    keyboard.append([InlineKeyboardButton("« Назад", callback_data=MAIN_MENU.pack())])
     
     return InlineKeyboardMarkup(keyboard)
 
@@ -65,14 +70,14 @@ def active_votings_keyboard(votings: list):
 def confirm_vote_keyboard(voting_id: int, vote_type: str):
     """Подтверждение голоса"""
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("✅ Подтвердить", callback_data=f"vote_confirm_{voting_id}_{vote_type}")],
-        [InlineKeyboardButton("❌ Отмена", callback_data=f"voting_view_{voting_id}")]
+        [InlineKeyboardButton("✅ Подтвердить", callback_data=VOTE_CONFIRM.pack(voting_id, vote_type))],
+        [InlineKeyboardButton("❌ Отмена", callback_data=VOTING_VIEW.pack(voting_id))]
     ])
 
 
 def confirm_election_vote_keyboard(election_id: int, party_id: int):
     """Подтверждение голоса на выборах"""
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("✅ Подтвердить", callback_data=f"election_confirm_{election_id}_{party_id}")],
-        [InlineKeyboardButton("❌ Отмена", callback_data=f"election_view_{election_id}")]
+        [InlineKeyboardButton("✅ Подтвердить", callback_data=ELECTION_VOTE_CONFIRM.pack(election_id, party_id))],
+        [InlineKeyboardButton("❌ Отмена", callback_data=ELECTION_VIEW.pack(election_id))]
     ])
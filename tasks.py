@@ -1,120 +1,277 @@
 """
 Фоновые задачи бота
 """
+import asyncio
 import logging
+import math
 from datetime import datetime, timedelta
+from typing import Dict
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from telegram import Bot
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
-from database import db
-from utils import auth_checker, send_notification
-from config import AUTH_RECHECK_DAYS, PARTY_MIN_MEMBERS
+from database import async_db, SQLiteJobStore
+from utils import auth_checker, AuthServiceUnavailable, CircuitBreaker, outbox, outbox_item
+from utils.broadcast import TokenBucket
+from config import (
+    AUTH_RECHECK_TICK_SECONDS, AUTH_RECHECK_RPS, AUTH_RECHECK_TICK_FILL,
+    AUTH_RECHECK_BATCH_SIZE, AUTH_RECHECK_CONCURRENCY,
+    PARTY_MIN_MEMBERS, OUTBOX_RETENTION_DAYS, SCHEDULER_MISFIRE_GRACE_SECONDS
+)
 
 logger = logging.getLogger(__name__)
-scheduler = AsyncIOScheduler()
+# Задачи хранятся в БД и переживают перезапуск. Пропущенные за время простоя
+# запуски выполняются один раз (coalesce), если опоздание не больше
+# SCHEDULER_MISFIRE_GRACE_SECONDS; одна задача не запускается параллельно сама с собой
+jobstore = SQLiteJobStore()
+scheduler = AsyncIOScheduler(
+    jobstores={'default': jobstore},
+    job_defaults={
+        'coalesce': True,
+        'max_instances': 1,
+        'misfire_grace_time': SCHEDULER_MISFIRE_GRACE_SECONDS
+    }
+)
 
+# Общий бюджет запросов перепроверки к API, запросы идут равномерно, без всплесков
+recheck_budget = TokenBucket(AUTH_RECHECK_RPS, capacity=1)
 
-async def check_auth_status(bot: Bot):
-    """Проверка статуса авторизации пользователей (раз в месяц)"""
-    logger.info("🔍 Запуск проверки авторизации пользователей...")
+
+async def check_auth_status():
+    """
+    Перепроверка авторизации пользователей, у которых подошёл срок
+
+    Запускается каждые AUTH_RECHECK_TICK_SECONDS и берёт столько, сколько
+    успеет проверить в пределах AUTH_RECHECK_RPS за AUTH_RECHECK_TICK_FILL
+    интервала - запуск заканчивается раньше следующего. Следующий срок каждому
+    назначается со случайным сдвигом, поэтому проверки равномерно
+    распределены по суткам. Итог пачки и уведомления отвязанным
+    записываются одной транзакцией.
+    """
+    if auth_checker.breaker.is_open:
+        logger.debug("⏸️ API сервера недоступно, перепроверка пропущена")
+        return
+    
+    now = datetime.now()
+    users = await async_db.get_users_for_auth_recheck(
+        now, max(1, math.floor(AUTH_RECHECK_RPS * AUTH_RECHECK_TICK_SECONDS * AUTH_RECHECK_TICK_FILL))
+    )
+    if not users:
+        return
     
-    users = db.get_users_for_auth_recheck(AUTH_RECHECK_DAYS)
+    limiter = asyncio.Semaphore(AUTH_RECHECK_CONCURRENCY)
     
-    for user in users:
-        telegram_id = user['telegram_id']
-        is_linked, player_data = auth_checker.check_player(telegram_id)
+    async def check(user):
+        async with limiter:
+            await recheck_budget.acquire()
+            return await auth_checker.check_player(user['telegram_id'], fresh=True)
+    
+    checked = deactivated = 0
+    text = (
+        "⚠️ <b>Аккаунт отвязан</b>\n\n"
+        "Твой Telegram больше не привязан к серверу.\n"
+        "Привяжи заново и напиши /start"
+    )
+    
+    for start in range(0, len(users), AUTH_RECHECK_BATCH_SIZE):
+        batch = users[start:start + AUTH_RECHECK_BATCH_SIZE]
+        results = await asyncio.gather(*(check(user) for user in batch), return_exceptions=True)
         
-        if is_linked:
-            db.update_auth_check(telegram_id)
-            logger.info(f"✅ Проверка пройдена: {user['minecraft_username']}")
-        else:
-            db.deactivate_user(telegram_id)
-            await send_notification(
-                bot, telegram_id,
-                "⚠️ <b>Аккаунт отвязан</b>\n\n"
-                "Твой Telegram больше не привязан к серверу.\n"
-                "Привяжи заново и напиши /start"
-            )
-            logger.warning(f"❌ Пользователь отвязан: {user['minecraft_username']}")
-    
-    logger.info(f"✅ Проверка завершена. Проверено: {len(users)}")
-
-
-async def check_party_deadlines(bot: Bot):
-    """Проверка дедлайнов создания партий"""
-    logger.info("⏰ Проверка дедлайнов партий...")
-    
-    # Получаем незарегистрированные партии
-    parties = db.get_all_parties(registered_only=False)
-    
-    for party in parties:
-        if party['is_registered']:
-            continue
+        linked, unlinked, deferred, unavailable = [], [], [], False
+        for user, result in zip(batch, results):
+            if isinstance(result, AuthServiceUnavailable):
+                unavailable = True
+            elif isinstance(result, Exception):
+                # Не держим пользователя в голове очереди - повторим через час
+                logger.error(f"❌ Ошибка проверки {user['minecraft_username']}: {result}")
+                deferred.append(user['telegram_id'])
+            elif result[0]:
+                linked.append(user['telegram_id'])
+            else:
+                unlinked.append(user['telegram_id'])
+                logger.warning(f"❌ Пользователь отвязан: {user['minecraft_username']}")
         
-        deadline = datetime.fromisoformat(party['registration_deadline'])
+        def save(database):
+            database.record_auth_checks(linked, unlinked)
+            database.defer_auth_checks(deferred, datetime.now() + timedelta(hours=1))
+            database.enqueue_notifications([outbox_item(telegram_id, text) for telegram_id in unlinked])
         
-        if datetime.now() > deadline:
-            # Дедлайн истёк
-            if party['members_count'] >= PARTY_MIN_MEMBERS:
-                # Регистрируем партию
-                db.register_party(party['id'])
-                members = db.get_party_members(party['id'])
-                
-                for member in members:
-                    await send_notification(
-                        bot, member['telegram_id'],
-                        f"🎉 <b>Партия зарегистрирована!</b>\n\n"
-                        f"Партия <b>{party['name']}</b> набрала {party['members_count']} членов "
-                        f"и успешно зарегистрирована!"
-                    )
-                
-                logger.info(f"✅ Партия зарегистрирована: {party['name']}")
-            else:
-                # Не набрала минимум - удаляем
-                members = db.get_party_members(party['id'])
-                
-                for member in members:
-                    await send_notification(
-                        bot, member['telegram_id'],
-                        f"❌ <b>Партия распущена</b>\n\n"
-                        f"Партия <b>{party['name']}</b> не набрала минимум {PARTY_MIN_MEMBERS} членов "
-                        f"за отведённое время и была расформирована."
-                    )
-                
-                db.delete_party(party['id'])
-                logger.info(f"❌ Партия удалена: {party['name']}")
-
-
-async def check_voting_deadlines(bot: Bot):
-    """Проверка дедлайнов голосований"""
-    logger.info("🗳️ Проверка дедлайнов голосований...")
-    
-    votings = db.get_active_votings()
-    
-    for voting in votings:
-        end_date = datetime.fromisoformat(voting['end_date'])
+        await async_db.transaction(save)
+        if unlinked:
+            outbox.wake()
         
-        # Уведомление за час до конца
-        if datetime.now() + timedelta(hours=1) >= end_date and datetime.now() < end_date:
-            # TODO: Отправить уведомление в канал
-            pass
+        checked += len(linked) + len(unlinked)
+        deactivated += len(unlinked)
         
-        # Закрытие голосования
-        if datetime.now() >= end_date:
-            db.close_voting(voting['id'])
-            logger.info(f"✅ Голосование закрыто: {voting['title']}")
+        # Непроверенные остались в очереди и попадут в следующий запуск
+        if unavailable and auth_checker.breaker.state != CircuitBreaker.CLOSED:
+            logger.warning(f"⚠️ Перепроверка прервана после {checked} пользователей: API недоступно")
+            break
+    
+    pending = await async_db.get_pending_auth_recheck_count(datetime.now())
+    logger.info(f"🔍 Перепроверка: проверено {checked}, отвязано {deactivated}, в очереди {pending}")
+
+
+def schedule_party_deadline(party: Dict):
+    """Поставить таймер на окончание набора партии"""
+    deadline = datetime.fromisoformat(party['registration_deadline'])
+    scheduler.add_job(
+        expire_party_deadline, 'date', run_date=max(deadline, datetime.now()), args=[party['id']],
+        id=f"party_deadline:{party['id']}", replace_existing=True, misfire_grace_time=None
+    )
+
 
+def schedule_voting_deadline(voting: Dict):
+    """Поставить таймер на закрытие голосования"""
+    end_date = datetime.fromisoformat(voting['end_date'])
+    scheduler.add_job(
+        close_voting_on_deadline, 'date', run_date=max(end_date, datetime.now()), args=[voting['id']],
+        id=f"voting_deadline:{voting['id']}", replace_existing=True, misfire_grace_time=None
+    )
 
-def start_scheduler(bot: Bot):
-    """Запуск планировщика"""
-    # Проверка авторизации раз в день
-    scheduler.add_job(check_auth_status, 'cron', hour=3, args=[bot])
+
+async def restore_deadline_jobs():
+    """Поставить недостающие таймеры незавершённых партий и голосований (например, после сбоя)"""
+    scheduled = jobstore.get_job_ids()
+    restored = 0
+    
+    for party in await async_db.get_pending_party_deadlines():
+        if f"party_deadline:{party['id']}" not in scheduled:
+            schedule_party_deadline(party)
+            restored += 1
+    
+    for voting in await async_db.get_pending_voting_deadlines():
+        if f"voting_deadline:{voting['id']}" not in scheduled:
+            schedule_voting_deadline(voting)
+            restored += 1
+    
+    if restored:
+        logger.info(f"⏰ Восстановлено таймеров сроков: {restored}")
+
+
+async def expire_party_deadline(party_id: int):
+    """Окончание набора партии: регистрация или роспуск"""
+    party = await async_db.get_party_by_id(party_id)
     
-    # Проверка дедлайнов партий каждые 5 минут
-    scheduler.add_job(check_party_deadlines, 'interval', minutes=5, args=[bot])
+    # Партию могли удалить или зарегистрировать раньше срока
+    if not party or party['is_registered']:
+        return
     
-    # Проверка голосований каждые 10 минут
-    scheduler.add_job(check_voting_deadlines, 'interval', minutes=10, args=[bot])
+    # Срок продлили или таймер сработал раньше - переставляем его
+    if datetime.fromisoformat(party['registration_deadline']) > datetime.now():
+        schedule_party_deadline(party)
+        return
     
+    if party['members_count'] >= PARTY_MIN_MEMBERS:
+        # Регистрация и уведомления членам - одной транзакцией
+        text = (
+            f"🎉 <b>Партия зарегистрирована!</b>\n\n"
+            f"Партия <b>{party['name']}</b> набрала {party['members_count']} членов "
+            f"и успешно зарегистрирована!"
+        )
+        
+        def register(database):
+            database.register_party(party['id'])
+            recipients = database.get_party_member_recipients(party['id'])
+            database.enqueue_notifications([
+                outbox_item(telegram_id, text, f"party_registered:{party['id']}:{telegram_id}")
+                for telegram_id in recipients
+            ])
+        
+        await async_db.transaction(register)
+        outbox.wake()
+        logger.info(f"✅ Партия зарегистрирована: {party['name']}")
+    else:
+        # Не набрала минимум - удаляем, уведомления ставим в очередь до удаления
+        text = (
+            f"❌ <b>Партия распущена</b>\n\n"
+            f"Партия <b>{party['name']}</b> не набрала минимум {PARTY_MIN_MEMBERS} членов "
+            f"за отведённое время и была расформирована."
+        )
+        
+        def dissolve(database):
+            recipients = database.get_party_member_recipients(party['id'])
+            database.enqueue_notifications([
+                outbox_item(telegram_id, text, f"party_dissolved:{party['id']}:{telegram_id}")
+                for telegram_id in recipients
+            ])
+            database.delete_party(party['id'])
+        
+        await async_db.transaction(dissolve)
+        outbox.wake()
+        logger.info(f"❌ Партия удалена: {party['name']}")
+
+
+async def close_voting_on_deadline(voting_id: int):
+    """Закрытие голосования по окончании срока"""
+    voting = await async_db.get_voting_by_id(voting_id)
+    if not voting or voting['status'] != 'active':
+        return
+    
+    if datetime.fromisoformat(voting['end_date']) > datetime.now():
+        schedule_voting_deadline(voting)
+        return
+    
+    await async_db.close_voting(voting_id)
+    logger.info(f"✅ Голосование закрыто: {voting['title']}")
+
+
+async def check_election_tally():
+    """Сверка счётчиков активных выборов с голосами"""
+    election = await async_db.get_active_election()
+    if not election:
+        return
+    
+    mismatches = await async_db.rebuild_election_tally(election['id'])
+    if not mismatches:
+        logger.info(f"✅ Счётчики выборов {election['id']} сходятся с голосами")
+
+
+async def purge_notification_outbox():
+    """Удаление старых отправленных уведомлений из очереди"""
+    purged = await async_db.purge_sent_notifications(OUTBOX_RETENTION_DAYS)
+    if purged:
+        logger.info(f"🧹 Удалено отправленных уведомлений: {purged}")
+
+
+def _ensure_job(func, trigger, job_id: str):
+    """
+    Добавить постоянную задачу, если её ещё нет в БД
+
+    Сохранённая задача не перезаписывается: её next_run_time остаётся,
+    и пропущенный за время простоя запуск догоняется (coalesce,
+    misfire_grace_time). Расписание меняется, только если его изменили в настройках.
+    """
+    job = scheduler.get_job(job_id)
+    if job is None:
+        scheduler.add_job(func, trigger, id=job_id)
+    elif str(job.trigger) != str(trigger):
+        scheduler.reschedule_job(job_id, trigger=trigger)
+        logger.info(f"⏰ Расписание задачи {job_id} изменено: {trigger}")
+
+
+def start_scheduler():
+    """Запуск планировщика (внутри цикла событий бота)"""
     scheduler.start()
+    
+    # Постоянные задачи - с фиксированными id, после перезапуска
+    # продолжают сохранённое расписание
+    
+    # Перепроверка авторизации - понемногу в течение всех суток
+    _ensure_job(check_auth_status, IntervalTrigger(seconds=AUTH_RECHECK_TICK_SECONDS), 'auth_recheck')
+    
+    # Дедлайны партий и голосований - отдельные таймеры, см. restore_deadline_jobs
+    
+    # Сверка счётчиков выборов раз в день
+    _ensure_job(check_election_tally, CronTrigger(hour=4), 'election_tally_check')
+    
+    # Очистка очереди уведомлений раз в день
+    _ensure_job(purge_notification_outbox, CronTrigger(hour=5), 'outbox_purge')
+    
     logger.info("📊 Планировщик задач запущен")
+
+
+def shutdown_scheduler():
+    """Остановка планировщика, сохранённые задачи остаются в БД"""
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,52 @@
+"""
+Общие фикстуры тестов
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Настройки - до первого импорта config: своя временная БД и адрес API,
+# который никуда не ведёт (значения из .env не перекрывают заданные здесь)
+_TMP_DIR = tempfile.mkdtemp(prefix='politics-tests-')
+os.environ['DATABASE_PATH'] = os.path.join(_TMP_DIR, 'politics.db')
+os.environ['API_URL'] = 'http://127.0.0.1:9'
+os.environ['API_TOKEN'] = 'test-token'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import Database  # noqa: E402
+from database.async_db import AsyncDatabase  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Чистая БД со всеми миграциями"""
+    database = Database(str(tmp_path / 'test.db'))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def async_database(database):
+    """Асинхронная обёртка над чистой БД"""
+    wrapper = AsyncDatabase(database, readers=2)
+    yield wrapper
+    wrapper._writer.shutdown(wait=True)
+    wrapper._readers.shutdown(wait=True)
+
+
+def add_users(database, *telegram_ids):
+    """Пользователи с ником Player<id>"""
+    for telegram_id in telegram_ids:
+        database.add_user(telegram_id, f'Player{telegram_id}')
+
+
+def create_party(database, leader_id: int, *member_ids: int, name: str = 'Тест') -> int:
+    """Партия с главой leader_id и членами member_ids (пользователи создаются)"""
+    add_users(database, leader_id, *member_ids)
+    party_id, _ = database.create_party(name, 'Центризм', 'Описание', leader_id, 60)
+    for telegram_id in member_ids:
+        database.add_party_member(telegram_id, party_id)
+    return party_id
@@ -0,0 +1,116 @@
+"""
+Распределение мест: совпадение с прежним подсчётом и равенства
+"""
+import heapq
+import random
+from fractions import Fraction
+
+import pytest
+
+import apportionment
+from apportionment import apportion, METHODS
+
+DIVISORS = {'dhondt': lambda k: k + 1, 'sainte_lague': lambda k: 2 * k + 1}
+
+
+def previous_hare(votes, seats):
+    """
+    Прежний подсчёт из election_results (до apportionment), в точной арифметике:
+    целая часть доли, затем по месту наибольшим остаткам, при равенстве - первая партия
+    """
+    total = sum(votes.values())
+    exact = {party: Fraction(count * seats, total) for party, count in votes.items()}
+    result = {party: int(share) for party, share in exact.items()}
+
+    for _ in range(seats - sum(result.values())):
+        best = max(votes, key=lambda party: exact[party] - result[party])
+        result[best] += 1
+    return result
+
+
+@pytest.mark.parametrize('votes, seats, expected', [
+    ({'A': 500, 'B': 300, 'C': 200}, 10, {'A': 5, 'B': 3, 'C': 2}),
+    ({'A': 4160, 'B': 3380, 'C': 1710, 'D': 750}, 25, {'A': 10, 'B': 9, 'C': 4, 'D': 2}),
+    ({'A': 1000, 'B': 1}, 5, {'A': 5, 'B': 0}),
+])
+def test_hare_pinned(votes, seats, expected):
+    assert apportion(votes, seats, 'hare') == expected
+
+
+def test_hare_matches_previous_count():
+    rng = random.Random(20000)
+    for _ in range(20000):
+        votes = {f'p{i}': rng.randint(1, 50) for i in range(rng.randint(2, 8))}
+        votes = dict(sorted(votes.items(), key=lambda item: -item[1]))
+        seats = rng.randint(1, 60)
+        assert apportion(votes, seats, 'hare') == previous_hare(votes, seats), (votes, seats)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_exact_tie_goes_to_earlier_party(method):
+    assert apportion({'A': 10, 'B': 10, 'C': 10}, 2, method) == {'A': 1, 'B': 1, 'C': 0}
+    assert apportion({'C': 10, 'B': 10, 'A': 10}, 1, method) == {'C': 1, 'B': 0, 'A': 0}
+
+
+def test_hare_tie_on_remainder_with_fewer_votes():
+    # Остатки равны (57/102), место получает стоящая раньше B, а не C
+    assert apportion({'A': 46, 'B': 45, 'C': 11}, 33, 'hare')['B'] == 15
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_short_list_seats_go_to_others(method):
+    result = apportion({'A': 600, 'B': 300, 'C': 100}, 10, method, capacity={'A': 2, 'B': 10, 'C': 10})
+    assert result['A'] == 2
+    assert sum(result.values()) == 10
+
+
+def sequential_divisors(votes, seats, method, capacity=None):
+    """Метод делителей по определению: места по одному наибольшему частному"""
+    divisor = DIVISORS[method]
+    order = {party: index for index, party in enumerate(votes)}
+    result = {party: 0 for party in votes}
+    for _ in range(seats):
+        open_parties = [
+            party for party, count in votes.items()
+            if count > 0 and result[party] < (capacity or {}).get(party, seats + 1)
+        ]
+        if not open_parties:
+            break
+        best = max(
+            open_parties,
+            key=lambda party: (Fraction(votes[party], divisor(result[party])), votes[party], -order[party])
+        )
+        result[best] += 1
+    return result
+
+
+@pytest.mark.parametrize('method', ['dhondt', 'sainte_lague'])
+def test_divisor_methods_match_sequential(method):
+    rng = random.Random(7)
+    for _ in range(3000):
+        parties = [f'p{i}' for i in range(rng.randint(1, 7))]
+        votes = {party: rng.randint(0, 60) for party in parties}
+        capacity = {party: rng.randint(0, 12) for party in parties} if rng.random() < 0.3 else None
+        seats = rng.randint(1, 40)
+        expected = sequential_divisors(votes, seats, method, capacity)
+        assert apportion(votes, seats, method, capacity) == expected, (votes, seats, capacity)
+
+
+@pytest.mark.parametrize('method', ['dhondt', 'sainte_lague'])
+def test_divisor_methods_adjust_by_at_most_party_count(method, monkeypatch):
+    pops = []
+    heappop = heapq.heappop
+
+    def counting_heappop(heap):
+        pops.append(1)
+        return heappop(heap)
+
+    monkeypatch.setattr(apportionment.heapq, 'heappop', counting_heappop)
+    rng = random.Random(42)
+    votes = {party: rng.randint(1, 100_000) for party in range(50)}
+
+    result = apportion(votes, 200_000, method)
+
+    assert sum(result.values()) == 200_000
+    # Стартовое распределение уже почти итоговое: куча только поправляет его
+    assert len(pops) <= len(votes)
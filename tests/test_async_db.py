@@ -0,0 +1,60 @@
+"""
+Асинхронная обёртка: записи только в потоке записи, глобальная БД открывается лениво
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+
+from database.models import Database, LazyDatabase
+
+from conftest import add_users
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_get_logs_flushes_buffer_on_writer(database, async_database, monkeypatch):
+    add_users(database, 1)
+    database.log_action(1, 'test_action', 'детали')
+
+    writer_threads = []
+    insert_action_logs = database.insert_action_logs
+
+    def record_thread(records):
+        writer_threads.append(threading.current_thread().name)
+        return insert_action_logs(records)
+
+    monkeypatch.setattr(database, 'insert_action_logs', record_thread)
+
+    logs = asyncio.run(async_database.get_logs(10))
+
+    assert [log['action'] for log in logs] == ['test_action']
+    assert writer_threads and all(name.startswith('db-writer') for name in writer_threads)
+
+
+def test_lazy_database_opens_on_first_use(tmp_path):
+    path = str(tmp_path / 'lazy.db')
+    lazy = LazyDatabase(lambda: Database(path))
+
+    assert not lazy.is_open
+    assert not os.path.exists(path)
+
+    assert lazy.get_user(1) is None
+    assert lazy.is_open
+    assert os.path.exists(path)
+    lazy.close()
+
+
+def test_import_does_not_open_database(tmp_path):
+    env = dict(os.environ, DATABASE_PATH=str(tmp_path / 'politics.db'))
+    code = (
+        'import threading, bot, election_results\n'
+        'from database import db\n'
+        'assert not db.is_open\n'
+        "assert 'action-log-writer' not in [t.name for t in threading.enumerate()]\n"
+    )
+
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True)
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,162 @@
+"""
+AuthChecker против локального HTTP-сервера вместо API
+"""
+import asyncio
+import json
+import re
+
+import pytest
+
+from utils import auth
+from utils.auth import AuthChecker, AuthServiceUnavailable
+
+
+class StubApi:
+    """Локальный HTTP-сервер вместо API: статус и задержка ответа задаются в тесте"""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.requests = []
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/auth'
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            # keep-alive: несколько запросов в одном соединении
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = int(re.search(rb'content-length: *(\d+)', head, re.I).group(1))
+                self.requests.append(json.loads(await reader.readexactly(length)))
+
+                await asyncio.sleep(self.delay)
+                body = json.dumps({'username': 'Steve'}).encode()
+                writer.write(
+                    b'HTTP/1.1 %d Stub\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n'
+                    % (self.status, len(body)) + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+def checker(monkeypatch):
+    monkeypatch.setattr(auth, 'AUTH_TIMEOUT_SECONDS', 0.3)
+    # Запросы к локальному серверу - напрямую, мимо прокси из окружения
+    for name in ('HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'http_proxy', 'https_proxy', 'all_proxy'):
+        monkeypatch.delenv(name, raising=False)
+    return AuthChecker()
+
+
+def run(checker, api, scenario):
+    """Выполнить сценарий с проверяющим, направленным на api"""
+    async def main():
+        async with api:
+            checker.api_url = api.url
+            try:
+                return await scenario()
+            finally:
+                await checker.close()
+    return asyncio.run(main())
+
+
+def test_found_player_is_cached(checker):
+    api = StubApi(status=200, delay=0.05)
+
+    async def scenario():
+        first = await checker.check_player(42)
+        second = await checker.check_player(42)
+        return first, second
+
+    first, second = run(checker, api, scenario)
+    assert first == second == (True, {'username': 'Steve'})
+    assert api.requests == [{'authType': 'TELEGRAM', 'value': '42'}]
+    assert checker.hits == 1
+
+
+def test_fresh_check_bypasses_cache(checker):
+    api = StubApi(status=200)
+
+    async def scenario():
+        await checker.check_player(42)
+        return await checker.check_player(42, fresh=True)
+
+    assert run(checker, api, scenario)[0] is True
+    assert len(api.requests) == 2
+
+
+def test_not_found_is_cached_as_negative(checker):
+    api = StubApi(status=404)
+
+    async def scenario():
+        return await checker.check_player(7), await checker.check_player(7)
+
+    assert run(checker, api, scenario) == ((False, None), (False, None))
+    assert len(api.requests) == 1
+    assert checker.breaker.failures == 0
+
+
+def test_server_error_is_unavailable_and_not_cached(checker):
+    api = StubApi(status=503)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(AuthServiceUnavailable):
+                await checker.check_player(7)
+
+    run(checker, api, scenario)
+    assert len(api.requests) == 2
+    assert checker.breaker.failures == 2
+
+
+def test_timeout_is_unavailable(checker):
+    api = StubApi(status=200, delay=1.0)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with pytest.raises(AuthServiceUnavailable):
+            await checker.check_player(7)
+        return loop.time() - start
+
+    elapsed = run(checker, api, scenario)
+    assert elapsed < 0.9
+    assert checker.breaker.failures == 1
+    assert checker.stats()['cached'] == 0
+
+
+def test_concurrent_checks_share_one_request(checker):
+    api = StubApi(status=200, delay=0.1)
+
+    async def scenario():
+        return await asyncio.gather(*(checker.check_player(42) for _ in range(10)))
+
+    results = run(checker, api, scenario)
+    assert all(result == (True, {'username': 'Steve'}) for result in results)
+    assert len(api.requests) == 1
+    assert checker.coalesced == 9
+
+
+def test_open_breaker_skips_requests(checker):
+    api = StubApi(status=500)
+
+    async def scenario():
+        for _ in range(checker.breaker.failure_threshold):
+            with pytest.raises(AuthServiceUnavailable):
+                await checker.check_player(7, fresh=True)
+        with pytest.raises(AuthServiceUnavailable):
+            await checker.check_player(7, fresh=True)
+
+    run(checker, api, scenario)
+    assert len(api.requests) == checker.breaker.failure_threshold
+    assert checker.breaker.is_open
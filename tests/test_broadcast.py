@@ -0,0 +1,40 @@
+"""
+Отправка с учётом RetryAfter
+"""
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from utils import broadcast
+from utils.broadcast import Broadcaster
+
+
+class FloodedBot:
+    """Бот, на каждое сообщение получающий RetryAfter"""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        self.calls = 0
+
+    async def send_message(self, **kwargs):
+        self.calls += 1
+        raise RetryAfter(self.retry_after)
+
+
+def test_no_sleep_after_last_retry(monkeypatch):
+    monkeypatch.setattr(broadcast, 'MAX_ATTEMPTS', 2)
+    bot = FloodedBot(retry_after=1)
+
+    async def scenario():
+        sender = Broadcaster(rate=1000, per_chat_interval=0)
+        start = time.monotonic()
+        error = await sender.try_send(bot, 42, 'Текст')
+        return error, time.monotonic() - start
+
+    error, elapsed = asyncio.run(scenario())
+
+    assert isinstance(error, RetryAfter)
+    assert bot.calls == 2
+    # Одна пауза между попытками, после последней - сразу ошибка
+    assert 1 <= elapsed < 1.5
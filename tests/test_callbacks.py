@@ -0,0 +1,132 @@
+"""
+Кнопки: каждая callback_data собирается маршрутом и доходит до обработчика
+"""
+import ast
+import re
+from pathlib import Path
+
+import pytest
+from telegram.ext import CallbackQueryHandler, ConversationHandler
+
+import keyboards
+from handlers import get_all_handlers, get_callback_router
+from utils.callbacks import ROUTES, MAIN_MENU, PARTY_EDIT_LIST, PARTY_LEAVE_CONFIRM, PARTY_MY
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MEMBERS = [
+    {'telegram_id': 1, 'minecraft_username': 'Leader', 'role': 'leader', 'list_position': 1},
+    {'telegram_id': 2, 'minecraft_username': 'Member', 'role': 'member', 'list_position': 2},
+]
+PARTIES = [{'id': i, 'name': f'Партия {i}', 'ideology': 'Центризм'} for i in range(1, 20)]
+VOTINGS = [
+    {'id': 1, 'voting_type': 'parliament', 'title': 'Голосование'},
+    {'id': 2, 'voting_type': 'public', 'title': 'Опрос'},
+]
+
+# Все варианты каждой клавиатуры из keyboards.__all__
+SAMPLES = {
+    'main_menu_keyboard': [(), (True,)],
+    'back_button': [(), (PARTY_MY.pack(),)],
+    'confirm_keyboard': [(PARTY_LEAVE_CONFIRM.pack(1), PARTY_MY.pack())],
+    'politics_menu_keyboard': [(has_party, is_deputy) for has_party in (False, True) for is_deputy in (False, True)],
+    'party_management_keyboard': [(1, False), (1, True, 3)],
+    'party_edit_keyboard': [(1,)],
+    'party_member_list_keyboard': [(1, MEMBERS), (1, MEMBERS, 2, True, True, True)],
+    'application_keyboard': [(1, 2)],
+    'ideology_keyboard': [()],
+    'members_page_buttons': [(PARTY_EDIT_LIST, 1, MEMBERS, 2, True, True)],
+    'voting_keyboard': [(1,)],
+    'election_parties_keyboard': [(1, PARTIES), (1, PARTIES, 1)],
+    'active_votings_keyboard': [(VOTINGS,)],
+    'confirm_vote_keyboard': [(1, 'for')],
+    'confirm_election_vote_keyboard': [(1, 2)],
+    'admin_panel_keyboard': [()],
+    'admin_voting_type_keyboard': [()],
+    'admin_parliament_keyboard': [(False,), (True,)],
+    'admin_stats_keyboard': [()],
+}
+
+
+def source_files():
+    yield from (ROOT / 'keyboards').glob('*.py')
+    yield from (ROOT / 'handlers').rglob('*.py')
+
+
+def callback_patterns():
+    """Регулярки CallbackQueryHandler из диалогов и отдельных обработчиков"""
+    patterns = []
+
+    def collect(handler):
+        if isinstance(handler, ConversationHandler):
+            nested = list(handler.entry_points) + list(handler.fallbacks)
+            for state_handlers in handler.states.values():
+                nested.extend(state_handlers)
+            for inner in nested:
+                collect(inner)
+        elif isinstance(handler, CallbackQueryHandler) and handler.pattern is not None:
+            patterns.append(re.compile(handler.pattern) if isinstance(handler.pattern, str) else handler.pattern)
+
+    for handler in get_all_handlers():
+        collect(handler)
+    return patterns
+
+
+@pytest.fixture(scope='module')
+def resolve():
+    router = get_callback_router()
+    patterns = callback_patterns()
+
+    def resolve(data):
+        match = router._trie.longest_prefix(data)
+        if match:
+            route, _ = match[1]
+            try:
+                route.unpack(data)
+                return True
+            except ValueError:
+                pass
+        return any(pattern.match(data) for pattern in patterns)
+
+    return resolve
+
+
+def keyboard_data(keyboard):
+    rows = keyboard.inline_keyboard if hasattr(keyboard, 'inline_keyboard') else [keyboard]
+    return [button.callback_data for row in rows for button in row if button.callback_data]
+
+
+@pytest.mark.parametrize('path', sorted(source_files()), ids=lambda path: str(path.relative_to(ROOT)))
+def test_no_raw_callback_data(path):
+    tree = ast.parse(path.read_text(encoding='utf-8'))
+    raw = [
+        node.lineno for node in ast.walk(tree)
+        if isinstance(node, ast.keyword) and node.arg == 'callback_data'
+        and isinstance(node.value, (ast.Constant, ast.JoinedStr, ast.BinOp))
+    ]
+    assert raw == [], f"callback_data строкой, а не через CallbackRoute.pack(): строки {raw}"
+
+
+def test_samples_cover_every_keyboard():
+    assert set(SAMPLES) == set(keyboards.__all__)
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_keyboard_buttons_reach_handler(name, resolve):
+    build = getattr(keyboards, name)
+    for args in SAMPLES[name]:
+        for data in keyboard_data(build(*args)):
+            assert resolve(data), f"{name}{args}: кнопка {data!r} не доходит до обработчика"
+
+
+def test_every_route_is_handled(resolve):
+    unhandled = [route for route in ROUTES.values() if not resolve(route.prefix) and not any(
+        resolve(route.prefix + ':1' * count) for count in range(1, len(route.fields) + 1)
+    )]
+    assert unhandled == []
+
+
+def test_legacy_buttons_still_reach_handler(resolve):
+    assert resolve('party_transfer_12')
+    assert resolve('admin_parliament_dissolve')
+    assert resolve(MAIN_MENU.legacy)
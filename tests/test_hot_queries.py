@@ -0,0 +1,168 @@
+"""
+Горячие запросы: совпадают с тем, что выполняет Database, и идут по индексам
+"""
+import re
+from datetime import datetime
+
+import pytest
+
+# Запросы, которые не должны деградировать до полного сканирования таблицы.
+# Текст совпадает с запросами Database - это проверяет test_hot_query_matches_database
+HOT_QUERIES = {
+    'get_user_party': (
+        'SELECT pm.party_id FROM party_members pm JOIN parties p ON p.id = pm.party_id '
+        'WHERE pm.telegram_id = ?', (1,)
+    ),
+    'get_party_members': (
+        'SELECT pm.*, u.minecraft_username FROM party_members pm '
+        'JOIN users u ON pm.telegram_id = u.telegram_id '
+        'WHERE pm.party_id = ? ORDER BY pm.list_position ASC', (1,)
+    ),
+    'get_party_members_page': (
+        'SELECT pm.*, u.minecraft_username FROM party_members pm '
+        'JOIN users u ON pm.telegram_id = u.telegram_id '
+        'WHERE pm.party_id = ? AND pm.list_position > ? ORDER BY pm.list_position ASC LIMIT ?', (1, 10, 10)
+    ),
+    'get_party_members_page_before': (
+        'SELECT pm.*, u.minecraft_username FROM party_members pm '
+        'JOIN users u ON pm.telegram_id = u.telegram_id '
+        'WHERE pm.party_id = ? AND pm.list_position < ? ORDER BY pm.list_position DESC LIMIT ?', (1, 20, 10)
+    ),
+    'get_party_applications': (
+        'SELECT pa.*, u.minecraft_username FROM party_applications pa '
+        'JOIN users u ON pa.telegram_id = u.telegram_id '
+        "WHERE pa.party_id = ? AND pa.status = ? ORDER BY pa.applied_at ASC", (1, 'pending')
+    ),
+    'get_logs': (
+        'SELECT al.*, u.minecraft_username FROM action_logs al '
+        'LEFT JOIN users u ON al.telegram_id = u.telegram_id '
+        'ORDER BY al.created_at DESC LIMIT ?', (100,)
+    ),
+    'get_users_for_auth_recheck': (
+        'SELECT * FROM users WHERE is_active = 1 AND next_auth_check <= ? '
+        'ORDER BY next_auth_check LIMIT ?', ('2030-01-01', 500)
+    ),
+    'find_user_by_username': (
+        'SELECT * FROM users WHERE minecraft_username = ? COLLATE NOCASE', ('Steve',)
+    ),
+    'get_active_votings': (
+        "SELECT * FROM votings WHERE status = 'active' ORDER BY start_date DESC", ()
+    ),
+    'get_all_parties_registered': (
+        'SELECT * FROM parties WHERE is_registered = 1 ORDER BY members_count DESC', ()
+    ),
+    'get_registered_parties_with_leaders': (
+        'SELECT p.*, u.minecraft_username AS leader_username FROM parties p '
+        'LEFT JOIN users u ON u.telegram_id = p.leader_telegram_id '
+        'WHERE p.is_registered = 1 ORDER BY p.members_count DESC', ()
+    ),
+    'get_election_results': (
+        'SELECT p.id, p.name, COALESCE(t.votes, 0) as votes FROM parties p '
+        'LEFT JOIN election_tally t ON t.party_id = p.id AND t.election_id = ? '
+        'WHERE p.is_registered = 1 ORDER BY votes DESC', (1,)
+    ),
+    'claim_notifications_due': (
+        "SELECT 1 FROM notification_outbox WHERE status = 'pending' AND next_attempt_at <= ? LIMIT 1",
+        ('2030-01-01',)
+    ),
+    'claim_notifications': (
+        'SELECT o.*, u.undeliverable_at IS NOT NULL AS undeliverable FROM notification_outbox o '
+        'LEFT JOIN users u ON u.telegram_id = o.chat_id '
+        "WHERE o.status = 'pending' AND o.next_attempt_at <= ? ORDER BY o.next_attempt_at LIMIT ?",
+        ('2030-01-01', 50)
+    ),
+    'get_party_member_recipients': (
+        'SELECT pm.telegram_id FROM party_members pm '
+        'JOIN users u ON pm.telegram_id = u.telegram_id '
+        'WHERE pm.party_id = ? AND u.undeliverable_at IS NULL', (1,)
+    ),
+    'get_pending_party_deadlines': (
+        'SELECT id, registration_deadline FROM parties WHERE is_registered = 0 '
+        'ORDER BY registration_deadline', ()
+    ),
+    'get_pending_voting_deadlines': (
+        "SELECT id, end_date FROM votings WHERE status = 'active' ORDER BY end_date", ()
+    ),
+    'get_active_election': (
+        "SELECT * FROM elections WHERE status = 'active' ORDER BY start_date DESC LIMIT 1", ()
+    ),
+}
+
+# Каким вызовом Database выполняется каждый горячий запрос
+HOT_CALLS = {
+    'get_user_party': ('get_user_party', (1,), {}),
+    'get_party_members': ('get_party_members', (1,), {}),
+    'get_party_members_page': ('get_party_members_page', (1,), {'after': 10}),
+    'get_party_members_page_before': ('get_party_members_page', (1,), {'before': 20}),
+    'get_party_applications': ('get_party_applications', (1,), {}),
+    'get_logs': ('get_logs', (), {}),
+    'get_users_for_auth_recheck': ('get_users_for_auth_recheck', (datetime(2030, 1, 1),), {}),
+    'find_user_by_username': ('find_user_by_username', ('Steve',), {}),
+    'get_active_votings': ('get_active_votings', (), {}),
+    'get_all_parties_registered': ('get_all_parties', (), {'registered_only': True}),
+    'get_registered_parties_with_leaders': ('get_registered_parties_with_leaders', (), {}),
+    'get_election_results': ('get_election_results', (1,), {}),
+    'claim_notifications_due': ('claim_notifications', (50,), {}),
+    'claim_notifications': ('claim_notifications', (50,), {}),
+    'get_party_member_recipients': ('get_party_member_recipients', (1,), {}),
+    'get_pending_party_deadlines': ('get_pending_party_deadlines', (), {}),
+    'get_pending_voting_deadlines': ('get_pending_voting_deadlines', (), {}),
+    'get_active_election': ('get_active_election', (), {}),
+}
+
+# Данные, без которых метод не доходит до горячего запроса
+SETUP = {
+    'claim_notifications': lambda database: database.enqueue_notifications([(1, 'Текст', 'HTML', None, None)]),
+}
+
+# Обход индекса в порядке ORDER BY ... LIMIT читает только первые LIMIT строк
+ORDERED_INDEX_SCANS = {'get_logs'}
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def shape(sql: str) -> str:
+    """Запрос без значений параметров и лишних пробелов"""
+    return ' '.join(_LITERAL.sub('?', sql).split()).lower()
+
+
+def executed_queries(database, name):
+    """SQL (с подставленными параметрами), выполненный вызовом горячего метода"""
+    method, args, kwargs = HOT_CALLS[name]
+    if name in SETUP:
+        SETUP[name](database)
+
+    statements = []
+    connections = (database.db, database.reader)
+    for conn in connections:
+        conn.set_trace_callback(statements.append)
+    try:
+        getattr(database, method)(*args, **kwargs)
+    finally:
+        for conn in connections:
+            conn.set_trace_callback(None)
+
+    hot = shape(HOT_QUERIES[name][0])
+    return [sql for sql in statements if hot in shape(sql)]
+
+
+def test_every_hot_query_has_a_call():
+    assert set(HOT_CALLS) == set(HOT_QUERIES)
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_matches_database(database, name):
+    assert executed_queries(database, name), f"{name}: запрос в HOT_QUERIES не совпадает с Database"
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_has_no_scan(database, name):
+    for sql in executed_queries(database, name):
+        plan = [row[3] for row in database.db.execute(f'EXPLAIN QUERY PLAN {sql}')]
+        # SCAN (subquery-N) - проход по уже отобранным LIMIT строкам, не по таблице
+        scans = [step for step in plan if step.startswith('SCAN ') and not step.startswith('SCAN (')]
+
+        if name in ORDERED_INDEX_SCANS:
+            assert all(' USING ' in step and 'INDEX' in step for step in scans), plan
+        else:
+            assert not scans, plan
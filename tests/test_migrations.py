@@ -0,0 +1,41 @@
+"""
+Миграции схемы: каждая версия что-то меняет в схеме
+"""
+from database import migrations, models
+from database.models import Database
+
+
+def schema(conn):
+    rows = conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")
+    return set(rows)
+
+
+def test_every_version_changes_schema(tmp_path, monkeypatch):
+    # Исходная схема init_db без миграций
+    monkeypatch.setattr(models, 'apply_migrations', lambda conn: None)
+    database = Database(str(tmp_path / 'base.db'))
+    conn = database.db
+
+    all_migrations = migrations.MIGRATIONS
+    versions = [version for version, _, _ in all_migrations]
+    assert versions == sorted(set(versions))
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [])
+    migrations.apply_migrations(conn)
+    before = schema(conn)
+
+    for i, (version, description, _) in enumerate(all_migrations):
+        monkeypatch.setattr(migrations, 'MIGRATIONS', all_migrations[:i + 1])
+        assert migrations.apply_migrations(conn) == version
+        after = schema(conn)
+        assert after != before, f"Миграция {version} ({description}) не меняет схему"
+        before = after
+
+    database.close()
+
+
+def test_fresh_schema_has_no_leftovers(database):
+    names = {name for _, name, _ in schema(database.db)}
+
+    assert 'job_state' not in names
+    assert not {name for name in names if name.startswith('idx_users_auth_recheck')}
@@ -0,0 +1,79 @@
+"""
+Очередь уведомлений: разбор пачки и возврат записей в очередь
+"""
+import asyncio
+import importlib
+
+import pytest
+from telegram.error import Forbidden
+
+from utils.outbox import OutboxDispatcher, outbox_item
+
+# utils.outbox в пакете utils перекрыт одноимённым экземпляром диспетчера
+outbox_module = importlib.import_module('utils.outbox')
+
+from conftest import add_users
+
+
+class FakeBroadcaster:
+    """Вместо отправки - заданный исход для каждого чата"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.sent = []
+
+    async def try_send(self, bot, chat_id, text, parse_mode='HTML', reply_markup=None):
+        outcome = self.outcomes.get(chat_id)
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Forbidden):
+            raise outcome
+        if outcome is None:
+            self.sent.append(chat_id)
+        return outcome
+
+
+@pytest.fixture
+def dispatcher(async_database, monkeypatch):
+    monkeypatch.setattr(outbox_module, 'async_db', async_database)
+    return OutboxDispatcher(batch_size=10)
+
+
+def statuses(database):
+    rows = database.db.execute('SELECT chat_id, status FROM notification_outbox ORDER BY chat_id')
+    return {chat_id: status for chat_id, status in rows}
+
+
+def test_unexpected_error_releases_row(database, dispatcher, monkeypatch):
+    add_users(database, 1, 2, 3)
+    database.enqueue_notifications([outbox_item(chat_id, 'Текст') for chat_id in (1, 2, 3)])
+    fake = FakeBroadcaster({2: RuntimeError('сбой'), 3: Forbidden('bot was blocked by the user')})
+    monkeypatch.setattr(outbox_module, 'broadcaster', fake)
+
+    processed = asyncio.run(dispatcher.dispatch_batch())
+
+    assert processed == 3
+    assert fake.sent == [1]
+    assert statuses(database) == {1: 'sent', 2: 'pending', 3: 'failed'}
+    assert database.get_undeliverable_ids([3]) == {3}
+
+
+def test_claim_skips_undeliverable(database):
+    add_users(database, 1, 2)
+    database.mark_undeliverable([(2, 'forbidden')])
+    database.enqueue_notifications([outbox_item(chat_id, 'Текст') for chat_id in (1, 2)])
+
+    rows = database.claim_notifications(10)
+
+    assert [row['chat_id'] for row in rows] == [1]
+    assert 'undeliverable' not in rows[0]
+    assert statuses(database) == {1: 'sending', 2: 'failed'}
+
+
+def test_empty_queue_opens_no_write_transaction(database):
+    statements = []
+    database.db.set_trace_callback(statements.append)
+    try:
+        assert database.claim_notifications(10) == []
+    finally:
+        database.db.set_trace_callback(None)
+
+    assert statements == []
@@ -0,0 +1,138 @@
+"""
+Обработчики кнопок партии: один ответ на нажатие, позиции по числу членов
+"""
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from handlers.party import applications, members
+
+from conftest import add_users, create_party
+
+# utils.context в пакете utils перекрыт функцией request_context - берём сам модуль
+context_module = importlib.import_module('utils.context')
+
+
+class FakeQuery:
+    """Нажатие кнопки: запоминает ответы и правки сообщения"""
+
+    def __init__(self):
+        self.answers = []
+        self.edits = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append((text, show_alert))
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edits.append(text)
+
+
+@pytest.fixture
+def handlers_db(async_database, monkeypatch):
+    """Обработчики партии поверх тестовой БД, без отправки уведомлений"""
+    for module in (applications, members, context_module):
+        monkeypatch.setattr(module, 'async_db', async_database)
+
+    async def no_notification(*args, **kwargs):
+        pass
+    monkeypatch.setattr(applications, 'send_notification', no_notification)
+    return async_database
+
+
+@pytest.fixture
+def press(handlers_db):
+    """press(handler, user_id, *args) - нажатие кнопки, возвращает FakeQuery"""
+    update_ids = iter(range(1, 1000))
+
+    def press(handler, user_id, *args):
+        query = FakeQuery()
+        update = SimpleNamespace(
+            update_id=next(update_ids),
+            effective_user=SimpleNamespace(id=user_id, first_name='Leader'),
+            callback_query=query,
+        )
+        asyncio.run(handler(update, SimpleNamespace(bot=None), *args))
+        return query
+    return press
+
+
+def pending_application(database, telegram_id, party_id):
+    database.apply_to_party(telegram_id, party_id)
+    (app,) = database.get_party_applications(party_id)
+    return app['id']
+
+
+def test_double_tap_on_approve_answers_once_each(database, press):
+    party_id = create_party(database, 1)
+    add_users(database, 2)
+    app_id = pending_application(database, 2, party_id)
+
+    first = press(applications.approve_application, 1, app_id)
+    second = press(applications.approve_application, 1, app_id)
+    reject = press(applications.reject_application, 1, app_id)
+
+    assert first.answers == [('✅ Player2 принят в партию!', True)]
+    assert second.answers == [('ℹ️ Заявка уже рассмотрена', True)]
+    assert reject.answers == [('ℹ️ Заявка уже рассмотрена', True)]
+    assert database.get_application_by_id(app_id)['status'] == 'approved'
+    # Список заявок обновлён без повторного ответа
+    assert all(query.edits for query in (first, second, reject))
+
+
+def test_applicant_in_other_party_gets_single_alert(database, press):
+    party_id = create_party(database, 1, name='Первая')
+    create_party(database, 3, 2, name='Вторая')
+    app_id = pending_application(database, 2, party_id)
+
+    query = press(applications.approve_application, 1, app_id)
+
+    assert query.answers == [('❌ Player2 уже вступил в другую партию', True)]
+    assert database.get_application_by_id(app_id)['status'] == 'rejected'
+
+
+def test_view_applications_answers_once(database, press):
+    party_id = create_party(database, 1)
+
+    query = press(applications.view_applications, 1, party_id)
+
+    assert query.answers == [(None, False)]
+    assert query.edits
+
+
+class FakeMessage:
+    def __init__(self, text):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def send_position(party_id, member_id, text):
+    """Ввод новой позиции в диалоге изменения позиции"""
+    message = FakeMessage(text)
+    update = SimpleNamespace(update_id=1, effective_user=SimpleNamespace(id=1), message=message)
+    context = SimpleNamespace(
+        bot=None, user_data={'set_position_party_id': party_id, 'set_position_member_id': member_id}
+    )
+    state = asyncio.run(members.member_set_position_received(update, context))
+    return state, message.replies
+
+
+def test_set_position_bounded_by_members_count(database, handlers_db, monkeypatch):
+    party_id = create_party(database, 1, 2, 3, 4)
+
+    # Весь список для проверки границы не читается
+    def whole_list(*args):
+        raise AssertionError('get_party_members не нужен')
+    monkeypatch.setattr(handlers_db, 'get_party_members', whole_list, raising=False)
+
+    state, replies = send_position(party_id, 2, '5')
+    assert state == members.SET_POSITION
+    assert replies == ['❌ Позиция должна быть от 2 до 4!\nПопробуй ещё раз:']
+
+    state, replies = send_position(party_id, 2, '4')
+    assert state == members.ConversationHandler.END
+    assert [m['telegram_id'] for m in database.get_party_members(party_id)] == [1, 3, 4, 2]
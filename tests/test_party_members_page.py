@@ -0,0 +1,131 @@
+"""
+Постраничный список членов партии: позиции и курсоры страниц
+"""
+import asyncio
+
+import pytest
+
+from database.cache import LRUCache
+from database.migrations import _compact_list_positions
+from utils import party_render
+
+from conftest import add_users, create_party
+
+
+@pytest.fixture
+def pages(async_database, monkeypatch):
+    """load_members_page поверх тестовой БД, по 3 члена на страницу"""
+    monkeypatch.setattr(party_render, 'async_db', async_database)
+    monkeypatch.setattr(party_render, 'PARTY_MEMBERS_PAGE_SIZE', 3)
+
+
+def walk_forward(party_id):
+    async def walk():
+        seen, after, has_next = [], 0, True
+        while has_next:
+            members, _, has_next = await party_render.load_members_page(party_id, after=after)
+            seen.extend(members)
+            after = members[-1]['list_position']
+        return seen
+    return asyncio.run(walk())
+
+
+def walk_backward(party_id, last_position):
+    async def walk():
+        seen, before, has_prev = [], last_position + 1, True
+        while has_prev:
+            members, has_prev, _ = await party_render.load_members_page(party_id, before=before)
+            seen[:0] = members
+            before = members[0]['list_position']
+        return seen
+    return asyncio.run(walk())
+
+
+def test_positions_stay_unique_after_remove_and_join(database):
+    party_id = create_party(database, 1, 2, 3, 4, 5)
+
+    database.remove_member(3, party_id)
+    add_users(database, 6)
+    database.add_party_member(6, party_id)
+
+    positions = [m['list_position'] for m in database.get_party_members(party_id)]
+    assert positions == [1, 2, 3, 4, 5]
+    assert database.get_member_info(6, party_id)['list_position'] == 5
+
+
+def test_remove_missing_member_keeps_count(database):
+    party_id = create_party(database, 1, 2)
+
+    assert database.remove_member(99, party_id) is False
+    assert database.get_party_by_id(party_id)['members_count'] == 2
+
+
+def test_every_page_after_remove_and_join(database, pages):
+    party_id = create_party(database, 1, *range(2, 12))
+
+    # Выбывают члены на границах страниц и внутри них, потом вступают новые
+    for telegram_id in (3, 7, 4):
+        database.remove_member(telegram_id, party_id)
+    add_users(database, 20, 21)
+    database.add_party_member(20, party_id)
+    database.add_party_member(21, party_id)
+
+    expected = [m['telegram_id'] for m in database.get_party_members(party_id)]
+    assert len(expected) == len(set(expected)) == 10
+
+    forward = walk_forward(party_id)
+    assert [m['telegram_id'] for m in forward] == expected
+
+    backward = walk_backward(party_id, forward[-1]['list_position'])
+    assert [m['telegram_id'] for m in backward] == expected
+
+
+def test_pages_reload_after_membership_change(database, pages):
+    party_id = create_party(database, 1, *range(2, 8))
+    first = walk_forward(party_id)
+
+    database.remove_member(2, party_id)
+
+    after = walk_forward(party_id)
+    assert len(after) == len(first) - 1
+    assert 2 not in [m['telegram_id'] for m in after]
+
+
+def test_migration_compacts_duplicate_positions(database):
+    party_id = create_party(database, 1, 2, 3, 4)
+
+    # Список до исправления: пропуск после выбывшего и повтор у вступившего
+    database.db.execute('UPDATE party_members SET list_position = 4 WHERE telegram_id = 3')
+    database.db.execute('UPDATE party_members SET list_position = 4 WHERE telegram_id = 4')
+    _compact_list_positions(database.db)
+    database.db.commit()
+    database.member_page_cache.clear()
+
+    members = database.get_party_members(party_id)
+    assert [m['list_position'] for m in members] == [1, 2, 3, 4]
+    assert [m['telegram_id'] for m in members] == [1, 2, 3, 4]
+
+
+def test_party_cards_are_bounded(database, pages, monkeypatch):
+    monkeypatch.setattr(party_render, '_party_cards', LRUCache(2))
+    party_ids = [create_party(database, leader_id, name=f'Партия {leader_id}') for leader_id in (1, 2, 3)]
+
+    async def render():
+        return [await party_render.render_party_card(party_id) for party_id in party_ids]
+
+    cards = asyncio.run(render())
+
+    assert all(cards)
+    assert len(party_render._party_cards) == 2
+    assert party_render._party_cards.get(('card', party_ids[0])) is None
+
+
+def test_move_member_stays_within_list(database):
+    party_id = create_party(database, 1, 2, 3)
+
+    assert database.move_member(party_id, 2, 4) is False
+    assert database.move_member(party_id, 2, 0) is False
+    assert database.move_member(party_id, 2, 3) is True
+
+    positions = [(m['telegram_id'], m['list_position']) for m in database.get_party_members(party_id)]
+    assert positions == [(1, 1), (3, 2), (2, 3)]
@@ -0,0 +1,151 @@
+"""
+Вступление в партию: одна партия на пользователя, повторное одобрение ничего не меняет
+"""
+import asyncio
+
+import pytest
+
+import tasks
+from database.migrations import apply_migrations
+
+from conftest import add_users, create_party
+
+
+def application_id(database, telegram_id, party_id):
+    apply = database.apply_to_party(telegram_id, party_id)
+    assert apply
+    (app,) = [app for app in database.get_party_applications(party_id) if app['telegram_id'] == telegram_id]
+    return app['id']
+
+
+def test_second_approve_is_noop(database):
+    party_id = create_party(database, 1)
+    add_users(database, 2)
+    app_id = application_id(database, 2, party_id)
+
+    assert database.approve_application(app_id) == 'approved'
+    assert database.approve_application(app_id) is None
+    assert database.reject_application(app_id) is False
+
+    assert database.get_application_by_id(app_id)['status'] == 'approved'
+    assert database.get_party_by_id(party_id)['members_count'] == 2
+    assert [m['telegram_id'] for m in database.get_party_members(party_id)] == [1, 2]
+
+
+def test_approve_in_second_party_is_rejected(database):
+    first = create_party(database, 1, name='Первая')
+    second = create_party(database, 2, name='Вторая')
+    add_users(database, 3)
+    first_app = application_id(database, 3, first)
+    second_app = application_id(database, 3, second)
+
+    assert database.approve_application(first_app) == 'approved'
+    assert database.approve_application(second_app) == 'rejected'
+
+    assert database.get_user_party(3)['id'] == first
+    assert database.get_party_by_id(second)['members_count'] == 1
+    assert database.get_application_by_id(second_app)['status'] == 'rejected'
+
+
+def test_add_member_of_other_party(database):
+    first = create_party(database, 1, 3, name='Первая')
+    second = create_party(database, 2, name='Вторая')
+
+    assert database.add_party_member(3, second) is None
+    assert database.get_party_by_id(second)['members_count'] == 1
+    assert database.get_user_party(3)['id'] == first
+
+
+def test_former_member_of_dissolved_party_can_join_another(database, async_database, monkeypatch):
+    monkeypatch.setattr(tasks, 'async_db', async_database)
+    add_users(database, 1, 3, 4)
+    dissolved, _ = database.create_party('Распущенная', 'Центризм', 'Описание', 1, -1)
+    database.add_party_member(3, dissolved)
+    pending_app = application_id(database, 4, dissolved)
+
+    asyncio.run(tasks.expire_party_deadline(dissolved))
+
+    assert database.get_party_by_id(dissolved) is None
+    assert database.get_application_by_id(pending_app) is None
+    assert database.db.execute('SELECT COUNT(*) FROM party_members WHERE party_id = ?', (dissolved,)).fetchone()[0] == 0
+
+    party_id = create_party(database, 2, name='Новая')
+    assert database.approve_application(application_id(database, 3, party_id)) == 'approved'
+    assert database.add_party_member(1, party_id) == 3
+    assert database.get_user_party(3)['id'] == party_id
+
+
+def before_version_9(database):
+    """Вернуть схему к версии 8: без уникального индекса членства"""
+    conn = database.db
+    conn.execute('DROP INDEX idx_party_members_user')
+    conn.execute('DELETE FROM schema_version WHERE version = 9')
+    conn.commit()
+    return conn
+
+
+def memberships(conn):
+    rows = conn.execute(
+        'SELECT party_id, telegram_id, list_position FROM party_members ORDER BY party_id, list_position'
+    )
+    return [tuple(row) for row in rows]
+
+
+def test_migration_keeps_one_party_per_user(database, caplog):
+    first = create_party(database, 1, 3, 4, name='Первая')
+    second = create_party(database, 2, 5, name='Вторая')
+
+    # Состояние до версии 9: пользователь 3 успел вступить в обе партии
+    conn = before_version_9(database)
+    conn.execute('''
+        INSERT INTO party_members (telegram_id, party_id, list_position, joined_at)
+        VALUES (3, ?, 3, datetime('now', '+1 minute'))
+    ''', (second,))
+    conn.execute('UPDATE parties SET members_count = 3 WHERE id = ?', (second,))
+    # ...а пользователь 4 - ещё и в партии, которую delete_party удалил без её членов
+    conn.execute("INSERT INTO party_members (telegram_id, party_id, list_position) VALUES (4, 999, 1)")
+    conn.execute("INSERT INTO party_applications (telegram_id, party_id) VALUES (5, 999)")
+    conn.commit()
+
+    assert apply_migrations(conn) >= 9
+
+    assert "Удалено повторных членств в партиях: 1" in caplog.text
+    assert memberships(conn) == [
+        (first, 1, 1), (first, 3, 2), (first, 4, 3),
+        (second, 2, 1), (second, 5, 2),
+    ]
+    counts = dict(conn.execute('SELECT id, members_count FROM parties').fetchall())
+    assert counts == {first: 3, second: 2}
+    assert conn.execute('SELECT COUNT(*) FROM party_applications WHERE party_id = 999').fetchone()[0] == 0
+
+
+def test_migration_keeps_leader_in_own_party(database):
+    first = create_party(database, 1, 2, name='Первая')
+    conn = before_version_9(database)
+
+    # Пользователь 2 раньше вступил в первую партию, а потом основал вторую
+    second, _ = database.create_party('Вторая', 'Центризм', 'Описание', 2, 60)
+    conn.execute(
+        "UPDATE party_members SET joined_at = datetime('now', '+1 minute') WHERE party_id = ?", (second,)
+    )
+    conn.commit()
+
+    assert apply_migrations(conn) >= 9
+
+    assert memberships(conn) == [(first, 1, 1), (second, 2, 1)]
+    assert database.get_party_by_id(second)['leader_telegram_id'] == 2
+    counts = dict(conn.execute('SELECT id, members_count FROM parties').fetchall())
+    assert counts == {first: 1, second: 1}
+
+
+def test_migration_stops_on_leader_of_two_parties(database):
+    first = create_party(database, 1, name='Первая')
+    conn = before_version_9(database)
+    second, _ = database.create_party('Вторая', 'Центризм', 'Описание', 1, 60)
+
+    with pytest.raises(RuntimeError, match='несколько партий'):
+        apply_migrations(conn)
+
+    # Миграция откатилась целиком - ни одного членства не потеряно
+    assert memberships(conn) == [(first, 1, 1), (second, 1, 1)]
+    assert conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] == 8
@@ -0,0 +1,25 @@
+"""
+Отметка недоставляемых пользователей
+"""
+from database import models
+
+from conftest import add_users
+
+
+def test_undeliverable_ids_in_chunks(database, monkeypatch):
+    monkeypatch.setattr(models, 'SQL_IN_CHUNK_SIZE', 2)
+    add_users(database, *range(1, 8))
+    database.mark_undeliverable([(2, 'blocked'), (5, 'blocked'), (7, 'deactivated')])
+
+    assert database.get_undeliverable_ids([1, 2, 3, 5, 5, 6, 7, 100]) == {2, 5, 7}
+    assert database.get_undeliverable_ids([]) == set()
+
+
+def test_clear_undeliverable(database):
+    add_users(database, 1, 2)
+    database.mark_undeliverable([(1, 'blocked'), (2, 'blocked')])
+
+    database.clear_undeliverable(1)
+
+    assert database.get_undeliverable_ids([1, 2]) == {2}
+    assert database.get_user(1)['undeliverable_at'] is None
@@ -0,0 +1,129 @@
+"""
+Webhook: сервер принимает апдейты только с верным секретом
+"""
+import asyncio
+import json
+import socket
+
+import httpx
+import pytest
+from telegram import Bot, Update
+from telegram.ext import Application, TypeHandler
+from telegram.request import BaseRequest
+
+import bot as bot_module
+from utils import PerUserUpdateProcessor
+
+SECRET = 'test-secret_1'
+
+UPDATE = {
+    'update_id': 1001,
+    'message': {
+        'message_id': 1,
+        'date': 1700000000,
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Steve'},
+        'text': '/start',
+    },
+}
+
+
+class OfflineRequest(BaseRequest):
+    """Bot API без сети: getMe возвращает тестового бота, остальные методы - True"""
+
+    def __init__(self):
+        self.calls = []
+
+    @property
+    def read_timeout(self):
+        return 1
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        name = url.rsplit('/', 1)[-1]
+        self.calls.append((name, request_data.parameters if request_data else {}))
+
+        result = True
+        if name == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Bot', 'username': 'test_bot'}
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setattr(bot_module, 'WEBHOOK_URL', 'https://bot.example.com')
+    monkeypatch.setattr(bot_module, 'WEBHOOK_SECRET_TOKEN', SECRET)
+    settings = bot_module.webhook_settings()
+    settings.update(listen='127.0.0.1', port=free_port())
+    return settings
+
+
+def test_webhook_requires_secret_token(settings):
+    request = OfflineRequest()
+    received = []
+
+    async def scenario():
+        application = (
+            Application.builder()
+            .bot(Bot('123:TEST', request=request))
+            .concurrent_updates(PerUserUpdateProcessor(4))
+            .build()
+        )
+        processed = asyncio.Event()
+
+        async def record(update, context):
+            received.append(update.update_id)
+            processed.set()
+
+        application.add_handler(TypeHandler(Update, record))
+
+        await application.initialize()
+        await application.updater.start_webhook(**settings)
+        await application.start()
+
+        url = f"http://127.0.0.1:{settings['port']}/{settings['url_path']}"
+        statuses = {}
+        try:
+            async with httpx.AsyncClient(trust_env=False) as client:
+                for label, headers in (
+                    ('missing', {}),
+                    ('wrong', {'X-Telegram-Bot-Api-Secret-Token': 'not-the-secret'}),
+                    ('right', {'X-Telegram-Bot-Api-Secret-Token': SECRET}),
+                ):
+                    response = await client.post(url, json=UPDATE, headers=headers)
+                    statuses[label] = response.status_code
+                    if label != 'right':
+                        # Отклонённый апдейт не должен дойти до обработчиков
+                        await asyncio.sleep(0.1)
+                        assert not received
+
+            await asyncio.wait_for(processed.wait(), 5)
+        finally:
+            await application.updater.stop()
+            await application.stop()
+            await application.shutdown()
+        return statuses
+
+    statuses = asyncio.run(scenario())
+
+    assert statuses == {'missing': 403, 'wrong': 403, 'right': 200}
+    assert received == [UPDATE['update_id']]
+
+    # Секрет, лимит соединений и типы апдейтов переданы в setWebhook
+    webhook = dict(request.calls)['setWebhook']
+    assert webhook['url'] == 'https://bot.example.com/' + settings['url_path']
+    assert webhook['secret_token'] == SECRET
+    assert webhook['max_connections'] == settings['max_connections']
+    assert webhook['allowed_updates'] == bot_module.ALLOWED_UPDATES
@@ -1,16 +1,45 @@
-from .auth import auth_checker
-from .decorators import require_auth, require_admin, require_party_leader, require_deputy
+from .auth import auth_checker, AuthServiceUnavailable, CircuitBreaker
+from .context import RequestContext, request_context
+from .decorators import require_auth, require_admin, require_party_leader, require_deputy, reply_auth_unavailable
+from .broadcast import broadcaster, Broadcaster, BroadcastJob
 from .notifications import send_notification, notify_party_members, notify_admins
+from .outbox import outbox, outbox_item, enqueue_notification, enqueue_broadcast
+from .party_render import render_party_list, render_party_card, render_party_members, load_members_page
+from .callbacks import CallbackRoute
+from .router import CallbackRouter, DeepLinkRouter
+from .concurrency import KeyedLock, PerUserUpdateProcessor, party_locks
 from .logger import setup_logger
 
 __all__ = [
     'auth_checker',
+    'AuthServiceUnavailable',
+    'CircuitBreaker',
+    'RequestContext',
+    'request_context',
     'require_auth',
     'require_admin',
     'require_party_leader',
     'require_deputy',
+    'reply_auth_unavailable',
+    'broadcaster',
+    'Broadcaster',
+    'BroadcastJob',
     'send_notification',
     'notify_party_members',
     'notify_admins',
+    'outbox',
+    'outbox_item',
+    'enqueue_notification',
+    'enqueue_broadcast',
+    'render_party_list',
+    'render_party_card',
+    'render_party_members',
+    'load_members_page',
+    'CallbackRoute',
+    'CallbackRouter',
+    'DeepLinkRouter',
+    'KeyedLock',
+    'PerUserUpdateProcessor',
+    'party_locks',
     'setup_logger'
 ]
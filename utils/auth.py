@@ -1,82 +1,280 @@
 """
 Проверка авторизации через API сервера
 """
-import requests
+import asyncio
+import time
+from collections import OrderedDict
 from typing import Optional, Dict, Tuple
 import logging
 
-from config import API_URL, API_TOKEN, DEBUG
+import httpx
+
+from config import (
+    API_URL, API_TOKEN, DEBUG,
+    AUTH_TIMEOUT_SECONDS, AUTH_MAX_CONNECTIONS, AUTH_MAX_CONCURRENCY,
+    AUTH_CACHE_TTL_SECONDS, AUTH_NEGATIVE_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES,
+    AUTH_BREAKER_FAILURE_THRESHOLD, AUTH_BREAKER_RESET_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
 
+class AuthServiceUnavailable(Exception):
+    """API сервера не отвечает - проверить игрока сейчас нельзя"""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для запросов к API.
+
+    После failure_threshold ошибок подряд размыкается, и запросы сразу
+    получают отказ. Через reset_timeout секунд пропускает один пробный
+    запрос: успех замыкает цепь, ошибка снова размыкает её.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """Цепь разомкнута и пробовать ещё рано"""
+        return self.state == self.OPEN and self.retry_after() > 0
+
+    def retry_after(self) -> float:
+        """Сколько секунд до пробного запроса"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Можно ли сейчас отправить запрос"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN and self.retry_after() == 0:
+            self.state = self.HALF_OPEN
+            self._probing = False
+
+        # В полуоткрытом состоянии пропускаем только один пробный запрос
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("✅ API сервера снова отвечает")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"🔌 API сервера недоступно, запросы приостановлены на {self.reset_timeout:g} с"
+                )
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
 class AuthChecker:
     def __init__(self):
         self.api_url = API_URL
         self.token = API_TOKEN
         self.debug = DEBUG
-        
+
         if not self.api_url or not self.token:
             raise ValueError("API_URL и API_TOKEN должны быть указаны в .env файле!")
-        
+
         self.headers = {
             "X-Token": self.token,
             "Content-Type": "application/json"
         }
-    
-    def check_player(self, telegram_id: int) -> Tuple[bool, Optional[Dict]]:
+
+        # Клиент с пулом keep-alive соединений создаётся при первом запросе,
+        # уже внутри цикла событий бота
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(AUTH_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(AUTH_BREAKER_FAILURE_THRESHOLD, AUTH_BREAKER_RESET_SECONDS)
+
+        # Кэш ответов API: telegram_id -> (истекает, результат)
+        self._cache = OrderedDict()
+        # Запросы в процессе: повторный запрос того же id ждёт первый
+        self._inflight: Dict[int, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(AUTH_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=AUTH_MAX_CONNECTIONS,
+                    max_keepalive_connections=AUTH_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+
+    async def close(self):
+        """Закрыть пул соединений"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики кэша проверок"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'cached': len(self._cache),
+            'inflight': len(self._inflight),
+            'breaker': self.breaker.state
+        }
+
+    def invalidate(self, telegram_id: int):
+        """Забыть закэшированный ответ для пользователя"""
+        self._cache.pop(telegram_id, None)
+
+    def _cache_get(self, telegram_id: int) -> Optional[Tuple[bool, Optional[Dict]]]:
+        entry = self._cache.get(telegram_id)
+        if entry is None:
+            return None
+
+        expires, result = entry
+        if expires <= time.monotonic():
+            del self._cache[telegram_id]
+            return None
+
+        self._cache.move_to_end(telegram_id)
+        return result
+
+    def _cache_put(self, telegram_id: int, result: Tuple[bool, Optional[Dict]], ttl: float):
+        if ttl <= 0:
+            return
+        self._cache[telegram_id] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(telegram_id)
+        while len(self._cache) > AUTH_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def check_player(self, telegram_id: int, fresh: bool = False) -> Tuple[bool, Optional[Dict]]:
         """
         Проверяет привязан ли Telegram к игроку на сервере
-        
+
+        Найденные игроки кэшируются на AUTH_CACHE_TTL_SECONDS, ненайденные -
+        на AUTH_NEGATIVE_CACHE_TTL_SECONDS. Одновременные проверки одного id
+        ждут один общий запрос к API.
+
         Args:
             telegram_id: ID пользователя в Telegram
-            
+            fresh: не брать ответ из кэша (плановая перепроверка)
+
         Returns:
-            Tuple[bool, Optional[Dict]]: 
+            Tuple[bool, Optional[Dict]]:
                 - True если найден, False если нет
                 - Данные игрока или None
+
+        Raises:
+            AuthServiceUnavailable: API не ответило или предохранитель разомкнут
         """
+        if not fresh:
+            cached = self._cache_get(telegram_id)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        task = self._inflight.get(telegram_id)
+        if task is None:
+            if not self.breaker.allow():
+                raise AuthServiceUnavailable("API сервера временно недоступно")
+            self.misses += 1
+            task = asyncio.create_task(self._lookup(telegram_id))
+            self._inflight[telegram_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(telegram_id, None))
+        else:
+            self.coalesced += 1
+
+        # shield - отмена одного ожидающего не отменяет общий запрос
+        return await asyncio.shield(task)
+
+    async def _lookup(self, telegram_id: int) -> Tuple[bool, Optional[Dict]]:
+        """Запрос к API с записью ответа в кэш и учётом в предохранителе"""
+        try:
+            result, status = await self._request(telegram_id)
+        except asyncio.CancelledError:
+            self.breaker.record_failure()
+            raise
+
+        if status == 200:
+            self._cache_put(telegram_id, result, AUTH_CACHE_TTL_SECONDS)
+        elif status == 404:
+            self._cache_put(telegram_id, result, AUTH_NEGATIVE_CACHE_TTL_SECONDS)
+        else:
+            # Ошибки и таймауты не кэшируем - это не ответ "не найден"
+            self.breaker.record_failure()
+            raise AuthServiceUnavailable(f"API сервера не ответило (статус {status})")
+
+        self.breaker.record_success()
+        return result
+
+    async def _request(self, telegram_id: int) -> Tuple[Tuple[bool, Optional[Dict]], Optional[int]]:
+        """Один запрос к API: (результат проверки, HTTP-статус или None при ошибке)"""
         data = {
             "authType": "TELEGRAM",
             "value": str(telegram_id)
         }
-        
+
         if self.debug:
             logger.debug(f"Проверяю Telegram ID: {telegram_id}")
             logger.debug(f"URL: {self.api_url}")
-        
+
         try:
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json=data,
-                timeout=10
-            )
-            
+            # Не больше AUTH_MAX_CONCURRENCY одновременных запросов к API
+            async with self._semaphore:
+                response = await self.client.post(self.api_url, json=data)
+
             if self.debug:
                 logger.debug(f"Статус: {response.status_code}")
                 logger.debug(f"Ответ: {response.text}")
-            
+
             if response.status_code == 200:
                 player_data = response.json()
                 logger.info(f"✅ Игрок найден: {player_data.get('username')}")
-                return True, player_data
+                return (True, player_data), 200
             elif response.status_code == 404:
                 logger.info(f"❌ Игрок {telegram_id} не найден в базе")
-                return False, None
+                return (False, None), 404
             else:
                 logger.warning(f"⚠️ Неожиданный статус: {response.status_code}")
-                return False, None
-                
-        except requests.exceptions.Timeout:
+                return (False, None), response.status_code
+
+        except httpx.TimeoutException:
             logger.error("⏱️ Таймаут запроса к API")
-            return False, None
-        except requests.exceptions.RequestException as e:
+            return (False, None), None
+        except httpx.HTTPError as e:
             logger.error(f"❌ Ошибка запроса: {e}")
-            return False, None
+            return (False, None), None
         except Exception as e:
             logger.error(f"❌ Неожиданная ошибка: {e}")
-            return False, None
+            return (False, None), None
 
 
 # Глобальный экземпляр
@@ -0,0 +1,237 @@
+"""
+Массовая рассылка с ограничением скорости
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Iterable, Optional
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from database import async_db
+from config import (
+    BROADCAST_RATE_PER_SECOND, BROADCAST_PER_CHAT_INTERVAL,
+    BROADCAST_WORKERS, BROADCAST_PROGRESS_EVERY
+)
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз повторять сообщение после RetryAfter
+MAX_ATTEMPTS = 3
+
+
+def undeliverable_reason(error: TelegramError) -> Optional[str]:
+    """Причина, по которой пользователю нельзя писать вообще (None - ошибка разовая)"""
+    if isinstance(error, Forbidden):
+        # Бот заблокирован или аккаунт удалён
+        return 'forbidden'
+    if isinstance(error, BadRequest) and 'chat not found' in str(error).lower():
+        return 'chat_not_found'
+    return None
+
+
+class TokenBucket:
+    """Ведро токенов: не больше rate отправок в секунду с запасом capacity"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Дождаться и забрать один токен"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Остановить выдачу токенов на seconds секунд"""
+        self._tokens = 0
+        self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+class BroadcastJob:
+    """Состояние одной рассылки: сколько отправлено и сколько не доставлено"""
+
+    def __init__(self, description: str, total: int):
+        self.description = description
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self._done = asyncio.Event()
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def progress(self) -> str:
+        """Строка прогресса для логов и сообщений"""
+        return f"{self.description}: {self.processed}/{self.total} (ошибок: {self.failed})"
+
+    async def wait(self):
+        """Дождаться окончания рассылки"""
+        await self._done.wait()
+
+
+class Broadcaster:
+    """
+    Отправка сообщений с общим лимитом Telegram и лимитом на один чат.
+
+    Одиночные сообщения идут через send(), рассылки - через broadcast():
+    она сразу возвращает BroadcastJob, а сообщения отправляет ограниченный
+    пул воркеров в фоне.
+    """
+
+    def __init__(self, rate: float = BROADCAST_RATE_PER_SECOND,
+                 per_chat_interval: float = BROADCAST_PER_CHAT_INTERVAL,
+                 workers: int = BROADCAST_WORKERS):
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.workers = workers
+
+        self._slots = asyncio.Semaphore(workers)
+        self._chat_next = {}
+        self._tasks = set()
+
+    async def _wait_chat(self, chat_id: int):
+        """Выдержать интервал между сообщениями в один чат"""
+        now = time.monotonic()
+        allowed = max(now, self._chat_next.get(chat_id, 0))
+        self._chat_next[chat_id] = allowed + self.per_chat_interval
+
+        if len(self._chat_next) > 10000:
+            self._chat_next = {cid: t for cid, t in self._chat_next.items() if t > now}
+
+        if allowed > now:
+            await asyncio.sleep(allowed - now)
+
+    async def try_send(self, bot: Bot, chat_id: int, text: str,
+                       parse_mode: str = 'HTML', reply_markup=None) -> Optional[TelegramError]:
+        """Отправить одно сообщение с учётом лимитов, возвращает ошибку или None"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await self._wait_chat(chat_id)
+
+            async with self._slots:
+                await self.bucket.acquire()
+                try:
+                    await bot.send_message(
+                        chat_id=chat_id,
+                        text=text,
+                        parse_mode=parse_mode,
+                        reply_markup=reply_markup
+                    )
+                    return None
+                except RetryAfter as e:
+                    error = e
+                    delay = e.retry_after
+                    if isinstance(delay, timedelta):
+                        delay = delay.total_seconds()
+                    # Ограничение общее для бота - останавливаем всю отправку
+                    self.bucket.pause(delay)
+                    logger.warning(
+                        f"⏳ Telegram просит подождать {delay} с (чат {chat_id}, попытка {attempt})"
+                    )
+                except TelegramError as e:
+                    return e
+
+            # После последней попытки ждать нечего - сразу возвращаем ошибку
+            if attempt < MAX_ATTEMPTS:
+                await asyncio.sleep(delay)
+
+        return error
+
+    async def send(self, bot: Bot, chat_id: int, text: str,
+                   parse_mode: str = 'HTML', reply_markup=None) -> bool:
+        """Отправить одно сообщение с учётом лимитов, возвращает успех"""
+        error = await self.try_send(bot, chat_id, text, parse_mode, reply_markup)
+        if not error:
+            return True
+
+        reason = undeliverable_reason(error)
+        if reason:
+            await async_db.mark_undeliverable([(chat_id, reason)])
+            logger.warning(f"🚫 Пользователь {chat_id} недоступен для сообщений: {error}")
+        else:
+            logger.error(f"❌ Ошибка отправки уведомления {chat_id}: {error}")
+        return False
+
+    def broadcast(self, bot: Bot, chat_ids: Iterable[int], text: str,
+                  parse_mode: str = 'HTML', reply_markup=None,
+                  description: str = "Рассылка",
+                  on_progress: Optional[Callable[[BroadcastJob], Awaitable]] = None) -> BroadcastJob:
+        """
+        Запустить рассылку в фоне
+
+        on_progress вызывается каждые BROADCAST_PROGRESS_EVERY сообщений и в конце.
+        """
+        recipients = list(dict.fromkeys(chat_ids))
+        job = BroadcastJob(description, len(recipients))
+
+        task = asyncio.create_task(
+            self._run(job, bot, recipients, text, parse_mode, reply_markup, on_progress)
+        )
+        # Держим ссылку, иначе задачу может собрать сборщик мусора
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: BroadcastJob, bot: Bot, recipients, text, parse_mode,
+                   reply_markup, on_progress):
+        # Заблокировавших бота пропускаем без запроса к Telegram
+        skipped = await async_db.get_undeliverable_ids(recipients)
+        if skipped:
+            recipients = [chat_id for chat_id in recipients if chat_id not in skipped]
+            job.total = len(recipients)
+
+        queue = asyncio.Queue()
+        for chat_id in recipients:
+            queue.put_nowait(chat_id)
+
+        async def report():
+            logger.info(f"📨 {job.progress()}")
+            if on_progress:
+                try:
+                    await on_progress(job)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка обработчика прогресса рассылки: {e}")
+
+        async def worker():
+            while True:
+                try:
+                    chat_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                if await self.send(bot, chat_id, text, parse_mode, reply_markup):
+                    job.sent += 1
+                else:
+                    job.failed += 1
+
+                if job.processed % BROADCAST_PROGRESS_EVERY == 0 and job.processed < job.total:
+                    await report()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, len(recipients)))))
+        finally:
+            job._done.set()
+            await report()
+
+
+# Глобальный экземпляр - лимиты общие для всего бота
+broadcaster = Broadcaster()
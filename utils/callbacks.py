@@ -0,0 +1,142 @@
+"""
+Компактный формат callback_data кнопок: версия, код маршрута и аргументы
+"""
+import re
+from typing import Any, Dict, Tuple
+
+CALLBACK_VERSION = 1
+SEPARATOR = ':'
+# Ограничение Telegram на callback_data
+MAX_CALLBACK_BYTES = 64
+
+# Все объявленные маршруты по коду
+ROUTES: Dict[str, 'CallbackRoute'] = {}
+
+_LEGACY_ARG = re.compile(r'\d+')
+
+
+class CallbackRoute:
+    """
+    Вид кнопки: короткий код и типизированные аргументы
+
+    PARTY_MEMBERS.pack(12, 3) -> "1pm:12:3",
+    PARTY_MEMBERS.unpack("1pm:12:3") -> {'party_id': 12, 'page': 3}.
+    Поле - (имя, тип) или (имя, тип, значение по умолчанию).
+
+    Кнопки старого формата ("party_members_12_page_3") разбираются по числам
+    после префикса legacy, чтобы уже отправленные клавиатуры не сломались.
+    """
+
+    def __init__(self, code: str, *fields: Tuple, legacy: str = None):
+        if code in ROUTES:
+            raise ValueError(f"Код маршрута {code!r} уже занят")
+
+        self.code = code
+        self.fields = fields
+        self.legacy = legacy
+        self.prefix = f"{CALLBACK_VERSION}{code}"
+        ROUTES[code] = self
+
+    def pack(self, *args) -> str:
+        """Собрать callback_data для кнопки"""
+        if len(args) > len(self.fields):
+            raise ValueError(f"Маршрут {self.code}: лишние аргументы {args}")
+
+        data = SEPARATOR.join([self.prefix, *(str(arg) for arg in args)])
+        if len(data.encode()) > MAX_CALLBACK_BYTES:
+            raise ValueError(f"callback_data длиннее {MAX_CALLBACK_BYTES} байт: {data}")
+        return data
+
+    def unpack(self, data: str) -> Dict[str, Any]:
+        """Разобрать callback_data (нового или старого формата) в именованные аргументы"""
+        if data == self.prefix or data.startswith(self.prefix + SEPARATOR):
+            values = data[len(self.prefix) + 1:].split(SEPARATOR) if data != self.prefix else []
+        elif self.legacy and data.startswith(self.legacy):
+            values = _LEGACY_ARG.findall(data[len(self.legacy):])
+        else:
+            raise ValueError(f"callback_data {data!r} не относится к маршруту {self.code}")
+
+        if len(values) > len(self.fields):
+            raise ValueError(f"Маршрут {self.code}: лишние аргументы в {data!r}")
+
+        args = {}
+        for i, field in enumerate(self.fields):
+            name, convert = field[0], field[1]
+            if i < len(values):
+                args[name] = convert(values[i])
+            elif len(field) > 2:
+                args[name] = field[2]
+            else:
+                raise ValueError(f"Маршрут {self.code}: не хватает аргумента {name} в {data!r}")
+        return args
+
+    @property
+    def pattern(self) -> str:
+        """Регулярное выражение для CallbackQueryHandler (точки входа диалогов)"""
+        options = [re.escape(self.prefix) + f"(?:{SEPARATOR}|$)"]
+        if self.legacy:
+            options.append(re.escape(self.legacy) + ('' if self.fields else '$'))
+        return '^(?:' + '|'.join(options) + ')'
+
+    def __repr__(self):
+        return f'<CallbackRoute {self.code}>'
+
+
+# Меню
+NOOP = CallbackRoute('no', legacy='noop')
+MAIN_MENU = CallbackRoute('mm', legacy='main_menu')
+MENU_PROFILE = CallbackRoute('pr', legacy='menu_profile')
+MENU_POLITICS = CallbackRoute('po', legacy='menu_politics')
+
+# Админка
+ADMIN_PANEL = CallbackRoute('ap', legacy='admin_panel')
+ADMIN_STATS = CallbackRoute('as', legacy='admin_stats')
+ADMIN_LOGS = CallbackRoute('al', legacy='admin_logs')
+ADMIN_CREATE_VOTING = CallbackRoute('cv', legacy='admin_create_voting')
+ADMIN_VOTING_TYPE = CallbackRoute('vt', ('voting_type', str))
+ADMIN_PARLIAMENT = CallbackRoute('pp', legacy='admin_parliament')
+ADMIN_PARLIAMENT_DISSOLVE = CallbackRoute('px', legacy='admin_parliament_dissolve')
+ADMIN_ELECTION_START = CallbackRoute('es', legacy='admin_election_start')
+
+# Парламент и выборы
+PARLIAMENT_VIEW = CallbackRoute('pw', legacy='parliament_view')
+ELECTION_VIEW = CallbackRoute('ev', ('election_id', int))
+ELECTION_PARTIES = CallbackRoute('ep', ('election_id', int), ('page', int, 0))
+ELECTION_VOTE = CallbackRoute('ey', ('election_id', int), ('party_id', int))
+ELECTION_VOTE_CONFIRM = CallbackRoute('ek', ('election_id', int), ('party_id', int))
+
+# Голосования
+VOTING_VIEW = CallbackRoute('vw', ('voting_id', int))
+VOTE = CallbackRoute('vo', ('voting_id', int), ('vote', str))
+VOTE_CONFIRM = CallbackRoute('vk', ('voting_id', int), ('vote', str))
+
+# Партии
+PARTY_MY = CallbackRoute('my', legacy='party_my')
+PARTY_LIST = CallbackRoute('pl', legacy='party_list')
+PARTY_CREATE = CallbackRoute('pc', legacy='party_create')
+# Выбор идеологии - кнопка диалога создания партии
+PARTY_IDEOLOGY_CHOICE = CallbackRoute('id', ('ideology', str))
+# Страницы списка: номер страницы и позиция-курсор (после after или перед before)
+_PAGE = (('page', int, 0), ('after', int, 0), ('before', int, 0))
+PARTY_MEMBERS = CallbackRoute('pm', ('party_id', int), *_PAGE, legacy='party_members_')
+PARTY_MANAGE = CallbackRoute('pg', ('party_id', int), legacy='party_manage_')
+PARTY_EDIT_NAME = CallbackRoute('en', ('party_id', int), legacy='party_edit_name_')
+PARTY_EDIT_LIST = CallbackRoute('el', ('party_id', int), *_PAGE, legacy='party_edit_list_')
+PARTY_TRANSFER = CallbackRoute('tl', ('party_id', int), *_PAGE, legacy='party_transfer_')
+PARTY_LEAVE = CallbackRoute('lv', ('party_id', int), legacy='party_leave_')
+PARTY_LEAVE_CONFIRM = CallbackRoute('lc', ('party_id', int), legacy='confirm_leave_')
+PARTY_DELETE = CallbackRoute('pd', ('party_id', int), legacy='party_delete_')
+PARTY_DELETE_CONFIRM = CallbackRoute('dd', ('party_id', int), legacy='do_delete_party_')
+
+# Заявки
+PARTY_APPLICATIONS = CallbackRoute('pa', ('party_id', int), legacy='party_applications_')
+APP_APPROVE = CallbackRoute('aa', ('app_id', int), legacy='app_approve_')
+APP_REJECT = CallbackRoute('ar', ('app_id', int), legacy='app_reject_')
+
+# Члены партии
+MEMBER_ACTIONS = CallbackRoute('ma', ('party_id', int), ('member_id', int), legacy='member_actions_')
+MEMBER_SET_POSITION = CallbackRoute('ms', ('party_id', int), ('member_id', int), legacy='member_setpos_')
+MEMBER_KICK = CallbackRoute('mk', ('party_id', int), ('member_id', int), legacy='member_kick_')
+MEMBER_KICK_CONFIRM = CallbackRoute('dk', ('party_id', int), ('member_id', int), legacy='do_kick_')
+MEMBER_TRANSFER = CallbackRoute('mt', ('party_id', int), ('new_leader_id', int), legacy='member_transfer_')
+MEMBER_TRANSFER_CONFIRM = CallbackRoute('dt', ('party_id', int), ('new_leader_id', int), legacy='do_transfer_')
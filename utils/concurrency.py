@@ -0,0 +1,86 @@
+"""
+Параллельная обработка апдейтов: очередь на пользователя и замки партий
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, Hashable, List, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class KeyedLock:
+    """
+    asyncio.Lock на каждый ключ (пользователя, партию).
+
+    Замок создаётся при первом обращении и удаляется, когда его больше
+    никто не держит и не ждёт, поэтому словарь не растёт со временем.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, List] = {}  # ключ -> [замок, держатели и ожидающие]
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+# Изменения состава партии (вступление, исключение, выход, передача
+# лидерства, порядок списка) проверяют состояние и пишут его - под замком
+# партии, чтобы параллельные апдейты не перепутали list_position и members_count
+party_locks = KeyedLock()
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Апдейты разных пользователей обрабатываются параллельно, одного - строго по очереди.
+
+    Порядок внутри пользователя сохраняет диалоги (ConversationHandler) и
+    защищает от двойного нажатия кнопки. Ожидающий своей очереди апдейт
+    не занимает общий лимит max_concurrent_updates.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._users = KeyedLock()
+
+    @staticmethod
+    def _key(update: object) -> Optional[int]:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return update.effective_user.id
+        if update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        async with self._users.hold(key):
+            await super().process_update(update, coroutine)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,96 @@
+"""
+Контекст обработки одного апдейта
+"""
+from typing import Dict, Optional
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from database import async_db
+from config import ADMIN_IDS
+
+_UNSET = object()
+
+
+class RequestContext:
+    """
+    Факты о пользователе в рамках одного апдейта.
+
+    Каждый факт (пользователь, партия, членство, депутат, админ) загружается
+    лениво и не больше одного раза - декораторы и обработчик делят один объект.
+    """
+
+    def __init__(self, update_id: int, telegram_id: int):
+        self.update_id = update_id
+        self.telegram_id = telegram_id
+
+        self._user = _UNSET
+        self._party = _UNSET
+        self._is_deputy = _UNSET
+        self._users: Dict[int, Optional[Dict]] = {}
+        self._parties: Dict[int, Optional[Dict]] = {}
+        self._members: Dict[tuple, Optional[Dict]] = {}
+
+    @property
+    def is_admin(self) -> bool:
+        """Администратор ли пользователь"""
+        return self.telegram_id in ADMIN_IDS
+
+    async def user(self) -> Optional[Dict]:
+        """Запись текущего пользователя"""
+        if self._user is _UNSET:
+            self._user = await async_db.get_user(self.telegram_id)
+        return self._user
+
+    def set_user(self, user: Optional[Dict]):
+        """Запомнить пользователя (например, сразу после регистрации)"""
+        self._user = user
+
+    async def party(self) -> Optional[Dict]:
+        """Партия текущего пользователя"""
+        if self._party is _UNSET:
+            self._party = await async_db.get_user_party(self.telegram_id)
+            if self._party:
+                self._parties[self._party['id']] = self._party
+        return self._party
+
+    async def is_leader(self) -> bool:
+        """Глава ли пользователь своей партии"""
+        party = await self.party()
+        return bool(party) and party['leader_telegram_id'] == self.telegram_id
+
+    async def is_deputy(self) -> bool:
+        """Депутат ли пользователь"""
+        if self._is_deputy is _UNSET:
+            self._is_deputy = await async_db.is_deputy(self.telegram_id)
+        return self._is_deputy
+
+    async def get_user(self, telegram_id: int) -> Optional[Dict]:
+        """Пользователь по telegram_id (свой - из user())"""
+        if telegram_id == self.telegram_id:
+            return await self.user()
+        if telegram_id not in self._users:
+            self._users[telegram_id] = await async_db.get_user(telegram_id)
+        return self._users[telegram_id]
+
+    async def get_party(self, party_id: int) -> Optional[Dict]:
+        """Партия по ID (своя партия уже могла быть загружена декоратором)"""
+        if party_id not in self._parties:
+            self._parties[party_id] = await async_db.get_party_by_id(party_id)
+        return self._parties[party_id]
+
+    async def get_member(self, telegram_id: int, party_id: int) -> Optional[Dict]:
+        """Информация о члене партии"""
+        key = (telegram_id, party_id)
+        if key not in self._members:
+            self._members[key] = await async_db.get_member_info(telegram_id, party_id)
+        return self._members[key]
+
+
+def request_context(update: Update, context: ContextTypes.DEFAULT_TYPE) -> RequestContext:
+    """Контекст текущего апдейта (создаётся при первом обращении)"""
+    ctx = getattr(context, 'request_ctx', None)
+    if ctx is None or ctx.update_id != update.update_id:
+        ctx = RequestContext(update.update_id, update.effective_user.id)
+        context.request_ctx = ctx
+    return ctx
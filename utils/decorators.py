@@ -6,13 +6,22 @@ from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 
-from database import db
-from utils.auth import auth_checker
-from config import ADMIN_IDS
+from database import async_db
+from utils.auth import auth_checker, AuthServiceUnavailable
+from utils.context import request_context
 
 logger = logging.getLogger(__name__)
 
 
+async def reply_auth_unavailable(update: Update):
+    """Быстрый ответ, пока API сервера недоступно"""
+    text = "⏳ Проверка аккаунта временно недоступна. Попробуй через пару минут"
+    if update.callback_query:
+        await update.callback_query.answer(text, show_alert=True)
+    else:
+        await update.message.reply_text(text)
+
+
 def require_auth(func):
     """Декоратор для проверки авторизации пользователя"""
     @wraps(func)
@@ -22,17 +31,23 @@ def require_auth(func):
             return
         
         telegram_id = user.id
+        ctx = request_context(update, context)
         
         # Проверяем есть ли в БД
-        user_data = db.get_user(telegram_id)
+        user_data = await ctx.user()
         
         if not user_data:
             # Пытаемся проверить через API
-            is_linked, player_data = auth_checker.check_player(telegram_id)
+            try:
+                is_linked, player_data = await auth_checker.check_player(telegram_id)
+            except AuthServiceUnavailable:
+                await reply_auth_unavailable(update)
+                return
             
             if is_linked:
                 minecraft_username = player_data.get('username')
-                db.add_user(telegram_id, minecraft_username)
+                await async_db.add_user(telegram_id, minecraft_username)
+                ctx.set_user(await async_db.get_user(telegram_id))
                 logger.info(f"✅ Новый пользователь добавлен: {minecraft_username}")
             else:
                 # Отправляем сообщение о необходимости регистрации
@@ -66,7 +81,7 @@ def require_admin(func):
         
         telegram_id = user.id
         
-        if telegram_id not in ADMIN_IDS:
+        if not request_context(update, context).is_admin:
             if hasattr(update, 'callback_query') and update.callback_query:
                 await update.callback_query.answer(
                     "⛔ Доступно только администраторам",
@@ -90,7 +105,7 @@ def require_party_leader(func):
             return
         
         telegram_id = user.id
-        party = db.get_user_party(telegram_id)
+        party = await request_context(update, context).party()
         
         if not party:
             if hasattr(update, 'callback_query') and update.callback_query:
@@ -120,9 +135,7 @@ def require_deputy(func):
         if not user:
             return
         
-        telegram_id = user.id
-        
-        if not db.is_deputy(telegram_id):
+        if not await request_context(update, context).is_deputy():
             if hasattr(update, 'callback_query') and update.callback_query:
                 await update.callback_query.answer(
                     "❌ Только для депутатов",
@@ -3,7 +3,8 @@
 """
 import logging
 from telegram import Bot
-from telegram.error import TelegramError
+
+from utils.broadcast import broadcaster, BroadcastJob
 
 logger = logging.getLogger(__name__)
 
@@ -19,42 +20,32 @@ async def send_notification(bot: Bot, telegram_id: int, message: str, parse_mode
         parse_mode: Режим парсинга (HTML/Markdown)
         reply_markup: Клавиатура (опционально)
     """
-    try:
-        await bot.send_message(
-            chat_id=telegram_id,
-            text=message,
-            parse_mode=parse_mode,
-            reply_markup=reply_markup
-        )
+    if await broadcaster.send(bot, telegram_id, message, parse_mode, reply_markup):
         logger.info(f"✅ Уведомление отправлено пользователю {telegram_id}")
-    except TelegramError as e:
-        logger.error(f"❌ Ошибка отправки уведомления {telegram_id}: {e}")
 
 
-async def notify_party_members(bot: Bot, party_id: int, message: str, exclude_id: int = None):
+async def notify_party_members(bot: Bot, party_id: int, message: str, exclude_id: int = None) -> BroadcastJob:
     """
     Отправить уведомление всем членам партии
     
+    Рассылка идёт в фоне - функция возвращается сразу после чтения списка.
+    
     Args:
         bot: Экземпляр бота
         party_id: ID партии
         message: Текст сообщения
         exclude_id: ID пользователя которого исключить (опционально)
     """
-    from database import db
+    from database import async_db
     
-    members = db.get_party_members(party_id)
+    recipients = await async_db.get_party_member_recipients(party_id, exclude_id)
     
-    for member in members:
-        if exclude_id and member['telegram_id'] == exclude_id:
-            continue
-        
-        await send_notification(bot, member['telegram_id'], message)
+    return broadcaster.broadcast(bot, recipients, message, description=f"Рассылка партии {party_id}")
 
 
-async def notify_admins(bot: Bot, message: str):
+async def notify_admins(bot: Bot, message: str) -> BroadcastJob:
     """
-    Отправить уведомление всем администраторам
+    Отправить уведомление всем администраторам (в фоне)
     
     Args:
         bot: Экземпляр бота
@@ -62,5 +53,4 @@ async def notify_admins(bot: Bot, message: str):
     """
     from config import ADMIN_IDS
     
-    for admin_id in ADMIN_IDS:
-        await send_notification(bot, admin_id, message)
+    return broadcaster.broadcast(bot, ADMIN_IDS, message, description="Рассылка администраторам")
@@ -0,0 +1,172 @@
+"""
+Очередь исходящих уведомлений (notification_outbox) и её диспетчер
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError, TimedOut
+
+from database import async_db
+from utils.broadcast import broadcaster, undeliverable_reason
+from config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_POLL_SECONDS, OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_BACKOFF_BASE_SECONDS, OUTBOX_BACKOFF_MAX_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_item(chat_id: int, text: str, dedup_key: str = None,
+                parse_mode: str = 'HTML', reply_markup: InlineKeyboardMarkup = None) -> Tuple:
+    """Строка для Database.enqueue_notifications (можно ставить внутри своей транзакции)"""
+    markup = reply_markup.to_json() if reply_markup else None
+    return (chat_id, text, parse_mode, markup, dedup_key)
+
+
+def is_transient(error: TelegramError) -> bool:
+    """Стоит ли повторять отправку после такой ошибки"""
+    if isinstance(error, BadRequest):
+        return False
+    return isinstance(error, (RetryAfter, TimedOut, NetworkError))
+
+
+class OutboxDispatcher:
+    """
+    Фоновая отправка уведомлений из очереди в БД.
+
+    Забирает пачку готовых записей, отправляет их через broadcaster и
+    одной транзакцией записывает итог: отправлено, повторить позже
+    (экспоненциальная задержка) или не доставлено. Записи, которые были
+    в отправке при остановке процесса, при запуске возвращаются в очередь.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.bot: Optional[Bot] = None
+
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = None
+
+    async def start(self, bot: Bot):
+        """Запустить диспетчер"""
+        self.bot = bot
+        self._stopping = False
+
+        restored = await async_db.reset_inflight_notifications()
+        if restored:
+            logger.info(f"📮 Возвращено в очередь после перезапуска: {restored} уведомлений")
+
+        self._task = asyncio.create_task(self._run())
+        logger.info("📮 Диспетчер уведомлений запущен")
+
+    async def stop(self):
+        """Дождаться текущей пачки и остановить диспетчер"""
+        if not self._task:
+            return
+        self._stopping = True
+        self.wake()
+        await self._task
+        self._task = None
+
+    def wake(self):
+        """Разбудить диспетчер, не дожидаясь следующего опроса"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                processed = await self.dispatch_batch()
+            except Exception as e:
+                logger.error(f"❌ Ошибка диспетчера уведомлений: {e}")
+                processed = 0
+
+            # Полная пачка - скорее всего, в очереди есть ещё
+            if processed >= self.batch_size:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def dispatch_batch(self) -> int:
+        """Отправить одну пачку, возвращает количество обработанных записей"""
+        rows = await async_db.claim_notifications(self.batch_size)
+        if not rows:
+            return 0
+
+        # Сбой одной отправки не должен оставить остальные записи пачки в статусе sending
+        errors = await asyncio.gather(*(self._send(row) for row in rows), return_exceptions=True)
+
+        sent, retry, failed, undeliverable = [], [], [], []
+        for row, error in zip(rows, errors):
+            if error is None:
+                sent.append(row['id'])
+            elif not isinstance(error, TelegramError):
+                # Ошибка в самом боте (разбор клавиатуры и т.п.) - возвращаем запись в очередь
+                logger.error(f"❌ Сбой отправки уведомления {row['id']}: {error!r}")
+                if row['attempts'] < OUTBOX_MAX_ATTEMPTS:
+                    retry.append((row['id'], self._next_attempt(row), repr(error)))
+                else:
+                    failed.append((row['id'], repr(error)))
+            elif undeliverable_reason(error):
+                failed.append((row['id'], str(error)))
+                undeliverable.append((row['chat_id'], undeliverable_reason(error)))
+            elif is_transient(error) and row['attempts'] < OUTBOX_MAX_ATTEMPTS:
+                retry.append((row['id'], self._next_attempt(row), str(error)))
+            else:
+                failed.append((row['id'], str(error)))
+                logger.error(f"❌ Уведомление {row['id']} для {row['chat_id']} не доставлено: {error}")
+
+        await async_db.complete_notifications(sent, retry, failed, undeliverable)
+
+        if retry or failed:
+            logger.info(
+                f"📮 Пачка уведомлений: отправлено {len(sent)}, "
+                f"повтор {len(retry)}, не доставлено {len(failed)}"
+            )
+        return len(rows)
+
+    @staticmethod
+    def _next_attempt(row) -> datetime:
+        """Время следующей попытки: экспоненциальная задержка по числу попыток"""
+        delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (row['attempts'] - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+        return datetime.now() + timedelta(seconds=delay)
+
+    async def _send(self, row) -> Optional[TelegramError]:
+        markup = None
+        if row['reply_markup']:
+            markup = InlineKeyboardMarkup.de_json(json.loads(row['reply_markup']), self.bot)
+
+        return await broadcaster.try_send(self.bot, row['chat_id'], row['text'], row['parse_mode'], markup)
+
+
+# Глобальный экземпляр
+outbox = OutboxDispatcher()
+
+
+async def enqueue_notification(chat_id: int, text: str, dedup_key: str = None,
+                               parse_mode: str = 'HTML', reply_markup: InlineKeyboardMarkup = None) -> bool:
+    """Поставить уведомление в очередь; False - такое уже стоит (dedup_key)"""
+    added = await async_db.enqueue_notifications([outbox_item(chat_id, text, dedup_key, parse_mode, reply_markup)])
+    outbox.wake()
+    return added > 0
+
+
+async def enqueue_broadcast(chat_ids: Iterable[int], text: str, dedup_prefix: str = None,
+                            parse_mode: str = 'HTML') -> int:
+    """Поставить в очередь одно сообщение для многих чатов, ключ - dedup_prefix:chat_id"""
+    items = [
+        outbox_item(chat_id, text, f"{dedup_prefix}:{chat_id}" if dedup_prefix else None, parse_mode)
+        for chat_id in dict.fromkeys(chat_ids)
+    ]
+    added = await async_db.enqueue_notifications(items)
+    outbox.wake()
+    return added
@@ -0,0 +1,126 @@
+"""
+Отрисовка партий с кэшированием готового текста
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+from database import async_db
+from database.cache import LRUCache
+from config import DB_CACHE_MAX_ENTRIES, PARTY_MEMBERS_PAGE_SIZE
+
+# Готовый список партий: (версия списка, username бота) -> текст
+_party_list_cache = {'key': None, 'text': None}
+
+# Готовые карточки: (вид, party_id) -> (версия партии, текст).
+# Ограничен по размеру: карточки удалённых партий со временем вытесняются
+_party_cards = LRUCache(DB_CACHE_MAX_ENTRIES)
+
+
+async def render_party_list(bot_username: str) -> Optional[str]:
+    """
+    Текст списка зарегистрированных партий (None - партий нет).
+
+    Пересобирается, только если с прошлого раза изменилось название, глава,
+    регистрация или численность какой-либо партии.
+    """
+    # Версию читаем до запроса: изменение во время сборки просто вызовет
+    # ещё одну пересборку при следующем обращении
+    key = (async_db.database.party_list_version, bot_username)
+    if _party_list_cache['key'] == key:
+        return _party_list_cache['text']
+
+    parties = await async_db.get_registered_parties_with_leaders()
+
+    if parties:
+        text = "📋 <b>Зарегистрированные партии</b>\n\n"
+
+        for i, party in enumerate(parties, 1):
+            leader_name = party['leader_username'] or "???"
+
+            text += f"{i}. <b>{party['name']}</b> • {party['ideology']}\n"
+            text += f"   👑 {leader_name} • "
+            text += f"👥 <a href='https://t.me/{bot_username}?start=party_{party['id']}'>{party['members_count']} участников</a>\n\n"
+
+        text += "\n<i>Нажми на участников для просмотра состава</i>"
+    else:
+        text = None
+
+    _party_list_cache['key'] = key
+    _party_list_cache['text'] = text
+    return text
+
+
+async def _render_cached(kind: str, party_id: int, build) -> Optional[str]:
+    """Текст из кэша карточек, если версия партии не изменилась"""
+    version = async_db.database.party_version(party_id)
+    cached = _party_cards.get((kind, party_id))
+    if cached and cached[0] == version:
+        return cached[1]
+
+    text = await build(party_id)
+    _party_cards.put((kind, party_id), (version, text))
+    return text
+
+
+async def load_members_page(party_id: int, after: int = 0, before: int = 0) -> Tuple[List[Dict], bool, bool]:
+    """
+    Страница членов партии по курсору позиции: (члены, есть предыдущая, есть следующая).
+
+    Без курсора - первая страница. Запрашивается на одного больше размера
+    страницы, чтобы узнать, есть ли что-то дальше, без подсчёта всех членов.
+    """
+    size = PARTY_MEMBERS_PAGE_SIZE
+
+    if before:
+        members = await async_db.get_party_members_page(party_id, before=before, limit=size + 1)
+        if members:
+            return members[-size:], len(members) > size, True
+        # Всех перед курсором уже исключили - показываем начало списка
+
+    members = await async_db.get_party_members_page(party_id, after=after, limit=size + 1)
+    return members[:size], bool(after), len(members) > size
+
+
+def members_page_count(party: Dict) -> int:
+    """Сколько страниц в списке членов партии"""
+    return max(1, math.ceil(party['members_count'] / PARTY_MEMBERS_PAGE_SIZE))
+
+
+async def _build_party_card(party_id: int) -> Optional[str]:
+    party = await async_db.get_party_by_id(party_id)
+    if not party:
+        return None
+
+    # В карточке - только первая страница: сообщение не упрётся в лимит 4096 символов
+    members, _, has_next = await load_members_page(party_id)
+    leader = await async_db.get_user(party['leader_telegram_id'])
+    leader_name = leader['minecraft_username'] if leader else "???"
+
+    text = f"🏛️ <b>{party['name']}</b>\n\n"
+    text += f"🎯 Идеология: {party['ideology']}\n"
+    text += f"👑 Глава: {leader_name}\n"
+    text += f"👥 Членов: {party['members_count']}\n\n"
+    text += f"📋 <b>Описание:</b>\n{party['description']}\n\n"
+    text += f"<b>Список членов:</b>\n"
+
+    for member in members:
+        role_icon = "👑" if member['role'] == 'leader' else "👤"
+        text += f"{member['list_position']}. {role_icon} {member['minecraft_username']}\n"
+
+    if has_next:
+        text += f"… и ещё {party['members_count'] - len(members)}\n"
+
+    return text
+
+
+async def render_party_card(party_id: int) -> Optional[str]:
+    """Карточка партии: описание, глава и список членов (None - партии нет)"""
+    return await _render_cached('card', party_id, _build_party_card)
+
+
+def render_party_members(party: Dict, page: int) -> str:
+    """Заголовок страницы списка членов (сами члены - кнопками клавиатуры)"""
+    return (
+        f"👥 <b>Члены партии {party['name']}</b>\n\n"
+        f"Всего: {party['members_count']} • Страница {page + 1} из {members_page_count(party)}"
+    )
@@ -0,0 +1,115 @@
+"""
+Маршрутизация кнопок и deep link по префиксному дереву
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import ContextTypes, CallbackQueryHandler
+
+from utils.callbacks import CallbackRoute
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[Any]]
+
+_END = object()
+
+
+class PrefixTrie:
+    """Префиксное дерево: самый длинный ключ, с которого начинается строка"""
+
+    def __init__(self):
+        self._root: Dict = {}
+
+    def insert(self, key: str, value: Any):
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        if _END in node:
+            raise ValueError(f"Префикс {key!r} уже зарегистрирован")
+        node[_END] = value
+
+    def longest_prefix(self, text: str) -> Optional[Tuple[int, Any]]:
+        """(длина совпавшего префикса, значение) или None"""
+        node, found = self._root, None
+        for i, char in enumerate(text):
+            if _END in node:
+                found = (i, node[_END])
+            node = node.get(char)
+            if node is None:
+                return found
+        if _END in node:
+            found = (len(text), node[_END])
+        return found
+
+
+class CallbackRouter:
+    """
+    Один CallbackQueryHandler вместо списка с регулярками.
+
+    Маршрут находится за один проход по callback_data, аргументы разбираются
+    один раз и передаются обработчику именованными: handler(update, context, party_id=12).
+    """
+
+    def __init__(self):
+        self._trie = PrefixTrie()
+
+    def add(self, route: CallbackRoute, handler: Handler):
+        self._trie.insert(route.prefix, (route, handler))
+        if route.legacy:
+            self._trie.insert(route.legacy, (route, handler))
+
+    def extend(self, routes):
+        for route, handler in routes:
+            self.add(route, handler)
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        data = query.data or ''
+
+        match = self._trie.longest_prefix(data)
+        args = None
+        if match:
+            route, handler = match[1]
+            try:
+                args = route.unpack(data)
+            except ValueError:
+                pass
+
+        if args is None:
+            logger.debug(f"⚠️ Неизвестная кнопка: {data!r}")
+            await query.answer("⌛ Кнопка устарела, открой меню заново")
+            return
+
+        return await handler(update, context, **args)
+
+    def handler(self) -> CallbackQueryHandler:
+        """Обработчик для Application (регистрируется последним)"""
+        return CallbackQueryHandler(self.dispatch)
+
+
+class DeepLinkRouter:
+    """Маршрутизация параметра /start <payload> по префиксу: join_, party_, ..."""
+
+    def __init__(self):
+        self._trie = PrefixTrie()
+
+    def add(self, prefix: str, handler: Handler, field: str, convert: Callable = str):
+        self._trie.insert(prefix, (handler, field, convert))
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE, payload: str) -> bool:
+        """Вызвать обработчик payload; False - если такого deep link нет"""
+        match = self._trie.longest_prefix(payload)
+        if not match:
+            return False
+
+        length, (handler, field, convert) = match
+        try:
+            value = convert(payload[length:])
+        except ValueError:
+            logger.debug(f"⚠️ Некорректный deep link: {payload!r}")
+            return False
+
+        await handler(update, context, **{field: value})
+        return True